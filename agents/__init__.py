@@ -3,15 +3,23 @@ NSE Options Trading Multi-Agent System
 
 Specialist agents for analyzing different aspects of NSE options trading.
 Each agent returns a confidence score (0-100) and detailed reasoning.
+
+Agent classes are imported on first attribute access (PEP 562), so
+``import agents`` stays cheap until an agent is actually used.
 """
+from utils.lazy import lazy_exports
 
-from .options_chain_analyzer import OptionsChainAnalyzer
-from .intraday_strategy_agent import IntradayStrategyAgent
-from .swing_strategy_agent import SwingStrategyAgent
-from .sentiment_scout import SentimentScout
-from .risk_manager import RiskManager
-from .main_decision_agent import MainDecisionAgent
-from .base_agent import BaseAgent, AgentResponse
+# Exported name -> submodule defining it
+_EXPORTS = {
+    'BaseAgent': 'base_agent',
+    'AgentResponse': 'base_agent',
+    'OptionsChainAnalyzer': 'options_chain_analyzer',
+    'IntradayStrategyAgent': 'intraday_strategy_agent',
+    'SwingStrategyAgent': 'swing_strategy_agent',
+    'SentimentScout': 'sentiment_scout',
+    'RiskManager': 'risk_manager',
+    'MainDecisionAgent': 'main_decision_agent',
+}
 
 __all__ = [
     'BaseAgent',
@@ -23,3 +31,5 @@ __all__ = [
     'RiskManager',
     'MainDecisionAgent',
 ]
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
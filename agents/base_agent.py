@@ -3,6 +3,7 @@
 All specialist agents inherit from this base class to ensure consistent interfaces.
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Dict, Any, Optional, List
@@ -37,6 +38,12 @@ class AgentResponse:
 class BaseAgent(ABC):
     """Abstract base class for all trading agents."""
     
+    # 'cpu' for agents dominated by computation, 'io' for agents that mostly wait;
+    # AgentRunner sends 'cpu' agents to worker processes in process mode
+    workload = "io"
+    # False if the agent's state must live in the orchestrator process
+    process_safe = True
+    
     def __init__(self, name: str, trade_type: str = "INTRADAY"):
         """Initialize the agent.
         
@@ -67,6 +74,21 @@ class BaseAgent(ABC):
         """
         pass
     
+    async def analyze_async(self, symbol: str,
+                            option_chain: Optional[Dict] = None,
+                            market_data: Optional[Dict] = None,
+                            sentiment_data: Optional[Dict] = None) -> AgentResponse:
+        """Awaitable ``analyze`` for event-loop orchestration.
+        
+        The default runs the synchronous ``analyze`` on a worker thread.
+        Agents that wait on the network should override this with native
+        async I/O so a pending fetch doesn't occupy a thread.
+        """
+        return await asyncio.to_thread(self.analyze, symbol, option_chain, market_data, sentiment_data)
+    
+    def close(self) -> None:
+        """Release resources held across calls (flush caches, files)."""
+    
     def validate_inputs(self, **kwargs) -> bool:
         """Validate that required inputs are present."""
         return True
@@ -1,11 +1,11 @@
 """Intraday Strategy Agent."""
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional
 from datetime import datetime
-import numpy as np
 
 from utils.decorators import validate_symbol, log_execution_time
 from utils.logger import get_logger
+from analysis.indicators import IndicatorEngine, IntradayIndicators
 
 from agents.base_agent import BaseAgent, AgentResponse
 
@@ -15,10 +15,14 @@ logger = get_logger('intraday_agent')
 class IntradayStrategyAgent(BaseAgent):
     """Generates intraday trading signals based on technical analysis."""
     
+    workload = "cpu"
+    
     def __init__(self):
         super().__init__(name="IntradayStrategyAgent", trade_type="INTRADAY")
         self.description = "Short-term setups: VWAP, ORB, support/resistance, momentum"
         self.timeframes = ['15min', '30min', '1h']
+        # Per-symbol indicator state, advanced only by bars not seen before
+        self.indicators = IndicatorEngine(IntradayIndicators, time_field='time')
     
     def is_optimal_entry_time(self, current_time: datetime) -> bool:
         """Only trade during optimal hours (10 AM - 2 PM IST)."""
@@ -50,35 +54,31 @@ class IntradayStrategyAgent(BaseAgent):
             )
         
         ohlc = market_data['ohlc_intraday']
-        closes = [c['close'] for c in ohlc]
-        if len(closes) < 5:
+        if len(ohlc) < 5:
             return AgentResponse(
                 agent_name=self.name, confidence=0, signal="NO_SIGNAL",
                 reasoning="Insufficient data", metadata={},
                 timestamp=datetime.now(), trade_type="INTRADAY"
             )
         
-        highs = [c['high'] for c in ohlc]
-        lows = [c['low'] for c in ohlc]
-        volumes = [c['volume'] for c in ohlc]
-        current_price = closes[-1]
+        state = self.indicators.sync(symbol, ohlc)
+        current_price = state.close
         
         # VWAP
-        vwap = self._calculate_vwap(ohlc)
+        vwap = state.vwap
         if current_price > vwap * 1.005:
             signals.append(("BUY", 20, "Above VWAP"))
         elif current_price < vwap * 0.995:
             signals.append(("SELL", 20, "Below VWAP"))
         
         # ORB
-        orb = self._analyze_orb(ohlc)
+        orb = state.orb
         if orb in ["BUY", "SELL"]:
             signals.append((orb, 25, "ORB breakout"))
         
         # Volume spike
-        avg_vol = np.mean(volumes[-10:] if len(volumes) >= 10 else volumes)
-        if volumes[-1] > avg_vol * 1.5:
-            trend = "BUY" if closes[-1] > closes[-2] else "SELL"
+        if state.volume > state.avg_volume * 1.5:
+            trend = "BUY" if state.close > state.prev_close else "SELL"
             signals.append((trend, 15, "Volume spike"))
         
         # Support/Resistance
@@ -93,7 +93,7 @@ class IntradayStrategyAgent(BaseAgent):
                 break
         
         # RSI
-        rsi = self._calculate_rsi(closes)
+        rsi = state.rsi
         if rsi < 30:
             signals.append(("BUY", 10, f"RSI {rsi:.1f}"))
         elif rsi > 70:
@@ -121,39 +121,3 @@ class IntradayStrategyAgent(BaseAgent):
             metadata={'vwap': vwap, 'rsi': rsi}, timestamp=datetime.now(),
             trade_type="INTRADAY"
         )
-    
-    def _calculate_vwap(self, ohlc: List[Dict]) -> float:
-        """Calculate VWAP."""
-        tp_vol, vol_sum = [], 0
-        for bar in ohlc:
-            tp = (bar['high'] + bar['low'] + bar['close']) / 3
-            vol = bar['volume']
-            tp_vol.append(tp * vol)
-            vol_sum += vol
-        return sum(tp_vol) / vol_sum if vol_sum > 0 else 0
-    
-    def _analyze_orb(self, ohlc: List[Dict], bars: int = 5) -> str:
-        """Analyze Opening Range Breakout."""
-        if len(ohlc) < bars + 3:
-            return "HOLD"
-        opening_high = max(c['high'] for c in ohlc[:bars])
-        opening_low = min(c['low'] for c in ohlc[:bars])
-        for candle in ohlc[bars:bars+3]:
-            if candle['close'] > opening_high:
-                return "BUY"
-            elif candle['close'] < opening_low:
-                return "SELL"
-        return "HOLD"
-    
-    def _calculate_rsi(self, closes: List[float], period: int = 14) -> float:
-        """Calculate RSI."""
-        if len(closes) < period + 1:
-            return 50.0
-        deltas = [closes[i] - closes[i-1] for i in range(1, len(closes))]
-        gains = [d if d > 0 else 0 for d in deltas[-period:]]
-        losses = [-d if d < 0 else 0 for d in deltas[-period:]]
-        avg_gain = np.mean(gains)
-        avg_loss = np.mean(losses)
-        if avg_loss == 0:
-            return 100.0
-        return 100 - (100 / (1 + avg_gain / avg_loss))
@@ -16,10 +16,35 @@ except ImportError:
 class MainDecisionAgent(BaseAgent):
     """Orchestrates all agents and makes final trading decisions."""
     
-    def __init__(self, config_path: str = "config.yaml"):
+    MISSING_AGENT_POLICIES = ('redistribute', 'neutral')
+    # No trade without these agents, whatever the missing agent policy
+    REQUIRED_AGENTS = ('RiskManager',)
+    # Highest confidence a BUY/SELL downgraded by those gates reports (below HOLD)
+    GATED_CONFIDENCE_CAP = 49.0
+    
+    def __init__(
+        self,
+        config_path: str = "config.yaml",
+        missing_agent_policy: str = "redistribute",
+        min_weight_coverage: float = 0.6
+    ):
+        """Initialize the decision agent.
+        
+        Args:
+            config_path: Config file holding agent_weights
+            missing_agent_policy: How agents that didn't answer in time count:
+                'redistribute' spreads their weight over the agents that did,
+                'neutral' counts them as a HOLD
+            min_weight_coverage: Share of agent weight that must have answered
+                before a BUY/SELL can stand
+        """
         super().__init__(name="MainDecisionAgent", trade_type="BOTH")
+        if missing_agent_policy not in self.MISSING_AGENT_POLICIES:
+            raise ValueError(f"Unknown missing agent policy: {missing_agent_policy}")
         self.description = "Aggregates agent votes, calculates composite probability, executes if >70%"
         self.agent_weights = self._load_weights(config_path)
+        self.missing_agent_policy = missing_agent_policy
+        self.min_weight_coverage = min_weight_coverage
         self.threshold = 0.70
         self.decision_history = []
     
@@ -45,23 +70,33 @@ class MainDecisionAgent(BaseAgent):
             }
     
     def aggregate(self, agent_responses: List[AgentResponse], 
-                  trade_type: str = "INTRADAY") -> AgentResponse:
+                  trade_type: str = "INTRADAY",
+                  missing_agents: Optional[List[str]] = None) -> AgentResponse:
         """Aggregate all agent responses and make final decision.
         
         Args:
             agent_responses: List of responses from specialist agents
             trade_type: 'INTRADAY' or 'SWING'
+            missing_agents: Agents that didn't respond before the decision
+                deadline, counted according to ``missing_agent_policy``
+                (default: weighted agents absent from ``agent_responses``)
             
         Returns:
             Final decision with composite confidence score
         """
+        if missing_agents is None:
+            responded = {response.agent_name for response in agent_responses}
+            missing_agents = [name for name in self.agent_weights if name not in responded]
+        missing_agents = sorted(missing_agents)
+        missing_weight = sum(self.agent_weights.get(name, 0.1) for name in missing_agents)
+        
         if not agent_responses:
             return AgentResponse(
                 agent_name=self.name,
                 confidence=0,
                 signal="NO_SIGNAL",
                 reasoning="No agent responses received",
-                metadata={},
+                metadata={'missing_agents': missing_agents, 'weight_coverage': 0.0},
                 timestamp=datetime.now(),
                 trade_type=trade_type
             )
@@ -91,6 +126,12 @@ class MainDecisionAgent(BaseAgent):
             total_weighted_score += weighted_score
             total_weight += weight
         
+        responded_weight = total_weight
+        expected_weight = responded_weight + missing_weight
+        weight_coverage = responded_weight / expected_weight if expected_weight > 0 else 0.0
+        if self.missing_agent_policy == 'neutral':
+            total_weight += missing_weight
+        
         # Calculate composite probability (normalized -1 to 1 → 0 to 1)
         if total_weight > 0:
             composite_score = total_weighted_score / total_weight
@@ -111,14 +152,28 @@ class MainDecisionAgent(BaseAgent):
         else:
             final_signal = "NO_SIGNAL"
         
+        # Too little of the committee answered (or risk never weighed in) to act on
+        required_missing = [name for name in self.REQUIRED_AGENTS if name in missing_agents]
+        if required_missing:
+            gate = f"Required agent missing: {', '.join(required_missing)} - no trade"
+        elif weight_coverage < self.min_weight_coverage:
+            gate = f"Weight coverage {weight_coverage:.0%} below minimum {self.min_weight_coverage:.0%} - no trade"
+        else:
+            gate = None
+        if gate and final_signal in ("BUY", "SELL"):
+            final_signal = "NO_SIGNAL"
+            final_confidence = min(final_confidence, self.GATED_CONFIDENCE_CAP)
+        
         # Build comprehensive reasoning
         reasoning_parts = []
-        reasoning_parts.append(f"Composite probability: {final_confidence:.1f}%")
+        reasoning_parts.append(f"Composite probability: {composite_probability * 100:.1f}%")
         
         if buy_agents:
             reasoning_parts.append(f"Bullish agents: {', '.join([a[0] for a in buy_agents])}")
         if sell_agents:
             reasoning_parts.append(f"Bearish agents: {', '.join([a[0] for a in sell_agents])}")
+        if missing_agents:
+            reasoning_parts.append(f"Missing agents: {', '.join(missing_agents)} ({weight_coverage:.0%} weight coverage)")
         
         # Key insights from individual agents
         for name, conf, reason in buy_agents + sell_agents:
@@ -126,7 +181,9 @@ class MainDecisionAgent(BaseAgent):
                 reasoning_parts.append(f"{name}: {reason[:50]}...")
         
         # Threshold decision
-        if final_signal == "NO_SIGNAL":
+        if gate:
+            reasoning_parts.append(gate)
+        elif final_signal == "NO_SIGNAL":
             reasoning_parts.append(f"Below threshold ({self.threshold*100:.0f}%) - no trade")
         elif final_signal in ["BUY", "SELL"]:
             reasoning_parts.append(f"Above threshold - EXECUTE {final_signal}")
@@ -141,8 +198,12 @@ class MainDecisionAgent(BaseAgent):
             'sell_agents': len(sell_agents),
             'hold_agents': len(hold_agents),
             'agent_details': [r.to_dict() for r in agent_responses],
+            'missing_agents': missing_agents,
+            'weight_coverage': weight_coverage,
+            'missing_agent_policy': self.missing_agent_policy,
+            'min_weight_coverage': self.min_weight_coverage,
             'threshold': self.threshold,
-            'threshold_met': final_confidence >= 70
+            'threshold_met': final_confidence >= 70 and gate is None
         }
         
         decision = AgentResponse(
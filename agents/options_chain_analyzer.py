@@ -10,6 +10,8 @@ import numpy as np
 
 from utils.decorators import retry_with_backoff, validate_symbol, log_execution_time
 from utils.logger import get_logger
+from analysis.max_pain import max_pain, MaxPainResult
+from analysis.greeks import GreeksEngine
 
 try:
     from agents.base_agent import BaseAgent, AgentResponse
@@ -22,10 +24,13 @@ logger = get_logger('options_analyzer')
 class OptionsChainAnalyzer(BaseAgent):
     """Analyzes option chain metrics for trading signals."""
     
+    workload = "cpu"
+    
     def __init__(self):
         super().__init__(name="OptionsChainAnalyzer", trade_type="BOTH")
         self.description = "Analyzes option Greeks, PCR, OI changes, IV, and max pain"
         self.iv_rank = 50  # IV rank for strike selection
+        self.greeks_engine = GreeksEngine(rate=0.065)
     
     @log_execution_time
     @validate_symbol
@@ -76,8 +81,13 @@ class OptionsChainAnalyzer(BaseAgent):
             elif oi_change < -10:
                 signals.append(("SELL", 10, "OI unwinding suggests weaker hands"))
             
+            # Per-strike IV and Greeks when the chain carries option prices
+            atm = self._atm_greeks(symbol, option_chain)
+            if atm is not None:
+                metadata['greeks'] = atm
+            
             # 3. IV Analysis
-            iv_current = option_chain.get('iv_current', 20)
+            iv_current = atm['iv'] if atm else option_chain.get('iv_current', 20)
             iv_percentile = option_chain.get('iv_percentile', 50)
             self.iv_rank = iv_percentile
             metadata['iv_current'] = iv_current
@@ -89,7 +99,9 @@ class OptionsChainAnalyzer(BaseAgent):
                 signals.append(("BUY", 10, "IV in bottom 20% - cheap options"))
             
             # 4. Max Pain Analysis
-            max_pain = option_chain.get('max_pain', 0)
+            max_pain = option_chain.get('max_pain')
+            if max_pain is None:
+                max_pain = self._max_pain_from_chain(option_chain)
             spot = option_chain.get('spot_price', 0)
             metadata['max_pain'] = max_pain
             metadata['spot_price'] = spot
@@ -100,8 +112,8 @@ class OptionsChainAnalyzer(BaseAgent):
                 signals.append(("SELL", 10, "Spot above max pain - downward magnet"))
             
             # 5. Greeks Analysis
-            delta = option_chain.get('delta', 0.5)
-            theta = option_chain.get('theta', -0.1)
+            delta = atm['delta'] if atm else option_chain.get('delta', 0.5)
+            theta = atm['theta'] if atm else option_chain.get('theta', -0.1)
             metadata['delta'] = delta
             metadata['theta'] = theta
             
@@ -178,19 +190,82 @@ class OptionsChainAnalyzer(BaseAgent):
     
     def calculate_max_pain(self, strikes: list, call_oi: list, put_oi: list) -> float:
         """Calculate max pain (strike where maximum option buyers lose money)."""
-        max_pain_val = 0
-        max_pain_strike = strikes[0]
-        
-        for strike in strikes:
-            pain = 0
-            for i, s in enumerate(strikes):
-                if s < strike:
-                    pain += call_oi[i] * (strike - s)
-                elif s > strike:
-                    pain += put_oi[i] * (s - strike)
-            
-            if pain > max_pain_val:
-                max_pain_val = pain
-                max_pain_strike = strike
+        return max_pain(strikes, call_oi, put_oi).strike
+    
+    def calculate_max_pain_curve(self, strikes, call_oi, put_oi) -> MaxPainResult:
+        """Calculate max pain with the full pain curve.
+        
+        Accepts one chain as 1-D arrays or many expiries/underlyings at once
+        as 2-D arrays (one row per chain, NaN-padded strikes if ragged).
+        """
+        return max_pain(strikes, call_oi, put_oi)
+    
+    def _max_pain_from_chain(self, option_chain: Dict) -> float:
+        """Derive max pain from per-strike OI when the chain doesn't supply it."""
+        strikes = option_chain.get('strikes')
+        call_oi = option_chain.get('call_oi')
+        put_oi = option_chain.get('put_oi')
+        if strikes is None or call_oi is None or put_oi is None:
+            return 0
+        if not len(strikes) or not len(strikes) == len(call_oi) == len(put_oi):
+            return 0
+        return self.calculate_max_pain(strikes, call_oi, put_oi)
+    
+    def calculate_chain_greeks(self, symbol: str, option_chain: Dict) -> Optional[Dict[str, Dict]]:
+        """Solve IV and Greeks for every strike of a chain in one batch.
+        
+        Uses per-strike 'call_ltp'/'put_ltp' prices; IVs are warm-started
+        from the previous call for the same symbol and expiry.
+        
+        Returns:
+            {'call': {...}, 'put': {...}} arrays keyed by iv, price, delta,
+            gamma, theta and vega, or None if the chain has no usable prices
+        """
+        strikes = option_chain.get('strikes')
+        spot = option_chain.get('spot_price', 0)
+        if strikes is None or not len(strikes) or spot <= 0:
+            return None
+        
+        prices = {}
+        for side in ('call', 'put'):
+            ltp = option_chain.get(f'{side}_ltp')
+            if ltp is not None and len(ltp) == len(strikes):
+                prices[side] = ltp
+        if not prices:
+            return None
+        
+        expiry_dates = option_chain.get('expiry_dates')
+        if expiry_dates is None or not len(expiry_dates):
+            expiry_dates = [None]
+        days_to_expiry = option_chain.get('days_to_expiry', 7)
+        return self.greeks_engine.compute(
+            (symbol, expiry_dates[0]),
+            spot,
+            strikes,
+            days_to_expiry / 365,
+            call_prices=prices.get('call'),
+            put_prices=prices.get('put')
+        )
+    
+    def _atm_greeks(self, symbol: str, option_chain: Dict) -> Optional[Dict[str, float]]:
+        """ATM IV (in %) and call Greeks from the chain-wide solve."""
+        chain = self.calculate_chain_greeks(symbol, option_chain)
+        if chain is None:
+            return None
+        
+        strikes = np.asarray(option_chain['strikes'], dtype=float)
+        idx = int(np.argmin(np.abs(strikes - option_chain['spot_price'])))
+        solved = [greeks for greeks in chain.values() if not np.isnan(greeks['iv'][idx])]
+        if not solved:
+            return None
         
-        return max_pain_strike
+        side = solved[0]  # Calls when available
+        ivs = [greeks['iv'][idx] for greeks in solved]
+        return {
+            'atm_strike': float(strikes[idx]),
+            'iv': float(np.mean(ivs)) * 100,
+            'delta': float(side['delta'][idx]),
+            'gamma': float(side['gamma'][idx]),
+            'theta': float(side['theta'][idx]),
+            'vega': float(side['vega'][idx]),
+        }
@@ -0,0 +1,66 @@
+"""Agents registered by name and built on first use.
+
+Specs may name their class by import path (``'package.module:Class'``), so
+registering an agent imports nothing; the module is imported when the
+agent's class is first needed and the agent is constructed when it is
+first looked up.
+"""
+import importlib
+import threading
+from typing import Any, Dict, Iterator, Mapping, Tuple, Type, Union
+
+try:
+    from agents.base_agent import BaseAgent
+except ImportError:
+    from base_agent import BaseAgent
+
+# Agent class, or its 'module:Class' import path, plus constructor kwargs
+AgentSpec = Tuple[Union[Type[BaseAgent], str], Dict[str, Any]]
+
+
+def resolve(target: Union[type, str]) -> type:
+    """Import a 'module:Class' path (classes are returned as is)."""
+    if not isinstance(target, str):
+        return target
+    module, _, name = target.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+class AgentRegistry(Mapping):
+    """Read-only mapping of agent name -> agent, constructing agents lazily."""
+
+    def __init__(self, specs: Mapping[str, AgentSpec]):
+        """Register agents.
+
+        Args:
+            specs: Agent name -> (class or import path, constructor kwargs)
+        """
+        self._specs = dict(specs)
+        self._instances: Dict[str, BaseAgent] = {}
+        self._lock = threading.Lock()
+
+    def spec(self, name: str) -> Tuple[Type[BaseAgent], Dict[str, Any]]:
+        """(class, kwargs) for an agent, importing its class if needed."""
+        target, kwargs = self._specs[name]
+        return resolve(target), kwargs
+
+    def __getitem__(self, name: str) -> BaseAgent:
+        agent = self._instances.get(name)
+        if agent is not None:
+            return agent
+        with self._lock:
+            if name not in self._instances:
+                cls, kwargs = self.spec(name)
+                self._instances[name] = cls(**kwargs)
+            return self._instances[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._specs)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def loaded(self) -> Dict[str, BaseAgent]:
+        """Agents constructed so far."""
+        with self._lock:
+            return dict(self._instances)
@@ -13,6 +13,9 @@ logger = get_logger('risk_manager')
 class RiskManager(BaseAgent):
     """Enforces risk management rules."""
     
+    # Tracks daily P&L and positions for the orchestrator, so never runs in a worker
+    process_safe = False
+    
     # Correlation matrix for major indices
     CORRELATION_MATRIX = {
         ('NIFTY', 'MIDCPNIFTY'): 0.9,
@@ -0,0 +1,178 @@
+"""Long-lived executors for running agents.
+
+``AgentRunner`` owns the pools agents run on for the life of the
+orchestrator instead of one throwaway pool per symbol. Modes:
+
+- ``inline``: run each agent in the calling thread (debugging, tests)
+- ``thread``: one shared thread pool for every agent
+- ``process``: agents declaring ``workload = 'cpu'`` run in worker processes
+  that each hold warm agent instances; I/O-bound agents and agents that
+  must share state with the orchestrator (``process_safe = False``) stay
+  on the thread pool
+
+Process workers are single-process pools with symbol affinity: a symbol
+always lands on the same worker, so per-symbol incremental state (streaming
+indicators, IV warm starts) stays hot there. Inputs travel as a
+``MarketSnapshot`` handle, not as pickled dicts.
+
+In-process agents are looked up in an ``AgentRegistry`` and so are only
+imported and built when first submitted.
+"""
+import logging
+import multiprocessing
+import signal
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional
+
+try:
+    from agents.base_agent import BaseAgent, AgentResponse
+    from agents.registry import AgentRegistry, AgentSpec, resolve
+except ImportError:
+    from base_agent import BaseAgent, AgentResponse
+    from registry import AgentRegistry, AgentSpec, resolve
+
+if TYPE_CHECKING:
+    from data_sources.snapshot import MarketSnapshot
+
+logger = logging.getLogger('tradebot')
+
+MODES = ('inline', 'thread', 'process')
+
+# Warm agents of a process worker, created once by the pool initializer
+_WORKER_AGENTS: Dict[str, BaseAgent] = {}
+
+
+def _init_worker(specs: Dict[str, AgentSpec]) -> None:
+    """Process pool initializer: instantiate this worker's agents."""
+    # Ctrl-C reaches the whole process group; the parent decides when workers
+    # stop, so a daemon can finish the scan in progress instead of breaking the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for name, (cls, kwargs) in specs.items():
+        _WORKER_AGENTS[name] = resolve(cls)(**kwargs)
+
+
+def _run_in_worker(name: str, symbol: str, snapshot: 'MarketSnapshot') -> AgentResponse:
+    """Run one warm agent in a worker process against an attached snapshot."""
+    try:
+        return _WORKER_AGENTS[name].analyze(
+            symbol, snapshot.option_chain, snapshot.market_data, snapshot.sentiment_data
+        )
+    finally:
+        snapshot.close()
+
+
+class AgentRunner:
+    """Routes agent calls to long-lived thread or process pools."""
+
+    def __init__(
+        self,
+        specs: Dict[str, AgentSpec],
+        agents: Optional[Mapping[str, BaseAgent]] = None,
+        mode: str = 'thread',
+        max_threads: int = 8,
+        max_processes: int = 2,
+        start_method: str = 'spawn'
+    ):
+        """Create the pools.
+
+        Args:
+            specs: Agent name -> (class or import path, constructor kwargs)
+            agents: Instances to run in this process, e.g. a shared
+                ``AgentRegistry`` (default: built lazily from ``specs``)
+            mode: 'inline', 'thread' or 'process'
+            max_threads: Thread pool size
+            max_processes: Worker processes for CPU-bound agents in process mode
+            start_method: multiprocessing start method for workers
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown execution mode: {mode} (expected one of {MODES})")
+
+        self.mode = mode
+        self.specs = dict(specs)
+        self.agents = agents if agents is not None else AgentRegistry(self.specs)
+
+        self._threads = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='agent') \
+            if mode != 'inline' else None
+
+        # Decided from class attributes, so agents that run in workers are never built here
+        self._process_agents = set()
+        if mode == 'process':
+            classes = {name: resolve(cls) for name, (cls, _) in self.specs.items()}
+            self._process_agents = {
+                name for name, cls in classes.items() if cls.workload == 'cpu' and cls.process_safe
+            }
+        self._processes: List[ProcessPoolExecutor] = []
+        if self._process_agents:
+            worker_specs = {name: self.specs[name] for name in self._process_agents}
+            context = multiprocessing.get_context(start_method)
+            self._processes = [
+                ProcessPoolExecutor(
+                    max_workers=1, mp_context=context,
+                    initializer=_init_worker, initargs=(worker_specs,)
+                )
+                for _ in range(max(max_processes, 1))
+            ]
+
+        logger.info(
+            f"AgentRunner started in {mode} mode"
+            + (f" ({len(self._processes)} workers for {sorted(self._process_agents)})" if self._processes else "")
+        )
+
+    def route(self, name: str) -> str:
+        """Where an agent runs: 'inline', 'thread' or 'process'."""
+        if name in self._process_agents:
+            return 'process'
+        return 'inline' if self.mode == 'inline' else 'thread'
+
+    def _worker_for(self, symbol: str) -> ProcessPoolExecutor:
+        return self._processes[zlib.crc32(symbol.encode()) % len(self._processes)]
+
+    def submit(self, name: str, symbol: str, snapshot: 'MarketSnapshot') -> Future:
+        """Run one agent on one symbol.
+
+        Args:
+            name: Agent name
+            symbol: Symbol to analyze
+            snapshot: Tick inputs; must stay open until the future completes
+
+        Returns:
+            Future resolving to the agent's AgentResponse
+        """
+        route = self.route(name)
+        if route == 'process':
+            return self._worker_for(symbol).submit(_run_in_worker, name, symbol, snapshot)
+
+        agent = self.agents[name]
+        args = (symbol, snapshot.option_chain, snapshot.market_data, snapshot.sentiment_data)
+        if route == 'thread':
+            return self._threads.submit(agent.analyze, *args)
+
+        future: Future = Future()
+        try:
+            future.set_result(agent.analyze(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def submit_all(
+        self,
+        symbol: str,
+        snapshot: 'MarketSnapshot',
+        names: Optional[List[str]] = None
+    ) -> Dict[Future, str]:
+        """Run several agents (default: all in ``specs``) on one symbol.
+
+        Returns:
+            Future -> agent name
+        """
+        names = list(self.specs) if names is None else names
+        return {self.submit(name, symbol, snapshot): name for name in names}
+
+    def close(self, wait: bool = True) -> None:
+        """Shut down every pool."""
+        if self._threads is not None:
+            self._threads.shutdown(wait=wait)
+        for pool in self._processes:
+            pool.shutdown(wait=wait)
+        self._processes = []
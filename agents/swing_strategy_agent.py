@@ -1,11 +1,11 @@
 """Swing Strategy Agent."""
 import logging
 from typing import Dict, Any, Optional, List
-from datetime import datetime
-import numpy as np
+from datetime import datetime, timedelta
 
 from utils.decorators import validate_symbol, log_execution_time
 from utils.logger import get_logger
+from analysis.indicators import IndicatorEngine, SwingIndicators
 from agents.base_agent import BaseAgent, AgentResponse
 
 logger = get_logger('swing_agent')
@@ -14,10 +14,22 @@ logger = get_logger('swing_agent')
 class SwingStrategyAgent(BaseAgent):
     """Generates swing trading signals based on positional analysis."""
     
-    def __init__(self):
+    workload = "cpu"
+    
+    def __init__(self, state_dir: Optional[str] = None):
+        """Initialize agent.
+        
+        Args:
+            state_dir: Directory to persist per-symbol indicator state in, so
+                each run only processes daily bars it hasn't seen (default: memory only)
+        """
         super().__init__(name="SwingStrategyAgent", trade_type="SWING")
         self.description = "Positional setups: daily/weekly trends, S/R zones"
         self.timeframes = ['daily', 'weekly']
+        # Daily bars skip weekends and holidays; a longer gap means missing bars
+        self.indicators = IndicatorEngine(
+            SwingIndicators, time_field='date', state_dir=state_dir, max_gap=timedelta(days=4)
+        )
     
     def calculate_support_resistance(
         self,
@@ -57,12 +69,12 @@ class SwingStrategyAgent(BaseAgent):
             )
         
         signals = []
-        closes = [c['close'] for c in ohlc]
-        current_price = closes[-1]
+        state = self.indicators.sync(symbol, ohlc)
+        current_price = state.close_ago(1)
         
         # EMA Analysis
-        ema20 = self._calculate_ema(closes, 20)
-        ema50 = self._calculate_ema(closes, 50) if len(closes) >= 50 else ema20
+        ema20 = state.ema(20)
+        ema50 = state.ema(50) if state.bars >= 50 else ema20
         
         if current_price > ema20 > ema50:
             signals.append(("BUY", 25, "Bullish trend"))
@@ -70,23 +82,22 @@ class SwingStrategyAgent(BaseAgent):
             signals.append(("SELL", 25, "Bearish trend"))
         
         # S/R Levels
-        sr = self.calculate_support_resistance(ohlc)
+        sr = state.support_resistance()
         if abs(current_price - sr['support']) / sr['support'] < 0.02:
             signals.append(("BUY", 20, f"Support at {sr['support']:.0f}"))
         elif abs(current_price - sr['resistance']) / sr['resistance'] < 0.02:
             signals.append(("SELL", 20, f"Resistance at {sr['resistance']:.0f}"))
         
         # RSI
-        rsi = self._calculate_rsi(closes)
+        rsi = state.rsi
         if rsi < 30:
             signals.append(("BUY", 15, f"RSI {rsi:.0f}"))
         elif rsi > 70:
             signals.append(("SELL", 15, f"RSI {rsi:.0f}"))
         
         # Volume
-        volumes = [c['volume'] for c in ohlc]
-        if np.mean(volumes[-5:]) > np.mean(volumes[-20:]) * 1.3:
-            if closes[-1] > closes[-5]:
+        if state.avg_volume(5) > state.avg_volume(20) * 1.3:
+            if state.close_ago(1) > state.close_ago(5):
                 signals.append(("BUY", 10, "Volume up"))
             else:
                 signals.append(("SELL", 10, "Volume down"))
@@ -112,26 +123,3 @@ class SwingStrategyAgent(BaseAgent):
             metadata={'ema20': ema20, 'ema50': ema50, **sr},
             timestamp=datetime.now(), trade_type="SWING"
         )
-    
-    def _calculate_ema(self, prices: List[float], period: int) -> float:
-        """Calculate EMA."""
-        if len(prices) < period:
-            return prices[-1] if prices else 0
-        multiplier = 2 / (period + 1)
-        ema = prices[0]
-        for price in prices[1:]:
-            ema = (price - ema) * multiplier + ema
-        return ema
-    
-    def _calculate_rsi(self, closes: List[float], period: int = 14) -> float:
-        """Calculate RSI."""
-        if len(closes) < period + 1:
-            return 50.0
-        deltas = [closes[i] - closes[i-1] for i in range(1, len(closes))]
-        gains = [d if d > 0 else 0 for d in deltas[-period:]]
-        losses = [-d if d < 0 else 0 for d in deltas[-period:]]
-        avg_gain = np.mean(gains)
-        avg_loss = np.mean(losses)
-        if avg_loss == 0:
-            return 100.0
-        return 100 - (100 / (1 + avg_gain / avg_loss))
@@ -0,0 +1,309 @@
+"""Vectorized Black-Scholes pricing, Greeks and implied volatility.
+
+Every function takes NumPy arrays (or scalars that broadcast), so a whole
+option chain is priced or solved in a single call.
+
+Conventions: ``t`` is time to expiry in years, rates and volatilities are
+annualized decimals, theta is per calendar day and vega is per one
+volatility point (1%).
+"""
+from typing import Dict, Hashable, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from scipy.special import ndtr as _ndtr
+except ImportError:
+    _ndtr = None
+
+ArrayLike = Union[float, np.ndarray]
+
+MIN_TIME = 1e-6  # Floor on time to expiry so expiry-day math stays finite
+MIN_VOL = 1e-4
+MAX_VOL = 5.0
+_SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+
+def _erfc(x: np.ndarray) -> np.ndarray:
+    """Complementary error function, fractional error below 1.2e-7.
+
+    Chebyshev fit from Numerical Recipes (erfcc); used when SciPy is absent.
+    """
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = -z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (
+            -0.82215223 + t * 0.17087277))))))))
+    ans = t * np.exp(poly)
+    return np.where(x >= 0, ans, 2.0 - ans)
+
+
+def norm_cdf(x: ArrayLike) -> np.ndarray:
+    """Standard normal CDF."""
+    x = np.asarray(x, dtype=np.float64)
+    if _ndtr is not None:
+        return _ndtr(x)
+    return 0.5 * _erfc(-x / np.sqrt(2.0))
+
+
+def norm_pdf(x: ArrayLike) -> np.ndarray:
+    """Standard normal PDF."""
+    x = np.asarray(x, dtype=np.float64)
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def _d1_d2(spot, strike, t, r, sigma, q) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    t = np.maximum(np.asarray(t, dtype=np.float64), MIN_TIME)
+    sigma = np.maximum(np.asarray(sigma, dtype=np.float64), MIN_VOL)
+    sqrt_t = np.sqrt(t)
+    d1 = (np.log(spot / strike) + (r - q + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+    return d1, d1 - sigma * sqrt_t, sqrt_t
+
+
+def bs_price(
+    spot: ArrayLike,
+    strike: ArrayLike,
+    t: ArrayLike,
+    r: ArrayLike,
+    sigma: ArrayLike,
+    is_call: ArrayLike,
+    q: ArrayLike = 0.0
+) -> np.ndarray:
+    """Black-Scholes price of European calls/puts.
+
+    Args:
+        spot: Underlying price
+        strike: Strike price(s)
+        t: Time to expiry in years
+        r: Risk-free rate
+        sigma: Volatility
+        is_call: True for calls, False for puts
+        q: Continuous dividend yield
+
+    Returns:
+        Option prices
+    """
+    spot = np.asarray(spot, dtype=np.float64)
+    strike = np.asarray(strike, dtype=np.float64)
+    t_floor = np.maximum(np.asarray(t, dtype=np.float64), MIN_TIME)
+    d1, d2, _ = _d1_d2(spot, strike, t, r, sigma, q)
+    df_q = np.exp(-q * t_floor)
+    df_r = np.exp(-r * t_floor)
+    call = spot * df_q * norm_cdf(d1) - strike * df_r * norm_cdf(d2)
+    put = strike * df_r * norm_cdf(-d2) - spot * df_q * norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+def bs_greeks(
+    spot: ArrayLike,
+    strike: ArrayLike,
+    t: ArrayLike,
+    r: ArrayLike,
+    sigma: ArrayLike,
+    is_call: ArrayLike,
+    q: ArrayLike = 0.0
+) -> Dict[str, np.ndarray]:
+    """Black-Scholes price and Greeks.
+
+    Args:
+        spot: Underlying price
+        strike: Strike price(s)
+        t: Time to expiry in years
+        r: Risk-free rate
+        sigma: Volatility
+        is_call: True for calls, False for puts
+        q: Continuous dividend yield
+
+    Returns:
+        Dict of arrays: price, delta, gamma, theta (per day), vega (per vol point)
+    """
+    spot = np.asarray(spot, dtype=np.float64)
+    strike = np.asarray(strike, dtype=np.float64)
+    sigma = np.maximum(np.asarray(sigma, dtype=np.float64), MIN_VOL)
+    t_floor = np.maximum(np.asarray(t, dtype=np.float64), MIN_TIME)
+    d1, d2, sqrt_t = _d1_d2(spot, strike, t_floor, r, sigma, q)
+    df_q = np.exp(-q * t_floor)
+    df_r = np.exp(-r * t_floor)
+    pdf_d1 = norm_pdf(d1)
+    cdf_d1, cdf_d2 = norm_cdf(d1), norm_cdf(d2)
+    cdf_md1, cdf_md2 = norm_cdf(-d1), norm_cdf(-d2)
+
+    call_price = spot * df_q * cdf_d1 - strike * df_r * cdf_d2
+    put_price = strike * df_r * cdf_md2 - spot * df_q * cdf_md1
+
+    gamma = df_q * pdf_d1 / (spot * sigma * sqrt_t)
+    vega = spot * df_q * pdf_d1 * sqrt_t
+    decay = -spot * df_q * pdf_d1 * sigma / (2.0 * sqrt_t)
+    call_theta = decay - r * strike * df_r * cdf_d2 + q * spot * df_q * cdf_d1
+    put_theta = decay + r * strike * df_r * cdf_md2 - q * spot * df_q * cdf_md1
+
+    return {
+        'price': np.where(is_call, call_price, put_price),
+        'delta': np.where(is_call, df_q * cdf_d1, -df_q * cdf_md1),
+        'gamma': gamma,
+        'theta': np.where(is_call, call_theta, put_theta) / 365.0,
+        'vega': vega / 100.0,
+    }
+
+
+def implied_volatility(
+    price: ArrayLike,
+    spot: ArrayLike,
+    strike: ArrayLike,
+    t: ArrayLike,
+    r: ArrayLike,
+    is_call: ArrayLike,
+    q: ArrayLike = 0.0,
+    initial: Optional[ArrayLike] = None,
+    tol: float = 1e-6,
+    max_iter: int = 50
+) -> np.ndarray:
+    """Solve Black-Scholes implied volatility for many options at once.
+
+    Safeguarded Newton: every element keeps a bracket that always contains
+    the root, and falls back to bisection whenever a Newton step would leave
+    it or vega is too small to trust. A good ``initial`` guess (e.g. the
+    previous tick's IVs) usually converges in two or three iterations.
+
+    Args:
+        price: Observed option prices
+        spot: Underlying price
+        strike: Strike price(s)
+        t: Time to expiry in years
+        r: Risk-free rate
+        is_call: True for calls, False for puts
+        q: Continuous dividend yield
+        initial: Starting volatilities (default: Brenner-Subrahmanyam estimate)
+        tol: Price tolerance, relative to max(1, price)
+        max_iter: Iteration cap
+
+    Returns:
+        Implied volatilities; NaN where the price violates no-arbitrage bounds
+    """
+    price, spot, strike, t, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=np.float64),
+        np.asarray(spot, dtype=np.float64),
+        np.asarray(strike, dtype=np.float64),
+        np.maximum(np.asarray(t, dtype=np.float64), MIN_TIME),
+        np.asarray(is_call, dtype=bool),
+    )
+
+    df_q = np.exp(-q * t)
+    df_r = np.exp(-r * t)
+    forward_intrinsic = np.where(
+        is_call, spot * df_q - strike * df_r, strike * df_r - spot * df_q
+    )
+    upper = np.where(is_call, spot * df_q, strike * df_r)
+    valid = (price > np.maximum(forward_intrinsic, 0.0)) & (price < upper) & np.isfinite(price)
+
+    if initial is None:
+        sigma = np.sqrt(2.0 * np.pi / t) * price / spot
+    else:
+        sigma = np.broadcast_to(np.asarray(initial, dtype=np.float64), price.shape).copy()
+    sigma = np.clip(np.nan_to_num(sigma, nan=0.3), 0.01, 3.0)
+
+    lo = np.full(price.shape, MIN_VOL)
+    hi = np.full(price.shape, MAX_VOL)
+    threshold = tol * np.maximum(1.0, price)
+    active = valid.copy()
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+
+        greeks = bs_greeks(spot, strike, t, r, sigma, is_call, q)
+        diff = greeks['price'] - price
+        active &= np.abs(diff) > threshold
+        if not active.any():
+            break
+
+        hi = np.where(active & (diff > 0), sigma, hi)
+        lo = np.where(active & (diff <= 0), sigma, lo)
+
+        vega = greeks['vega'] * 100.0  # Back to per unit of volatility
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            newton = sigma - diff / vega
+        use_newton = (vega > 1e-8) & (newton > lo) & (newton < hi)
+        step = np.where(use_newton, newton, 0.5 * (lo + hi))
+        sigma = np.where(active, step, sigma)
+
+    return np.where(valid, sigma, np.nan)
+
+
+class GreeksEngine:
+    """Chain-wide IV and Greeks, warm-started from each chain's previous tick."""
+
+    def __init__(self, rate: float = 0.065, dividend_yield: float = 0.0):
+        """Initialize engine.
+
+        Args:
+            rate: Risk-free rate used for every chain
+            dividend_yield: Continuous dividend yield
+        """
+        self.rate = rate
+        self.dividend_yield = dividend_yield
+        self._last_iv: Dict[Hashable, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def _warm_start(self, key: Hashable, strikes: np.ndarray, side: int) -> Optional[np.ndarray]:
+        """Previous tick's IVs mapped onto the current strikes."""
+        previous = self._last_iv.get(key)
+        if previous is None:
+            return None
+        prev_strikes, prev_iv = previous[0], previous[1 + side]
+        known = ~np.isnan(prev_iv)
+        if not known.any():
+            return None
+        if np.array_equal(prev_strikes, strikes):
+            return np.where(known, prev_iv, np.nanmedian(prev_iv))
+        return np.interp(strikes, prev_strikes[known], prev_iv[known])
+
+    def compute(
+        self,
+        key: Hashable,
+        spot: float,
+        strikes,
+        t: float,
+        call_prices=None,
+        put_prices=None
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        """Solve IVs and Greeks for every strike of one chain.
+
+        Args:
+            key: Chain identity used for warm starts, e.g. (symbol, expiry)
+            spot: Underlying price
+            strikes: Strikes of the chain
+            t: Time to expiry in years
+            call_prices: Call prices aligned with ``strikes``
+            put_prices: Put prices aligned with ``strikes``
+
+        Returns:
+            {'call': {...}, 'put': {...}} with iv, price, delta, gamma, theta
+            and vega arrays for each side supplied
+        """
+        strikes = np.asarray(strikes, dtype=np.float64)
+        result = {}
+        ivs = [np.full(strikes.shape, np.nan), np.full(strikes.shape, np.nan)]
+
+        for side, (name, prices) in enumerate((('call', call_prices), ('put', put_prices))):
+            if prices is None:
+                continue
+            is_call = side == 0
+            iv = implied_volatility(
+                prices, spot, strikes, t, self.rate, is_call,
+                q=self.dividend_yield, initial=self._warm_start(key, strikes, side)
+            )
+            greeks = bs_greeks(spot, strikes, t, self.rate, iv, is_call, q=self.dividend_yield)
+            greeks['iv'] = iv
+            result[name] = greeks
+            ivs[side] = iv
+
+        # Copy: the caller's strikes may be a view into a short-lived buffer
+        self._last_iv[key] = (strikes.copy(), ivs[0], ivs[1])
+        return result
+
+    def reset(self, key: Optional[Hashable] = None) -> None:
+        """Forget warm-start state for one chain, or for all chains."""
+        if key is None:
+            self._last_iv.clear()
+        else:
+            self._last_iv.pop(key, None)
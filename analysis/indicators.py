@@ -0,0 +1,536 @@
+"""Streaming technical indicators.
+
+Indicator state is advanced one bar at a time in O(1), so refreshing a
+symbol after a new candle costs the same regardless of how much history
+it has. ``IndicatorEngine`` keeps one state per symbol and feeds it only
+the bars it has not seen yet.
+"""
+import json
+import logging
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Union
+
+logger = logging.getLogger('tradebot')
+
+
+class WilderRSI:
+    """Relative Strength Index with Wilder smoothing.
+
+    The first ``period`` changes are averaged; every later change is
+    folded in as ``avg = (avg * (period - 1) + change) / period``.
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close: Optional[float] = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.changes = 0
+
+    def update(self, close: float) -> None:
+        """Fold in one close."""
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            gain = change if change > 0 else 0.0
+            loss = -change if change < 0 else 0.0
+            self.changes += 1
+            if self.changes <= self.period:
+                # Seed: running simple average of the first ``period`` changes
+                self.avg_gain += (gain - self.avg_gain) / self.changes
+                self.avg_loss += (loss - self.avg_loss) / self.changes
+            else:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        self.prev_close = close
+
+    @property
+    def value(self) -> float:
+        """Current RSI; 50 until ``period`` changes have been seen."""
+        if self.changes < self.period:
+            return 50.0
+        if self.avg_loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + self.avg_gain / self.avg_loss))
+
+
+class RollingSum:
+    """Sum and mean over the last ``window`` values."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values: deque = deque(maxlen=window)
+        self.total = 0.0
+
+    def update(self, value: float) -> None:
+        """Push one value, dropping the oldest once the window is full."""
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+    @property
+    def mean(self) -> float:
+        return self.total / len(self.values) if self.values else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'values': list(self.values), 'total': self.total}
+
+    def load(self, data: Dict[str, Any]) -> None:
+        self.values = deque(data['values'], maxlen=self.window)
+        self.total = data['total']
+
+
+class RollingExtreme:
+    """Maximum (or minimum) over the last ``window`` values via a monotonic deque."""
+
+    def __init__(self, window: int, mode: str = 'max'):
+        self.window = window
+        self.mode = mode
+        self.count = 0
+        self.entries: deque = deque()  # (position, value), values monotonic
+
+    def update(self, value: float) -> None:
+        """Push one value, dropping entries that can no longer be the extreme."""
+        if self.mode == 'max':
+            while self.entries and self.entries[-1][1] <= value:
+                self.entries.pop()
+        else:
+            while self.entries and self.entries[-1][1] >= value:
+                self.entries.pop()
+        self.entries.append((self.count, value))
+        self.count += 1
+        if self.entries[0][0] <= self.count - 1 - self.window:
+            self.entries.popleft()
+
+    @property
+    def value(self) -> float:
+        return self.entries[0][1] if self.entries else 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'count': self.count, 'entries': [list(entry) for entry in self.entries]}
+
+    def load(self, data: Dict[str, Any]) -> None:
+        self.count = data['count']
+        self.entries = deque(tuple(entry) for entry in data['entries'])
+
+
+class IntradayIndicators:
+    """Session VWAP, opening range breakout, rolling volume and RSI for one symbol.
+
+    VWAP and the opening range restart when a bar from a new trading day
+    arrives; RSI and the volume window carry across sessions.
+    """
+
+    def __init__(
+        self,
+        rsi_period: int = 14,
+        volume_window: int = 10,
+        orb_bars: int = 5,
+        orb_confirm_bars: int = 3
+    ):
+        """Initialize empty state.
+
+        Args:
+            rsi_period: RSI lookback
+            volume_window: Bars in the average-volume window
+            orb_bars: Bars forming the opening range
+            orb_confirm_bars: Bars after the range in which a breakout counts
+        """
+        self.orb_bars = orb_bars
+        self.orb_confirm_bars = orb_confirm_bars
+        self.rsi_state = WilderRSI(rsi_period)
+        self.volume_state = RollingSum(volume_window)
+
+        self.bars = 0
+        self.close = 0.0
+        self.prev_close = 0.0
+        self.volume = 0.0
+
+        self.session = None
+        self._reset_session()
+
+    def _reset_session(self) -> None:
+        self.session_bars = 0
+        self.pv_sum = 0.0
+        self.vol_sum = 0.0
+        self.opening_high = float('-inf')
+        self.opening_low = float('inf')
+        self.orb_signal = "HOLD"
+
+    def update(self, bar: Dict[str, Any]) -> None:
+        """Fold in one closed bar.
+
+        Args:
+            bar: Dict with high, low, close, volume and optionally time
+        """
+        when = bar.get('time')
+        session = when.date() if hasattr(when, 'date') else self.session
+        if session != self.session:
+            self.session = session
+            self._reset_session()
+
+        high, low, close, volume = bar['high'], bar['low'], bar['close'], bar['volume']
+
+        self.pv_sum += (high + low + close) / 3 * volume
+        self.vol_sum += volume
+
+        if self.session_bars < self.orb_bars:
+            self.opening_high = max(self.opening_high, high)
+            self.opening_low = min(self.opening_low, low)
+        elif self.session_bars < self.orb_bars + self.orb_confirm_bars and self.orb_signal == "HOLD":
+            if close > self.opening_high:
+                self.orb_signal = "BUY"
+            elif close < self.opening_low:
+                self.orb_signal = "SELL"
+        self.session_bars += 1
+
+        self.rsi_state.update(close)
+        self.volume_state.update(volume)
+
+        self.prev_close = self.close if self.bars else close
+        self.close = close
+        self.volume = volume
+        self.bars += 1
+
+    @property
+    def vwap(self) -> float:
+        """Session VWAP."""
+        return self.pv_sum / self.vol_sum if self.vol_sum > 0 else 0
+
+    @property
+    def orb(self) -> str:
+        """Opening range breakout signal: BUY, SELL or HOLD."""
+        return self.orb_signal
+
+    @property
+    def rsi(self) -> float:
+        return self.rsi_state.value
+
+    @property
+    def avg_volume(self) -> float:
+        """Mean volume over the window, including the latest bar."""
+        return self.volume_state.mean
+
+
+class SwingIndicators:
+    """Daily trend, RSI, support/resistance and volume state for one symbol.
+
+    Every value matches what ``SwingStrategyAgent`` used to recompute from
+    the full history: EMAs seeded with the first close, RSI as the plain
+    average of the last ``rsi_period`` changes, and support/resistance as
+    the lowest low/highest high of the last ``sr_period`` bars.
+    """
+
+    def __init__(
+        self,
+        ema_periods: Sequence[int] = (20, 50),
+        rsi_period: int = 14,
+        sr_period: int = 20,
+        volume_windows: Sequence[int] = (5, 20)
+    ):
+        """Initialize empty state.
+
+        Args:
+            ema_periods: EMA lookbacks
+            rsi_period: RSI lookback
+            sr_period: Bars scanned for support/resistance
+            volume_windows: Short and long average-volume windows
+        """
+        self.ema_periods = tuple(ema_periods)
+        self.rsi_period = rsi_period
+        self.sr_period = sr_period
+        self.volume_windows = tuple(volume_windows)
+
+        self.bars = 0
+        self.emas: List[float] = [0.0] * len(self.ema_periods)
+        self.prev_close: Optional[float] = None
+        self.gains = RollingSum(rsi_period)
+        self.losses = RollingSum(rsi_period)
+        self.highs = RollingExtreme(sr_period, 'max')
+        self.lows = RollingExtreme(sr_period, 'min')
+        self.volumes = [RollingSum(window) for window in self.volume_windows]
+        self.closes: deque = deque(maxlen=max(self.volume_windows))
+
+    def update(self, bar: Dict[str, Any]) -> None:
+        """Fold in one daily bar.
+
+        Args:
+            bar: Dict with high, low, close and volume
+        """
+        close = bar['close']
+        if self.bars == 0:
+            self.emas = [close] * len(self.ema_periods)
+        else:
+            for i, period in enumerate(self.ema_periods):
+                multiplier = 2 / (period + 1)
+                self.emas[i] = (close - self.emas[i]) * multiplier + self.emas[i]
+
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            self.gains.update(change if change > 0 else 0)
+            self.losses.update(-change if change < 0 else 0)
+        self.prev_close = close
+
+        self.highs.update(bar['high'])
+        self.lows.update(bar['low'])
+        for window in self.volumes:
+            window.update(bar.get('volume', 0))
+        self.closes.append(close)
+        self.bars += 1
+
+    def ema(self, period: int) -> float:
+        """EMA for one of ``ema_periods``; the last close until ``period`` bars exist."""
+        if self.bars < period:
+            return self.prev_close if self.prev_close is not None else 0
+        return self.emas[self.ema_periods.index(period)]
+
+    @property
+    def rsi(self) -> float:
+        if self.bars < self.rsi_period + 1:
+            return 50.0
+        if self.losses.total <= 0:
+            return 100.0
+        return 100 - (100 / (1 + self.gains.total / self.losses.total))
+
+    def support_resistance(self) -> Dict[str, float]:
+        """Support, resistance and pivot over the last ``sr_period`` bars."""
+        if self.bars < self.sr_period:
+            return {'support': 0, 'resistance': 0, 'pivot': 0}
+        high, low = self.highs.value, self.lows.value
+        return {'support': low, 'resistance': high, 'pivot': (high + low) / 2}
+
+    def avg_volume(self, window: int) -> float:
+        """Mean volume over one of ``volume_windows``."""
+        return self.volumes[self.volume_windows.index(window)].mean
+
+    def close_ago(self, bars: int) -> float:
+        """Close ``bars`` bars back, 1 being the latest."""
+        return self.closes[-bars]
+
+    def _params(self) -> Dict[str, Any]:
+        return {
+            'ema_periods': list(self.ema_periods),
+            'rsi_period': self.rsi_period,
+            'sr_period': self.sr_period,
+            'volume_windows': list(self.volume_windows),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot of the state."""
+        return {
+            'params': self._params(),
+            'bars': self.bars,
+            'emas': self.emas,
+            'prev_close': self.prev_close,
+            'gains': self.gains.to_dict(),
+            'losses': self.losses.to_dict(),
+            'highs': self.highs.to_dict(),
+            'lows': self.lows.to_dict(),
+            'volumes': [window.to_dict() for window in self.volumes],
+            'closes': list(self.closes),
+        }
+
+    def load(self, data: Dict[str, Any]) -> bool:
+        """Restore a ``to_dict`` snapshot.
+
+        Returns:
+            False if the snapshot was taken with different parameters
+        """
+        if data.get('params') != self._params():
+            return False
+        self.bars = data['bars']
+        self.emas = list(data['emas'])
+        self.prev_close = data['prev_close']
+        self.gains.load(data['gains'])
+        self.losses.load(data['losses'])
+        self.highs.load(data['highs'])
+        self.lows.load(data['lows'])
+        for window, saved in zip(self.volumes, data['volumes']):
+            window.load(saved)
+        self.closes.extend(data['closes'])
+        return True
+
+
+def _bar_key(value: Any) -> Any:
+    """Comparable, JSON-friendly form of a bar time."""
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+class IndicatorEngine:
+    """Per-symbol streaming indicator states, fed only the bars they haven't seen.
+
+    Bars are keyed by ``time_field`` and must arrive in ascending order.
+    A bar whose key was already consumed is treated as closed and skipped.
+    A series made only of newer bars continues the state only if its first
+    bar is within ``max_gap`` of the last one consumed; otherwise bars are
+    missing in between and the state is rebuilt.
+
+    With ``state_dir`` set, each symbol's state is saved as JSON after new
+    bars are applied and reloaded on first use, so a fresh process resumes
+    where the last one stopped. The state class must then provide
+    ``to_dict()`` and ``load(data)``.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        time_field: str = 'time',
+        state_dir: Optional[Union[str, Path]] = None,
+        max_gap: Optional[Any] = None
+    ):
+        """Initialize engine.
+
+        Args:
+            factory: Creates an empty indicator state exposing ``update(bar)``
+            time_field: Bar field that orders and identifies bars
+            state_dir: Directory for persisted per-symbol state (default: memory only)
+            max_gap: Largest step between consecutive bar times (a timedelta,
+                or a number for numeric times). Without it, only a series that
+                still contains the last consumed bar continues the state.
+        """
+        self.factory = factory
+        self.time_field = time_field
+        self.max_gap = max_gap
+        self.state_dir = Path(state_dir) if state_dir else None
+        if self.state_dir:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+        self._states: Dict[Hashable, Any] = {}
+        self._last_seen: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        self._symbol_locks: Dict[Hashable, threading.Lock] = {}
+
+    def get(self, symbol: Hashable) -> Optional[Any]:
+        """Current state for a symbol, if any."""
+        return self._states.get(symbol)
+
+    def update(self, symbol: Hashable, bar: Dict[str, Any]) -> Any:
+        """Fold one new bar into a symbol's state (needs ``max_gap`` to continue it)."""
+        return self.sync(symbol, [bar])
+
+    def sync(self, symbol: Hashable, bars: Sequence[Dict[str, Any]]) -> Any:
+        """Bring a symbol's state up to date with a bar series.
+
+        Only bars newer than the last one consumed are applied, found by
+        scanning back from the end, so the cost tracks new bars rather
+        than history length. If the series no longer contains the last
+        consumed bar (history was revised or the feed restarted), or the
+        bars carry no timestamp to resume from, the state is rebuilt from
+        the whole series.
+
+        Args:
+            symbol: Symbol the bars belong to
+            bars: Bars in ascending time order, either the full history or
+                just the latest ones
+
+        Returns:
+            The symbol's updated indicator state
+        """
+        with self._lock:
+            lock = self._symbol_locks.setdefault(symbol, threading.Lock())
+
+        with lock:
+            if symbol not in self._states and self.state_dir:
+                self._load(symbol)
+
+            state = self._states.get(symbol)
+            last = self._last_seen.get(symbol)
+            start = None
+            if state is not None and not bars:
+                start = 0
+            elif state is not None and last is not None:
+                start = self._resume_index(bars, last)
+            if start is None:
+                state, start = self.factory(), 0
+
+            self._apply(state, bars, start)
+            self._states[symbol] = state
+            if start < len(bars):
+                self._last_seen[symbol] = _bar_key(bars[-1].get(self.time_field))
+                if self.state_dir:
+                    self._save(symbol)
+            return state
+
+    def _resume_index(self, bars: Sequence[Dict[str, Any]], last: Any) -> Optional[int]:
+        """Index of the first unseen bar, or None if the series doesn't continue."""
+        field = self.time_field
+        i = len(bars)
+        while i > 0 and _bar_key(bars[i - 1].get(field)) > last:
+            i -= 1
+        if i > 0:
+            return i if _bar_key(bars[i - 1].get(field)) == last else None
+        if not bars or self._follows(bars[0].get(field), last):
+            return 0
+        return None
+
+    def _follows(self, first: Any, last: Any) -> bool:
+        """Whether a bar at ``first`` comes right after the last consumed bar at ``last``."""
+        if self.max_gap is None:
+            return False
+        try:
+            if isinstance(last, str):
+                last = type(first).fromisoformat(last)
+            return first - last <= self.max_gap
+        except (AttributeError, TypeError, ValueError):
+            return False
+
+    def _apply(self, state: Any, bars: Sequence[Dict[str, Any]], start: int) -> None:
+        for i in range(start, len(bars)):
+            state.update(bars[i])
+
+    def _state_path(self, symbol: Hashable) -> Path:
+        return self.state_dir / f"{symbol}.json"
+
+    def _load(self, symbol: Hashable) -> None:
+        """Restore a symbol's persisted state; a bad or stale file is ignored."""
+        path = self._state_path(symbol)
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            state = self.factory()
+            if not state.load(data['state']):
+                return
+        except FileNotFoundError:
+            return
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable indicator state {path}: {e}")
+            return
+        self._states[symbol] = state
+        self._last_seen[symbol] = data.get('last_seen')
+
+    def _save(self, symbol: Hashable) -> None:
+        """Atomically write a symbol's state."""
+        path = self._state_path(symbol)
+        tmp = path.with_suffix('.json.tmp')
+        data = {'last_seen': self._last_seen.get(symbol), 'state': self._states[symbol].to_dict()}
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not persist indicator state for {symbol}: {e}")
+
+    def replay(self, symbol: Hashable, bars: Iterable[Dict[str, Any]]) -> Any:
+        """Rebuild a symbol's state from scratch."""
+        self.reset(symbol)
+        return self.sync(symbol, list(bars))
+
+    def reset(self, symbol: Optional[Hashable] = None) -> None:
+        """Drop state for one symbol, or for all symbols, including persisted copies."""
+        with self._lock:
+            symbols = list(self._states) if symbol is None else [symbol]
+            if self.state_dir and symbol is None:
+                symbols = [path.stem for path in self.state_dir.glob('*.json')]
+            for name in symbols:
+                self._states.pop(name, None)
+                self._last_seen.pop(name, None)
+                if self.state_dir:
+                    try:
+                        self._state_path(name).unlink()
+                    except FileNotFoundError:
+                        pass
+            if symbol is None:
+                self._states.clear()
+                self._last_seen.clear()
@@ -0,0 +1,102 @@
+"""Vectorized max pain calculation.
+
+The pain at a settlement strike ``K`` is the payout option holders would
+receive if the underlying expired there:
+
+    pain(K) = sum_{s < K} call_oi[s] * (K - s) + sum_{s > K} put_oi[s] * (s - K)
+
+Expanding the sums gives prefix sums over strikes in sorted order, so a
+whole pain curve costs O(n log n) (the sort) rather than O(n^2).
+"""
+from typing import NamedTuple, Sequence, Union
+
+import numpy as np
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+
+class MaxPainResult(NamedTuple):
+    """Max pain strikes with the pain curves they were picked from.
+
+    For a single chain ``strike`` is a float and ``strikes``/``pain`` are
+    1-D. For a batch they gain a leading axis, one row per chain.
+    """
+    strike: Union[float, np.ndarray]
+    strikes: np.ndarray  # Sorted strikes
+    pain: np.ndarray  # Pain at each sorted strike
+
+
+def pain_curve(strikes: ArrayLike, call_oi: ArrayLike, put_oi: ArrayLike) -> np.ndarray:
+    """Pain at every strike, for one chain or a batch of chains.
+
+    Args:
+        strikes: Strikes, shape (n,) or (chains, n); need not be sorted.
+            Ragged batches are padded with NaN strikes.
+        call_oi: Call open interest aligned with ``strikes``
+        put_oi: Put open interest aligned with ``strikes``
+
+    Returns:
+        Pain aligned with ``np.sort(strikes, axis=-1)``; NaN at padding
+    """
+    strikes = np.asarray(strikes, dtype=np.float64)
+    call_oi = np.asarray(call_oi, dtype=np.float64)
+    put_oi = np.asarray(put_oi, dtype=np.float64)
+    if not strikes.shape == call_oi.shape == put_oi.shape:
+        raise ValueError(
+            f"strikes, call_oi and put_oi must have the same shape, "
+            f"got {strikes.shape}, {call_oi.shape}, {put_oi.shape}"
+        )
+
+    order = np.argsort(strikes, axis=-1, kind='stable')  # NaN padding sorts last
+    k = np.take_along_axis(strikes, order, axis=-1)
+    valid = ~np.isnan(k)
+    k0 = np.where(valid, k, 0.0)
+    c = np.where(valid, np.take_along_axis(call_oi, order, axis=-1), 0.0)
+    p = np.where(valid, np.take_along_axis(put_oi, order, axis=-1), 0.0)
+
+    # Calls struck strictly below K: K * sum(C) - sum(C * s), using exclusive prefix sums
+    c_cum = np.cumsum(c, axis=-1) - c
+    cs_cum = np.cumsum(c * k0, axis=-1) - c * k0
+    call_pain = k0 * c_cum - cs_cum
+
+    # Puts struck strictly above K: sum(P * s) - K * sum(P), using exclusive suffix sums
+    p_tail = p.sum(axis=-1, keepdims=True) - np.cumsum(p, axis=-1)
+    ps_tail = (p * k0).sum(axis=-1, keepdims=True) - np.cumsum(p * k0, axis=-1)
+    put_pain = ps_tail - k0 * p_tail
+
+    return np.where(valid, call_pain + put_pain, np.nan)
+
+
+def max_pain(strikes: ArrayLike, call_oi: ArrayLike, put_oi: ArrayLike) -> MaxPainResult:
+    """Max pain strike and full pain curve for one chain or a batch.
+
+    Picks the strike with the largest pain. Ties (including a chain with no
+    open interest) go to the strike listed first in the input, as the
+    strike-by-strike loop this replaced did.
+
+    Args:
+        strikes: Strikes, shape (n,) or (chains, n); NaN-padded if ragged
+        call_oi: Call open interest aligned with ``strikes``
+        put_oi: Put open interest aligned with ``strikes``
+
+    Returns:
+        MaxPainResult
+    """
+    raw = np.asarray(strikes, dtype=np.float64)
+    if raw.shape[-1] == 0:
+        raise ValueError("At least one strike is required")
+    order = np.argsort(raw, axis=-1, kind='stable')
+    sorted_strikes = np.take_along_axis(raw, order, axis=-1)
+    pain = pain_curve(raw, call_oi, put_oi)
+
+    # Back in input order; prefix sums can leave equal pains an ulp apart
+    by_input = np.empty_like(pain)
+    np.put_along_axis(by_input, order, pain, axis=-1)
+    scores = np.where(np.isnan(by_input), -np.inf, by_input)
+    best = scores.max(axis=-1, keepdims=True)
+    tied = scores >= best - 1e-9 * np.maximum(np.abs(best), 1.0)
+    idx = np.argmax(tied, axis=-1)
+    strike = np.take_along_axis(raw, np.expand_dims(idx, -1), axis=-1)[..., 0]
+    if strike.ndim == 0:
+        strike = float(strike)
+    return MaxPainResult(strike=strike, strikes=sorted_strikes, pain=pain)
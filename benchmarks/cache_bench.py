@@ -0,0 +1,100 @@
+"""Microbenchmark for utils.cache.DataCache lookups.
+
+Usage:
+    python benchmarks/cache_bench.py [--keys 2000] [--ops 200000] [--threads 8]
+
+Reports nanoseconds per operation (best of 5 runs) for hits, misses, sets
+and bulk reads on one thread, and aggregate throughput with several reader
+threads.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import DataCache
+
+
+def _per_op(label: str, ops: int, func, repeat: int = 5) -> None:
+    """Print the best of ``repeat`` runs, the least noisy estimate."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<28} {best / ops * 1e9:8.0f} ns/op")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DataCache microbenchmark")
+    parser.add_argument('--keys', type=int, default=2000)
+    parser.add_argument('--ops', type=int, default=200000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    keys = [f"option_chain:SYM{i}" for i in range(args.keys)]
+    lookups = [keys[i % len(keys)] for i in range(args.ops)]
+    misses = [f"missing:{i % len(keys)}" for i in range(args.ops)]
+    cache = DataCache(ttl_minutes=5, max_entries=len(keys) * 2)
+    for key in keys:
+        cache.set(key, {'spot_price': 22450.0})
+
+    def hits():
+        get = cache.get
+        for key in lookups:
+            get(key)
+
+    def miss():
+        get = cache.get
+        for key in misses:
+            get(key)
+
+    def sets():
+        put = cache.set
+        for key in lookups:
+            put(key, 1)
+
+    _per_op("get (hit)", args.ops, hits)
+    _per_op("get (miss)", args.ops, miss)
+    _per_op("set", args.ops, sets)
+
+    get_many = getattr(cache, 'get_many', None)
+    if get_many is not None:
+        batch = 50
+        batches = [lookups[i:i + batch] for i in range(0, len(lookups), batch)]
+
+        def bulk():
+            for keys_ in batches:
+                get_many(keys_)
+
+        _per_op(f"get_many ({batch} keys, per key)", args.ops, bulk)
+
+    per_thread = args.ops // args.threads
+    start = threading.Barrier(args.threads + 1)
+
+    def reader(offset: int) -> None:
+        get = cache.get
+        mine = lookups[offset:offset + per_thread]
+        start.wait()
+        for key in mine:
+            get(key)
+
+    threads = [
+        threading.Thread(target=reader, args=(i * per_thread,)) for i in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    print(f"{'get x ' + str(args.threads) + ' threads':<28} "
+          f"{per_thread * args.threads / elapsed / 1e6:8.2f} M ops/s")
+
+
+if __name__ == '__main__':
+    main()
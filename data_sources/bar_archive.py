@@ -0,0 +1,277 @@
+"""Memory-mapped on-disk bar archive.
+
+Bars are stored as fixed-width little-endian records::
+
+    <q d d d d q  time (microseconds since epoch), open, high, low, close, volume
+
+one file per symbol, interval and partition:
+
+    {root}/{interval}/{symbol}/{YYYY-MM-DD}.bars   intraday intervals
+    {root}/{interval}/{symbol}/{YYYY}.bars         daily intervals
+
+Records within a file are sorted by time. New bars are appended; a bar at
+or before the last stored time triggers a merge rewrite of that partition.
+Files are read through ``mmap`` and wrapped as ``BarSeries`` columns
+without copying. A record torn by a crash is ignored and trimmed on the
+next append.
+
+Each symbol/interval also records the time range that has been fetched
+(``_extent.json``), so callers can ask which parts of a request still need
+fetching, including ranges that legitimately had no bars.
+"""
+import json
+import logging
+import mmap
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from data_sources.bars import FIELDS, TIME_DTYPE, BarSeries, to_datetime64
+
+logger = logging.getLogger('tradebot')
+
+RECORD_FORMAT = '<qddddq'
+RECORD_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<i8'),
+])
+RECORD_SIZE = RECORD_DTYPE.itemsize  # 48 bytes, same as struct.calcsize(RECORD_FORMAT)
+
+DAILY_INTERVALS = ('1d', 'daily', 'day')
+
+INTERVALS = {
+    '1min': timedelta(minutes=1),
+    '3min': timedelta(minutes=3),
+    '5min': timedelta(minutes=5),
+    '10min': timedelta(minutes=10),
+    '15min': timedelta(minutes=15),
+    '30min': timedelta(minutes=30),
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1),
+    'daily': timedelta(days=1),
+    'day': timedelta(days=1),
+}
+
+
+def interval_delta(interval: str) -> timedelta:
+    """Bar length for an interval name like '15min' or '1d'."""
+    try:
+        return INTERVALS[interval]
+    except KeyError:
+        raise ValueError(f"Unknown bar interval: {interval}")
+
+
+def _as_datetime(value: Any) -> datetime:
+    return to_datetime64(value).astype(datetime)
+
+
+class BarArchive:
+    """Partitioned fixed-width bar files read through mmap."""
+
+    def __init__(self, root: Union[str, Path] = "data/bars"):
+        """Initialize archive.
+
+        Args:
+            root: Directory holding the archive
+        """
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    # Layout
+
+    def _dir(self, symbol: str, interval: str) -> Path:
+        return self.root / interval / symbol
+
+    def _partition(self, when: datetime, interval: str) -> str:
+        return when.strftime('%Y') if interval in DAILY_INTERVALS else when.strftime('%Y-%m-%d')
+
+    def partitions(self, symbol: str, interval: str) -> List[Path]:
+        """Partition files for a symbol/interval, oldest first."""
+        directory = self._dir(symbol, interval)
+        if not directory.exists():
+            return []
+        return sorted(directory.glob('*.bars'))
+
+    # Reading
+
+    def _map(self, path: Path) -> np.ndarray:
+        """Records of one partition as a read-only view onto the mapped file."""
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            count = size // RECORD_SIZE
+            if count == 0:
+                return np.empty(0, dtype=RECORD_DTYPE)
+            mapped = mmap.mmap(f.fileno(), count * RECORD_SIZE, access=mmap.ACCESS_READ)
+        return np.frombuffer(mapped, dtype=RECORD_DTYPE, count=count)
+
+    def _wrap(self, records: np.ndarray, time_field: str) -> BarSeries:
+        columns = {name: records[name] for name in FIELDS}
+        return BarSeries.wrap(records['time'].view(TIME_DTYPE), columns, time_field)
+
+    def iter_partitions(
+        self,
+        symbol: str,
+        interval: str,
+        start: Optional[Any] = None,
+        end: Optional[Any] = None,
+        time_field: str = 'time'
+    ) -> Iterator[BarSeries]:
+        """Yield bars in ``[start, end)`` one partition at a time, without copying.
+
+        Args:
+            symbol: Symbol
+            interval: Bar interval, e.g. '1min' or '1d'
+            start: First time to include (default: earliest)
+            end: Time to stop before (default: latest)
+            time_field: Time key for dict views of the yielded series
+        """
+        first = self._partition(_as_datetime(start), interval) if start is not None else None
+        last = self._partition(_as_datetime(end), interval) if end is not None else None
+        for path in self.partitions(symbol, interval):
+            if (first and path.stem < first) or (last and path.stem > last):
+                continue
+            series = self._wrap(self._map(path), time_field)
+            if start is not None or end is not None:
+                series = series.between(start, end)
+            if len(series):
+                yield series
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        start: Optional[Any] = None,
+        end: Optional[Any] = None,
+        time_field: str = 'time'
+    ) -> BarSeries:
+        """Bars in ``[start, end)``.
+
+        Zero-copy when the range falls in one partition; otherwise the
+        partitions are joined into a new series.
+        """
+        parts = list(self.iter_partitions(symbol, interval, start, end, time_field))
+        if len(parts) == 1:
+            return parts[0]
+        return BarSeries.concat(parts, time_field)
+
+    # Writing
+
+    def write(
+        self,
+        symbol: str,
+        interval: str,
+        bars: BarSeries,
+        covered: Optional[Tuple[Any, Any]] = None
+    ) -> int:
+        """Store bars, appending where possible.
+
+        Args:
+            symbol: Symbol
+            interval: Bar interval
+            bars: Bars in ascending time order
+            covered: ``(start, end)`` range these bars were fetched for, recorded
+                so empty stretches (holidays, closed hours) aren't fetched again
+
+        Returns:
+            Number of bars written
+        """
+        records = np.empty(len(bars), dtype=RECORD_DTYPE)
+        records['time'] = bars.time.view('<i8')
+        for name in FIELDS:
+            records[name] = bars.column(name)
+
+        with self._lock:
+            directory = self._dir(symbol, interval)
+            directory.mkdir(parents=True, exist_ok=True)
+
+            if len(records):
+                # datetime64[Y]/[D] print as YYYY/YYYY-MM-DD, matching _partition
+                unit = 'datetime64[Y]' if interval in DAILY_INTERVALS else 'datetime64[D]'
+                keys = bars.time.astype(unit)
+                bounds = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+                for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(records)]):
+                    self._write_partition(directory / f"{keys[lo]}.bars", records[lo:hi])
+
+            if covered is not None:
+                self._extend_extent(symbol, interval, covered)
+        return len(records)
+
+    def _write_partition(self, path: Path, records: np.ndarray) -> None:
+        """Append sorted records, merging if they overlap what's stored."""
+        existing = self._map(path) if path.exists() else np.empty(0, dtype=RECORD_DTYPE)
+        if len(existing) and records['time'][0] <= existing['time'][-1]:
+            merged = np.concatenate([existing, records])
+            # Keep the newest copy of each time: last occurrence after a stable sort
+            order = np.argsort(merged['time'], kind='stable')
+            merged = merged[order]
+            keep = np.append(merged['time'][1:] != merged['time'][:-1], True)
+            tmp = path.with_suffix('.bars.tmp')
+            with open(tmp, 'wb') as f:
+                f.write(merged[keep].tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            return
+
+        with open(path, 'ab') as f:
+            torn = f.tell() % RECORD_SIZE
+            if torn:
+                f.truncate(f.tell() - torn)
+                f.seek(0, os.SEEK_END)
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    # Coverage
+
+    def _extent_path(self, symbol: str, interval: str) -> Path:
+        return self._dir(symbol, interval) / '_extent.json'
+
+    def extent(self, symbol: str, interval: str) -> Optional[Tuple[datetime, datetime]]:
+        """The contiguous ``[start, end)`` range already fetched, if any."""
+        try:
+            with open(self._extent_path(symbol, interval), 'r') as f:
+                data = json.load(f)
+            return datetime.fromisoformat(data['start']), datetime.fromisoformat(data['end'])
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable archive extent for {symbol} {interval}: {e}")
+            return None
+
+    def _extend_extent(self, symbol: str, interval: str, covered: Tuple[Any, Any]) -> None:
+        start, end = _as_datetime(covered[0]), _as_datetime(covered[1])
+        current = self.extent(symbol, interval)
+        if current is not None and start <= current[1] and end >= current[0]:
+            start, end = min(start, current[0]), max(end, current[1])
+        # A disjoint range replaces the old extent: bars stay, but the gap must be refetched
+
+        path = self._extent_path(symbol, interval)
+        tmp = path.with_suffix('.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'start': start.isoformat(), 'end': end.isoformat()}, f)
+        os.replace(tmp, path)
+
+    def missing(self, symbol: str, interval: str, start: Any, end: Any) -> List[Tuple[datetime, datetime]]:
+        """Sub-ranges of ``[start, end)`` not yet fetched into the archive."""
+        start, end = _as_datetime(start), _as_datetime(end)
+        if start >= end:
+            return []
+        current = self.extent(symbol, interval)
+        if current is None or end <= current[0] or start >= current[1]:
+            return [(start, end)]
+
+        gaps = []
+        if start < current[0]:
+            gaps.append((start, current[0]))
+        if end > current[1]:
+            gaps.append((current[1], end))
+        return gaps
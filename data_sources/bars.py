@@ -0,0 +1,289 @@
+"""Columnar OHLCV bar storage.
+
+A ``BarSeries`` keeps each field in its own contiguous NumPy array with a
+``datetime64`` time index, instead of one dict per bar. Appends amortize
+to O(1) by doubling capacity, slices share memory with their parent, and
+indexing or iterating yields plain dicts so code written against
+list-of-dicts bars keeps working.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+FIELDS = PRICE_FIELDS + ('volume',)
+TIME_DTYPE = 'datetime64[us]'
+
+
+def to_datetime64(value: Any) -> np.datetime64:
+    """Convert a datetime, date, ISO string or datetime64 to the time index dtype."""
+    return np.datetime64(value, 'us')
+
+
+class BarSeries:
+    """OHLCV bars as contiguous arrays with a datetime64 time index.
+
+    Column views (``series.close`` etc.) are read-only windows onto the
+    underlying buffers; take ``.copy()`` to modify them. A slice shares its
+    parent's buffers until it is appended to, at which point it gets its own.
+    """
+
+    def __init__(self, capacity: int = 64, time_field: str = 'time'):
+        """Create an empty series.
+
+        Args:
+            capacity: Bars to preallocate
+            time_field: Name of the time key in dict views ('time' intraday, 'date' daily)
+        """
+        capacity = max(int(capacity), 1)
+        self.time_field = time_field
+        self._time = np.empty(capacity, dtype=TIME_DTYPE)
+        self._cols = {name: np.empty(capacity, dtype=np.float64) for name in PRICE_FIELDS}
+        self._cols['volume'] = np.empty(capacity, dtype=np.int64)
+        self._len = 0
+        self._shared = False  # True while the buffers belong to a parent series
+
+    @classmethod
+    def from_arrays(
+        cls,
+        time: Sequence[Any],
+        open: Sequence[float],
+        high: Sequence[float],
+        low: Sequence[float],
+        close: Sequence[float],
+        volume: Sequence[int],
+        time_field: str = 'time'
+    ) -> 'BarSeries':
+        """Build a series from column arrays (copied once)."""
+        series = cls(capacity=len(time), time_field=time_field)
+        series.extend_arrays(time, open, high, low, close, volume)
+        return series
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]], time_field: str = 'time') -> 'BarSeries':
+        """Build a series from dict bars."""
+        records = list(records)
+        series = cls(capacity=len(records), time_field=time_field)
+        for bar in records:
+            series.append(bar[time_field], bar['open'], bar['high'], bar['low'], bar['close'], bar['volume'])
+        return series
+
+    @classmethod
+    def wrap(
+        cls,
+        time: np.ndarray,
+        columns: Dict[str, np.ndarray],
+        time_field: str = 'time'
+    ) -> 'BarSeries':
+        """Wrap existing arrays without copying.
+
+        The series treats them as borrowed: appending copies them first.
+
+        Args:
+            time: datetime64[us] time index
+            columns: Arrays for every name in ``FIELDS``, aligned with ``time``
+            time_field: Name of the time key in dict views
+        """
+        series = cls.__new__(cls)
+        series.time_field = time_field
+        series._time = time
+        series._cols = {name: columns[name] for name in FIELDS}
+        series._len = len(time)
+        series._shared = True
+        return series
+
+    @classmethod
+    def concat(cls, parts: Sequence['BarSeries'], time_field: Optional[str] = None) -> 'BarSeries':
+        """Join series end to end into one new series."""
+        if time_field is None:
+            time_field = parts[0].time_field if parts else 'time'
+        series = cls(capacity=sum(len(part) for part in parts), time_field=time_field)
+        for part in parts:
+            series.extend(part)
+        return series
+
+    @classmethod
+    def _view(cls, parent: 'BarSeries', key: slice) -> 'BarSeries':
+        series = cls.__new__(cls)
+        series.time_field = parent.time_field
+        series._time = parent._time[:parent._len][key]
+        series._cols = {name: col[:parent._len][key] for name, col in parent._cols.items()}
+        series._len = len(series._time)
+        series._shared = True
+        return series
+
+    # Appending
+
+    def _reserve(self, needed: int) -> None:
+        """Grow buffers to hold ``needed`` bars, at least doubling capacity."""
+        capacity = len(self._time)
+        if needed <= capacity and not self._shared:
+            return
+        capacity = max(needed, capacity * 2, 1)
+        n = self._len
+
+        time = np.empty(capacity, dtype=TIME_DTYPE)
+        time[:n] = self._time[:n]
+        self._time = time
+        for name, col in self._cols.items():
+            grown = np.empty(capacity, dtype=col.dtype)
+            grown[:n] = col[:n]
+            self._cols[name] = grown
+        self._shared = False
+
+    def append(
+        self,
+        time: Any,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: int
+    ) -> None:
+        """Append one bar."""
+        n = self._len
+        self._reserve(n + 1)
+        self._time[n] = to_datetime64(time)
+        cols = self._cols
+        cols['open'][n] = open
+        cols['high'][n] = high
+        cols['low'][n] = low
+        cols['close'][n] = close
+        cols['volume'][n] = volume
+        self._len = n + 1
+
+    def append_bar(self, bar: Dict[str, Any]) -> None:
+        """Append one dict bar."""
+        self.append(bar[self.time_field], bar['open'], bar['high'], bar['low'], bar['close'], bar['volume'])
+
+    def extend_arrays(
+        self,
+        time: Sequence[Any],
+        open: Sequence[float],
+        high: Sequence[float],
+        low: Sequence[float],
+        close: Sequence[float],
+        volume: Sequence[int]
+    ) -> None:
+        """Append many bars given as columns."""
+        time = np.asarray(time).astype(TIME_DTYPE)
+        count = len(time)
+        n = self._len
+        self._reserve(n + count)
+        self._time[n:n + count] = time
+        for name, values in zip(FIELDS, (open, high, low, close, volume)):
+            self._cols[name][n:n + count] = values
+        self._len = n + count
+
+    def extend(self, other: 'BarSeries') -> None:
+        """Append every bar of another series."""
+        self.extend_arrays(other.time, *(other.column(name) for name in FIELDS))
+
+    # Columns
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of one field over the stored bars."""
+        values = self._time if name in ('time', self.time_field) else self._cols[name]
+        view = values[:self._len]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def time(self) -> np.ndarray:
+        return self.column('time')
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.column('open')
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.column('high')
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.column('low')
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.column('close')
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.column('volume')
+
+    # Windows
+
+    def tail(self, count: int) -> 'BarSeries':
+        """Last ``count`` bars, sharing memory."""
+        return self[max(self._len - count, 0):]
+
+    def between(self, start: Optional[Any] = None, end: Optional[Any] = None) -> 'BarSeries':
+        """Bars with ``start <= time < end``, sharing memory.
+
+        Assumes the time index is ascending.
+        """
+        time = self._time[:self._len]
+        lo = 0 if start is None else int(np.searchsorted(time, to_datetime64(start), 'left'))
+        hi = self._len if end is None else int(np.searchsorted(time, to_datetime64(end), 'left'))
+        return self[lo:hi]
+
+    # Legacy list-of-dicts interface
+
+    def bar(self, index: int) -> Dict[str, Any]:
+        """One bar as a dict, with a ``datetime`` time."""
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("bar index out of range")
+        cols = self._cols
+        return {
+            self.time_field: self._time[index].astype(datetime),
+            'open': float(cols['open'][index]),
+            'high': float(cols['high'][index]),
+            'low': float(cols['low'][index]),
+            'close': float(cols['close'][index]),
+            'volume': int(cols['volume'][index]),
+        }
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Dict[str, Any], 'BarSeries']:
+        if isinstance(key, slice):
+            return self._view(self, key)
+        return self.bar(key)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self._len):
+            yield self.bar(i)
+
+    def to_records(self) -> list:
+        """All bars as a list of dicts."""
+        return list(self)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the stored bars (excluding spare capacity)."""
+        return self._len * (self._time.itemsize + sum(col.itemsize for col in self._cols.values()))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pickle only the stored bars, not spare capacity or a parent's buffers
+        return {
+            'time_field': self.time_field,
+            'time': self._time[:self._len].copy(),
+            'cols': {name: col[:self._len].copy() for name, col in self._cols.items()},
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.time_field = state['time_field']
+        self._time = state['time']
+        self._cols = state['cols']
+        self._len = len(self._time)
+        self._shared = False
+
+    def __repr__(self) -> str:
+        if not self._len:
+            return "BarSeries(0 bars)"
+        return f"BarSeries({self._len} bars, {self._time[0]} .. {self._time[self._len - 1]})"
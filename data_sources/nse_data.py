@@ -4,32 +4,81 @@ Stubs for fetching NSE option chain, stock data, and sentiment data.
 Actual implementations would use nsepy, NSE APIs, or broker APIs.
 """
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 import random
 
+from analysis.greeks import bs_price
+from utils.cache import DataCache, cached
+from utils.cache_store import CacheStore
+from utils.decorators import hedged_request
+from utils.resilience import build_guards, guarded
+from data_sources.bars import BarSeries
+from data_sources.bar_archive import BarArchive, interval_delta
+
 
 class NSEDataFetcher:
     """Fetches market data from NSE India."""
     
-    def __init__(self):
-        self.cache = {}
-        self.cache_ttl = 300  # 5 minutes
+    # Per-endpoint request quotas and breaker settings (see utils.resilience.EndpointGuard)
+    ENDPOINTS = {
+        'option_chain': {'rate': 3.0, 'burst': 5, 'slow_call_seconds': 2.0},
+        'bars': {'rate': 5.0, 'burst': 10, 'slow_call_seconds': 2.0},
+        'sentiment': {'rate': 1.0, 'burst': 2, 'slow_call_seconds': 2.0},
+    }
+    
+    def __init__(
+        self,
+        archive_dir: Optional[str] = None,
+        quotas: Optional[Dict[str, Dict[str, Any]]] = None,
+        cache_db: Optional[str] = None
+    ):
+        """Initialize fetcher.
+        
+        Args:
+            archive_dir: Local bar archive to read first and fill with fetched
+                bars, so only missing ranges are fetched (default: no archive)
+            quotas: Per-endpoint overrides of ``ENDPOINTS``
+            cache_db: SQLite file persisting the caches across restarts
+                (default: memory only)
+        """
+        # Recent responses; concurrent requests for the same key share one fetch.
+        # Striped, since parallel fetches hit it from many threads. Only this
+        # cache is persisted, kept on disk as long as last_good needs it
+        self.cache = DataCache(
+            ttl_minutes=5, max_entries=4096, stale_minutes=60, sweep_seconds=60, shards=16,
+            store=CacheStore(cache_db, 'nse') if cache_db else None
+        )
+        # Last good responses, served while an endpoint is throttled or failing
+        self.last_good = DataCache(ttl_minutes=5, max_entries=4096, stale_minutes=60, sweep_seconds=60)
+        self.last_good.seed(self.cache)
+        self.guards = build_guards(self.ENDPOINTS, self.last_good, quotas)
+        self.risk_free_rate = 0.065
+        self.archive = BarArchive(archive_dir) if archive_dir else None
     
+    @cached('option_chain:{symbol}', ttl=10, stale_ok=20)
+    @guarded('option_chain', key='option_chain:{symbol}')
+    @hedged_request()
     def get_option_chain(self, symbol: str) -> Dict[str, Any]:
         """Fetch option chain data for symbol (NIFTY, BANKNIFTY, etc)."""
         # STUB: Would use nsepy.get_option_chain or similar
         
         spot = self._get_spot_price(symbol)
+        strikes = self._generate_strikes(spot)
+        days_to_expiry = random.randint(1, 30)
+        iv_current = random.uniform(15, 35)
+        call_ltp, put_ltp = self._price_strikes(spot, strikes, days_to_expiry, iv_current / 100)
         
         return {
             'symbol': symbol,
             'spot_price': spot,
             'expiry_dates': self._get_expiry_dates(symbol),
-            'strikes': self._generate_strikes(spot),
+            'strikes': strikes,
+            'call_ltp': call_ltp,
+            'put_ltp': put_ltp,
             'pcr': random.uniform(0.8, 1.4),
             'oi_change_pct': random.uniform(-15, 15),
-            'iv_current': random.uniform(15, 35),
+            'iv_current': iv_current,
             'iv_percentile': random.uniform(20, 80),
             'max_pain': spot * random.uniform(0.98, 1.02),
             'call_oi': [random.randint(100000, 500000) for _ in range(10)],
@@ -38,28 +87,26 @@ class NSEDataFetcher:
             'theta': random.uniform(-20, -5),
             'premium': random.uniform(50, 200),
             'lot_size': 50 if 'NIFTY' in symbol else 25,
-            'days_to_expiry': random.randint(1, 30),
+            'days_to_expiry': days_to_expiry,
         }
     
-    def get_intraday_data(self, symbol: str, interval: str = '15min') -> Dict[str, Any]:
-        """Fetch intraday OHLC data."""
-        # STUB: Would fetch from broker API or nsepy
-        
-        base_price = self._get_spot_price(symbol)
-        ohlc = []
+    def get_intraday_data(
+        self,
+        symbol: str,
+        interval: str = '15min',
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Fetch intraday OHLC data as a BarSeries under 'ohlc_intraday'.
         
-        for i in range(25):  # 25 candles
-            noise = random.uniform(-0.005, 0.005)
-            close = base_price * (1 + noise * (i - 12) / 12)
-            ohlc.append({
-                'time': datetime.now() - timedelta(minutes=(25-i)*15),
-                'open': close * (1 + random.uniform(-0.002, 0.002)),
-                'high': close * (1 + random.uniform(0, 0.005)),
-                'low': close * (1 + random.uniform(-0.005, 0)),
-                'close': close,
-                'volume': random.randint(10000, 100000)
-            })
+        Only completed bars are returned; the range defaults to the last 25.
+        """
+        step = interval_delta(interval)
+        end = min(end or datetime.now(), self._align(datetime.now(), step))
+        start = start or end - 25 * step
+        ohlc = self.get_bars(symbol, interval, start, end, time_field='time')
         
+        base_price = ohlc.close[-1] if len(ohlc) else self._get_spot_price(symbol)
         support = [base_price * 0.99, base_price * 0.985]
         resistance = [base_price * 1.01, base_price * 1.015]
         
@@ -72,21 +119,9 @@ class NSEDataFetcher:
         }
     
     def get_daily_data(self, symbol: str, days: int = 50) -> Dict[str, Any]:
-        """Fetch daily OHLC data for swing analysis."""
-        base_price = self._get_spot_price(symbol)
-        ohlc = []
-        
-        for i in range(days):
-            noise = random.uniform(-0.02, 0.02)
-            close = base_price * (1 + noise)
-            ohlc.append({
-                'date': datetime.now() - timedelta(days=days-i),
-                'open': close * (1 + random.uniform(-0.005, 0.005)),
-                'high': close * (1 + random.uniform(0, 0.01)),
-                'low': close * (1 + random.uniform(-0.01, 0)),
-                'close': close,
-                'volume': random.randint(100000, 1000000)
-            })
+        """Fetch daily OHLC data for swing analysis as a BarSeries under 'ohlc_daily'."""
+        end = self._align(datetime.now(), timedelta(days=1))
+        ohlc = self.get_bars(symbol, '1d', end - timedelta(days=days), end, time_field='date')
         
         return {
             'symbol': symbol,
@@ -94,6 +129,78 @@ class NSEDataFetcher:
             'days_to_event': random.randint(0, 30),
         }
     
+    def get_bars(
+        self,
+        symbol: str,
+        interval: str,
+        start: datetime,
+        end: datetime,
+        time_field: str = 'time'
+    ) -> BarSeries:
+        """Bars in [start, end), served from the archive where possible.
+        
+        With an archive, only the sub-ranges it hasn't seen are fetched, and
+        they are stored before the whole range is read back from disk.
+        """
+        if self.archive is None:
+            return self._fetch_bars(symbol, interval, start, end, time_field)
+        
+        for gap_start, gap_end in self.archive.missing(symbol, interval, start, end):
+            fetched = self._fetch_bars(symbol, interval, gap_start, gap_end, time_field)
+            self.archive.write(symbol, interval, fetched, covered=(gap_start, gap_end))
+        return self.archive.read(symbol, interval, start, end, time_field=time_field)
+    
+    @cached('bars:{symbol}:{interval}:{start}:{end}:{time_field}')
+    @guarded('bars', key='bars:{symbol}:{interval}:{start}:{end}:{time_field}')
+    @hedged_request()
+    def _fetch_bars(
+        self,
+        symbol: str,
+        interval: str,
+        start: datetime,
+        end: datetime,
+        time_field: str
+    ) -> BarSeries:
+        """Fetch bars on the interval grid within [start, end)."""
+        # STUB: Would fetch from broker API or nsepy
+        step = interval_delta(interval)
+        if step >= timedelta(days=1):
+            spread, jitter, wick, volume = 0.02, 0.005, 0.01, (100000, 1000000)
+        else:
+            spread, jitter, wick, volume = 0.005, 0.002, 0.005, (10000, 100000)
+        
+        base_price = self._get_spot_price(symbol)
+        when = self._align(start, step)
+        if when < start:
+            when += step
+        ohlc = BarSeries(capacity=max(int((end - when) / step) + 1, 1), time_field=time_field)
+        
+        while when < end:
+            close = base_price * (1 + random.uniform(-spread, spread))
+            ohlc.append(
+                time=when,
+                open=close * (1 + random.uniform(-jitter, jitter)),
+                high=close * (1 + random.uniform(0, wick)),
+                low=close * (1 + random.uniform(-wick, 0)),
+                close=close,
+                volume=random.randint(*volume)
+            )
+            when += step
+        return ohlc
+    
+    def close(self) -> None:
+        """Flush persisted caches and stop their sweepers."""
+        self.cache.close()
+        self.last_good.close()
+    
+    @staticmethod
+    def _align(when: datetime, step: timedelta) -> datetime:
+        """Round down to the interval grid."""
+        return when - (when - datetime(1970, 1, 1)) % step
+    
+    @cached('sentiment', ttl=60, stale_ok=120)
+    @guarded('sentiment', key='sentiment')
+    @hedged_request()
     def get_sentiment_data(self) -> Dict[str, Any]:
         """Fetch market sentiment data (FII/DII, global cues, etc)."""
         return {
@@ -138,6 +245,21 @@ class NSEDataFetcher:
         step = 50 if spot < 30000 else 100
         atm = round(spot / step) * step
         return [atm + i * step for i in range(-5, 6)]
+    
+    def _price_strikes(
+        self,
+        spot: float,
+        strikes: List[float],
+        days_to_expiry: int,
+        atm_iv: float
+    ) -> Tuple[List[float], List[float]]:
+        """Price calls and puts at each strike off a simple volatility smile (stub)."""
+        moneyness = [abs(strike / spot - 1) for strike in strikes]
+        smile = [atm_iv * (1 + 4 * m) for m in moneyness]
+        t = days_to_expiry / 365
+        calls = bs_price(spot, strikes, t, self.risk_free_rate, smile, True)
+        puts = bs_price(spot, strikes, t, self.risk_free_rate, smile, False)
+        return [round(float(p), 2) for p in calls], [round(float(p), 2) for p in puts]
 
 
 # For actual implementation, use:
@@ -0,0 +1,247 @@
+"""Immutable market snapshot backed by shared memory.
+
+``MarketSnapshot.build`` packs one tick's option chain, market data and
+sentiment into a single ``multiprocessing.shared_memory`` block: numeric
+lists, arrays and ``BarSeries`` columns as raw aligned buffers, everything
+else (scalars, strings, small nested dicts) in a pickled header. Readers
+get read-only NumPy views onto the block, so threads share it directly and
+a process receives only the block's name when the snapshot is pickled.
+
+Lifecycle: the process that builds a snapshot owns it and must ``unlink``
+it (the context manager does this); attached copies only ``close``.
+"""
+import logging
+import os
+import pickle
+import struct
+import sys
+from multiprocessing import resource_tracker, shared_memory
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from data_sources.bars import FIELDS, BarSeries
+
+logger = logging.getLogger('tradebot')
+
+SECTIONS = ('option_chain', 'market_data', 'sentiment_data')
+
+_HEADER = struct.Struct('<Q')  # Length of the pickled layout that follows
+_ALIGN = 64
+
+
+def _is_numeric_list(value: Any) -> bool:
+    return (
+        isinstance(value, (list, tuple)) and len(value) > 0
+        and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value)
+    )
+
+
+def _tracker_id() -> Optional[Tuple[int, int]]:
+    """Identity of this process's resource tracker (the pipe that children inherit)."""
+    if os.name != 'posix':
+        return None
+    stat = os.fstat(resource_tracker.getfd())
+    return stat.st_dev, stat.st_ino
+
+
+def _attach_untracked(name: str) -> Tuple[shared_memory.SharedMemory, bool]:
+    """Open an existing block, keeping it out of the resource tracker where possible.
+
+    Only the owner may unlink a snapshot. A tracker that saw the attach would
+    unlink the block when this process exits, or complain about it when the
+    owner unlinks it first.
+
+    Returns:
+        (block, whether the caller must ``_untrack`` it); before Python 3.13
+        attaching always registers the block
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False), False
+    return shared_memory.SharedMemory(name=name), True
+
+
+def _untrack(shm: shared_memory.SharedMemory, owner_tracker: Optional[Tuple[int, int]]) -> None:
+    """Undo an attach's registration, unless it went to the owner's own tracker.
+
+    Processes the owner starts share its tracker, which keeps one entry per
+    name: there the attach registered nothing new, and unregistering would
+    drop the owner's entry.
+    """
+    if owner_tracker is None or owner_tracker != _tracker_id():
+        resource_tracker.unregister(shm._name, 'shared_memory')
+
+
+class MarketSnapshot:
+    """One tick of market inputs, shared read-only across threads and processes.
+
+    ``option_chain``, ``market_data`` and ``sentiment_data`` return read-only
+    mappings shaped like the dicts they were built from, with numeric
+    sequences as NumPy arrays and bar series as ``BarSeries``.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self._closed = False
+
+        size = _HEADER.unpack_from(shm.buf, 0)[0]
+        layout = pickle.loads(bytes(shm.buf[_HEADER.size:_HEADER.size + size]))
+        self._data_start = layout['data_start']
+        self._tracker = layout.get('tracker')
+        self._sections = {name: self._materialize(layout['sections'][name]) for name in SECTIONS}
+
+    @classmethod
+    def build(
+        cls,
+        option_chain: Optional[Dict] = None,
+        market_data: Optional[Dict] = None,
+        sentiment_data: Optional[Dict] = None
+    ) -> 'MarketSnapshot':
+        """Copy one tick's inputs into a new shared memory block.
+
+        Args:
+            option_chain: Option chain dict
+            market_data: Market data dict (BarSeries values are stored columnar)
+            sentiment_data: Sentiment dict
+
+        Returns:
+            Owning snapshot
+        """
+        buffers: List[Tuple[int, np.ndarray]] = []
+        cursor = [0]
+
+        def place(values: Any) -> Tuple[int, str, Tuple[int, ...]]:
+            array = np.ascontiguousarray(values)
+            offset = -(-cursor[0] // _ALIGN) * _ALIGN
+            cursor[0] = offset + array.nbytes
+            buffers.append((offset, array))
+            return offset, array.dtype.str, array.shape
+
+        def describe(section: Optional[Dict]) -> Optional[Dict[str, tuple]]:
+            if section is None:
+                return None
+            entries = {}
+            for key, value in section.items():
+                if isinstance(value, BarSeries):
+                    columns = {name: place(value.column(name)) for name in ('time',) + FIELDS}
+                    entries[key] = ('bars', value.time_field, columns)
+                elif isinstance(value, np.ndarray) and value.dtype != object:
+                    entries[key] = ('array', place(value))
+                elif _is_numeric_list(value):
+                    entries[key] = ('array', place(np.asarray(value)))
+                else:
+                    entries[key] = ('value', value)
+            return entries
+
+        sections = {
+            name: describe(section)
+            for name, section in zip(SECTIONS, (option_chain, market_data, sentiment_data))
+        }
+        # Pickle with a placeholder first to learn where the data can start
+        layout = {'sections': sections, 'data_start': 0, 'tracker': _tracker_id()}
+        header_size = _HEADER.size + len(pickle.dumps(layout, pickle.HIGHEST_PROTOCOL)) + 16
+        data_start = -(-header_size // _ALIGN) * _ALIGN
+        layout['data_start'] = data_start
+        encoded = pickle.dumps(layout, pickle.HIGHEST_PROTOCOL)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(data_start + cursor[0], 1))
+        try:
+            _HEADER.pack_into(shm.buf, 0, len(encoded))
+            shm.buf[_HEADER.size:_HEADER.size + len(encoded)] = encoded
+            for offset, array in buffers:
+                target = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=data_start + offset)
+                target[...] = array
+                del target  # Release the export so the block can be closed later
+            return cls(shm, owner=True)
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+
+    @classmethod
+    def attach(cls, name: str) -> 'MarketSnapshot':
+        """Attach to a snapshot built by another process (or this one)."""
+        shm, tracked = _attach_untracked(name)
+        try:
+            snapshot = cls(shm, owner=False)
+        except BaseException:
+            shm.close()
+            raise
+        if tracked:
+            _untrack(shm, snapshot._tracker)
+        return snapshot
+
+    def _view(self, spec: Tuple[int, str, Tuple[int, ...]]) -> np.ndarray:
+        offset, dtype, shape = spec
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=self._shm.buf, offset=self._data_start + offset)
+        view.flags.writeable = False
+        return view
+
+    def _materialize(self, entries: Optional[Dict[str, tuple]]) -> Optional[Mapping[str, Any]]:
+        if entries is None:
+            return None
+        section = {}
+        for key, entry in entries.items():
+            kind = entry[0]
+            if kind == 'bars':
+                _, time_field, columns = entry
+                views = {name: self._view(spec) for name, spec in columns.items()}
+                section[key] = BarSeries.wrap(views.pop('time'), views, time_field)
+            elif kind == 'array':
+                section[key] = self._view(entry[1])
+            else:
+                section[key] = entry[1]
+        return MappingProxyType(section)
+
+    @property
+    def name(self) -> str:
+        """Shared memory block name, enough to attach from another process."""
+        return self._shm.name
+
+    @property
+    def nbytes(self) -> int:
+        return self._shm.size
+
+    @property
+    def option_chain(self) -> Optional[Mapping[str, Any]]:
+        return self._sections['option_chain']
+
+    @property
+    def market_data(self) -> Optional[Mapping[str, Any]]:
+        return self._sections['market_data']
+
+    @property
+    def sentiment_data(self) -> Optional[Mapping[str, Any]]:
+        return self._sections['sentiment_data']
+
+    def close(self) -> None:
+        """Release this process's mapping; the owner also unlinks the block."""
+        if self._closed:
+            return
+        self._closed = True
+        self._sections = dict.fromkeys(SECTIONS)
+        try:
+            self._shm.close()
+        except BufferError:
+            # Views still referenced elsewhere; the mapping goes away with them
+            logger.debug(f"Snapshot {self._shm.name} closed with live views")
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self) -> 'MarketSnapshot':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __reduce__(self):
+        # Other processes attach by name instead of receiving the data
+        return (MarketSnapshot.attach, (self.name,))
+
+    def __repr__(self) -> str:
+        return f"MarketSnapshot({self.name}, {self.nbytes} bytes)"
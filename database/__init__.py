@@ -1,5 +1,6 @@
 """Database package for tradebot."""
+from .connection import ConnectionManager
 from .decision_logger import DecisionLogger
 from .trade_history import TradeHistory
 
-__all__ = ['DecisionLogger', 'TradeHistory']
+__all__ = ['ConnectionManager', 'DecisionLogger', 'TradeHistory']
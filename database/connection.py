@@ -0,0 +1,170 @@
+"""SQLite connection management for tradebot."""
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Union
+
+
+class ConnectionManager:
+    """Persistent SQLite connections: one serialized writer and pooled readers.
+
+    The database runs in WAL mode, so readers see the last committed state
+    without blocking the writer and the writer never waits for readers.
+    Connections stay open for the life of the manager, and sqlite3's
+    per-connection statement cache keeps the prepared form of every query.
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",  # Durable at checkpoints; safe with WAL
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-16384",  # 16 MiB page cache per connection
+        "PRAGMA mmap_size=268435456",
+    )
+
+    def __init__(
+        self,
+        db_file: Union[str, Path],
+        max_readers: int = 4,
+        timeout: float = 5.0,
+        statement_cache_size: int = 128
+    ):
+        """Open the writer connection.
+
+        Args:
+            db_file: Path to SQLite database
+            max_readers: Maximum number of pooled reader connections
+            timeout: Seconds to wait on a locked database
+            statement_cache_size: Prepared statements cached per connection
+        """
+        self.db_file = str(db_file)
+        self.max_readers = max_readers
+        self.timeout = timeout
+        self.statement_cache_size = statement_cache_size
+
+        # An in-memory database is private to its connection, so readers share the writer
+        self._shared = self.db_file == ':memory:'
+
+        self._write_lock = threading.RLock()
+        self._writer = self._connect()
+
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._pool_lock = threading.Lock()
+        self._readers: List[sqlite3.Connection] = []
+        self._local = threading.local()
+        self._closed = False
+
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        """Open a tuned connection."""
+        conn = sqlite3.connect(
+            self.db_file,
+            timeout=self.timeout,
+            isolation_level=None,  # Transactions are managed explicitly
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction on the writer connection.
+
+        Commits on success and rolls back on error. Nested use joins the
+        enclosing transaction.
+        """
+        with self._write_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection manager is closed")
+            conn = self._writer
+            if conn.in_transaction:
+                yield conn
+                return
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a reader connection for the current thread."""
+        if self._shared:
+            with self._write_lock:
+                yield self._writer
+            return
+
+        # Re-entrant use within one thread keeps the same connection
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self._acquire_reader()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self._pool.put(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        """Take an idle reader, opening a new one while under the pool limit."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection manager is closed")
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._pool_lock:
+            if len(self._readers) < self.max_readers:
+                conn = self._connect(readonly=True)
+                self._readers.append(conn)
+                return conn
+
+        return self._pool.get(timeout=self.timeout)
+
+    def checkpoint(self, mode: str = "PASSIVE") -> bool:
+        """Copy the WAL into the database file, fsyncing both.
+
+        Args:
+            mode: PASSIVE copies what it can without waiting; FULL and
+                TRUNCATE wait for readers so every committed frame is copied
+
+        Returns:
+            True if the whole WAL was checkpointed
+        """
+        with self._write_lock:
+            busy, log_frames, checkpointed = self._writer.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            return not busy and checkpointed == log_frames
+
+    def close(self) -> None:
+        """Close every connection."""
+        with self._write_lock:
+            if self._closed:
+                return
+            self._closed = True
+            try:
+                self._writer.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
+            self._writer.close()
+
+        with self._pool_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
@@ -0,0 +1,197 @@
+"""Sparse sidecar index for decision journal segments."""
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+
+class SegmentIndex:
+    """Sparse timestamp/symbol index over one journal segment.
+
+    Entries are grouped into blocks of ``block_size`` lines. Each block
+    records its byte offset, timestamp range and the symbols it holds, so a
+    query can skip straight to the blocks that may match.
+    """
+
+    VERSION = 1
+    SUFFIX = '.idx'
+
+    def __init__(self, block_size: int = 64):
+        """Initialize an empty index.
+
+        Args:
+            block_size: Number of entries per indexed block
+        """
+        self.block_size = block_size
+        self.size = 0  # Bytes of the segment covered by the index
+        self.count = 0
+        self.min_ts: Optional[str] = None
+        self.max_ts: Optional[str] = None
+        self.ordered = True  # Timestamps never decrease in append order
+        self.symbols: Dict[str, int] = {}
+        self.blocks: List[Dict[str, Any]] = []
+
+    @classmethod
+    def sidecar_path(cls, segment: Path) -> Path:
+        """Path of the sidecar index for ``segment``."""
+        return segment.with_suffix(cls.SUFFIX)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def add(self, offset: int, length: int, timestamp: str, symbol: str) -> None:
+        """Record one entry written at ``offset`` with ``length`` bytes."""
+        if not self.blocks or self.blocks[-1]['count'] >= self.block_size:
+            self.blocks.append({
+                'offset': offset,
+                'count': 0,
+                'min_ts': timestamp,
+                'max_ts': timestamp,
+                'symbols': [],
+            })
+
+        block = self.blocks[-1]
+        block['count'] += 1
+        block['min_ts'] = min(block['min_ts'], timestamp)
+        block['max_ts'] = max(block['max_ts'], timestamp)
+        if symbol not in block['symbols']:
+            block['symbols'].append(symbol)
+
+        if self.max_ts is not None and timestamp < self.max_ts:
+            self.ordered = False
+        self.min_ts = timestamp if self.min_ts is None else min(self.min_ts, timestamp)
+        self.max_ts = timestamp if self.max_ts is None else max(self.max_ts, timestamp)
+        self.symbols[symbol] = self.symbols.get(symbol, 0) + 1
+        self.count += 1
+        self.size = offset + length
+
+    def catch_up(self, segment: Path) -> bool:
+        """Index any complete lines appended to ``segment`` since the last update.
+
+        Returns:
+            True if the index changed
+        """
+        changed = False
+        try:
+            with open(segment, 'rb') as f:
+                f.seek(self.size)
+                offset = self.size
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # Still being written
+                    if line.strip():
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            entry = None
+                        if isinstance(entry, dict):
+                            self.add(offset, len(line), str(entry.get('timestamp') or ''), str(entry.get('symbol') or ''))
+                    offset += len(line)
+                    self.size = offset
+                    changed = True
+        except FileNotFoundError:
+            pass
+        return changed
+
+    @classmethod
+    def build(cls, segment: Path, block_size: int = 64) -> 'SegmentIndex':
+        """Index a segment from scratch."""
+        index = cls(block_size)
+        index.catch_up(segment)
+        return index
+
+    def copy(self) -> 'SegmentIndex':
+        """Snapshot the index so it can be read while the original grows."""
+        other = SegmentIndex(self.block_size)
+        other.size = self.size
+        other.count = self.count
+        other.min_ts = self.min_ts
+        other.max_ts = self.max_ts
+        other.ordered = self.ordered
+        other.symbols = dict(self.symbols)
+        other.blocks = [dict(b, symbols=list(b['symbols'])) for b in self.blocks]
+        return other
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, segment: Path) -> None:
+        """Atomically write the sidecar file for ``segment``."""
+        path = self.sidecar_path(segment)
+        tmp = path.with_suffix('.idx.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({
+                'version': self.VERSION,
+                'block_size': self.block_size,
+                'size': self.size,
+                'count': self.count,
+                'min_ts': self.min_ts,
+                'max_ts': self.max_ts,
+                'ordered': self.ordered,
+                'symbols': self.symbols,
+                'blocks': self.blocks,
+            }, f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, segment: Path) -> Optional['SegmentIndex']:
+        """Load the sidecar for ``segment``; None if missing or unreadable."""
+        try:
+            with open(cls.sidecar_path(segment), 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get('version') != cls.VERSION:
+            return None
+
+        index = cls(data['block_size'])
+        index.size = data['size']
+        index.count = data['count']
+        index.min_ts = data['min_ts']
+        index.max_ts = data['max_ts']
+        index.ordered = data['ordered']
+        index.symbols = data['symbols']
+        index.blocks = data['blocks']
+        return index
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def may_match(
+        self,
+        symbol: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> bool:
+        """Check whether the segment can hold any matching entry."""
+        if not self.count:
+            return False
+        if symbol and symbol not in self.symbols:
+            return False
+        if start_date and self.max_ts < start_date:
+            return False
+        if end_date and self.min_ts > end_date:
+            return False
+        return True
+
+    def block_ranges(
+        self,
+        symbol: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Iterator[Tuple[int, int]]:
+        """Yield (start, end) byte ranges of matching blocks, newest block first."""
+        for i in range(len(self.blocks) - 1, -1, -1):
+            block = self.blocks[i]
+            if symbol and symbol not in block['symbols']:
+                continue
+            if start_date and block['max_ts'] < start_date:
+                continue
+            if end_date and block['min_ts'] > end_date:
+                continue
+            end = self.blocks[i + 1]['offset'] if i + 1 < len(self.blocks) else self.size
+            yield block['offset'], end
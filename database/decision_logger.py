@@ -1,28 +1,149 @@
-"""JSON-based decision logging."""
+"""Append-only JSONL decision journal.
+
+Decisions are appended one per line to segment files inside a journal
+directory. Segments rotate per day and once they reach a size limit, so
+logging a decision costs the same no matter how much history exists.
+Each segment keeps a sparse sidecar index (see ``decision_index``) that lets
+queries read only the tail blocks they need.
+"""
+import argparse
+import heapq
 import json
+import logging
 import os
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Iterator, Iterable
 from pathlib import Path
 
+from .decision_index import SegmentIndex
+
+logger = logging.getLogger('tradebot')
+
 
 class DecisionLogger:
-    """Log trading decisions to JSON file."""
-    
-    def __init__(self, log_file: str = "decisions.json"):
+    """Log trading decisions to an append-only JSONL journal."""
+
+    SEGMENT_SUFFIX = '.jsonl'
+
+    def __init__(
+        self,
+        log_dir: str = "decisions",
+        max_segment_bytes: int = 16 * 1024 * 1024,
+        fsync_every: int = 32,
+        fsync_interval: float = 1.0,
+        index_block_size: int = 64,
+        legacy_file: Optional[str] = None,
+        auto_import: bool = True
+    ):
         """Initialize decision logger.
-        
+
         Args:
-            log_file: Path to log file
+            log_dir: Directory holding the journal segments
+            max_segment_bytes: Rotate to a new segment beyond this size
+            fsync_every: fsync after this many unsynced decisions
+            fsync_interval: fsync when the oldest unsynced write is this old (seconds)
+            index_block_size: Entries per sparse index block
+            legacy_file: ``decisions.json`` written by older versions
+                (default: beside ``log_dir``)
+            auto_import: Import ``legacy_file`` on start if the journal is empty
         """
-        self.log_file = Path(log_file)
-        self._ensure_file_exists()
-    
-    def _ensure_file_exists(self) -> None:
-        """Ensure log file exists."""
-        if not self.log_file.exists():
-            self.log_file.write_text('[]')
-    
+        self.log_dir = Path(log_dir)
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.index_block_size = index_block_size
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment: Optional[Path] = None
+        self._segment_day: Optional[str] = None
+        self._index: Optional[SegmentIndex] = None
+        self._index_cache: Dict[Path, SegmentIndex] = {}
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+
+        self.legacy_file = Path(legacy_file) if legacy_file else self.log_dir.parent / 'decisions.json'
+        if auto_import and self.legacy_file.exists() and not self.segments():
+            self._import_legacy_on_start()
+
+    # ------------------------------------------------------------------
+    # Segment management
+    # ------------------------------------------------------------------
+
+    def segments(self) -> List[Path]:
+        """List journal segments, oldest first."""
+        return sorted(self.log_dir.glob(f'*{self.SEGMENT_SUFFIX}'))
+
+    @staticmethod
+    def _segment_key(path: Path) -> tuple:
+        """Split a segment name (YYYYMMDD-NNNN) into (day, sequence)."""
+        day, _, seq = path.stem.partition('-')
+        return day, int(seq) if seq.isdigit() else 0
+
+    def _open_segment(self, day: str) -> None:
+        """Open the newest segment for ``day`` for appending, creating one if needed."""
+        existing = [p for p in self.segments() if self._segment_key(p)[0] == day]
+        if existing and existing[-1].stat().st_size < self.max_segment_bytes:
+            path = existing[-1]
+        else:
+            seq = self._segment_key(existing[-1])[1] + 1 if existing else 0
+            path = self.log_dir / f"{day}-{seq:04d}{self.SEGMENT_SUFFIX}"
+
+        self._file = open(path, 'ab')
+        if self._file.tell() and not self._ends_with_newline(path):
+            # Terminate a line torn by a crash so the next entry stays parseable
+            self._file.write(b'\n')
+        self._segment = path
+        self._segment_day = day
+        self._index = self._load_index(path)
+
+    @staticmethod
+    def _ends_with_newline(path: Path) -> bool:
+        """Check whether a non-empty segment ends with a complete line."""
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _close_segment(self) -> None:
+        """Sync and close the active segment."""
+        if self._file is None:
+            return
+        self._sync()
+        self._index.save(self._segment)
+        self._index_cache[self._segment] = self._index
+        self._file.close()
+        self._file = None
+        self._segment = None
+        self._segment_day = None
+        self._index = None
+
+    def _rotate_if_needed(self, incoming_bytes: int) -> None:
+        """Rotate the active segment on day change or when it would overflow."""
+        day = datetime.now().strftime('%Y%m%d')
+        if self._file is not None:
+            size = self._file.tell()
+            if day == self._segment_day and (size == 0 or size + incoming_bytes <= self.max_segment_bytes):
+                return
+            self._close_segment()
+        self._open_segment(day)
+
+    def _sync(self) -> None:
+        """fsync the active segment and persist its index."""
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._index.save(self._segment)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
     def log_decision(
         self,
         symbol: str,
@@ -30,7 +151,7 @@ class DecisionLogger:
         timestamp: Optional[str] = None
     ) -> None:
         """Log a trading decision.
-        
+
         Args:
             symbol: Trading symbol
             decision: Decision dictionary
@@ -42,21 +163,127 @@ class DecisionLogger:
             "symbol": symbol,
             **decision
         }
-        
+
         try:
-            with open(self.log_file, 'r+') as f:
-                try:
-                    data = json.load(f)
-                except json.JSONDecodeError:
-                    data = []
-                
-                data.append(entry)
-                f.seek(0)
-                f.truncate()
-                json.dump(data, f, indent=2)
+            self._append(entry)
         except Exception as e:
             print(f"Failed to log decision: {e}")
-    
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        """Append one entry to the journal and its index."""
+        data = (json.dumps(entry, default=str) + '\n').encode('utf-8')
+        with self._lock:
+            self._rotate_if_needed(len(data))
+            offset = self._file.tell()
+            self._file.write(data)
+            # Flush to the OS so readers see the entry; fsync is batched
+            self._file.flush()
+            self._index.add(offset, len(data), str(entry.get('timestamp') or ''), str(entry.get('symbol') or ''))
+            self._unsynced += 1
+            if (self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+
+    def flush(self) -> None:
+        """Force pending decisions to disk."""
+        with self._lock:
+            self._sync()
+
+    def close(self) -> None:
+        """Flush and close the active segment."""
+        with self._lock:
+            self._close_segment()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _iter_segment(path: Path) -> Iterator[Dict[str, Any]]:
+        """Stream entries from one segment, skipping torn or corrupt lines."""
+        try:
+            with open(path, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def _load_index(self, path: Path) -> SegmentIndex:
+        """Load the sidecar index for ``path``, indexing any unindexed tail."""
+        index = self._index_cache.get(path) or SegmentIndex.load(path)
+        if index is None or index.size > path.stat().st_size:
+            # Missing, or describes a segment that has since been rewritten
+            index = SegmentIndex(self.index_block_size)
+        if index.catch_up(path):
+            index.save(path)
+        self._index_cache[path] = index
+        return index
+
+    def _segment_index(self, path: Path) -> SegmentIndex:
+        """Get a consistent index snapshot for a segment."""
+        with self._lock:
+            if path == self._segment:
+                return self._index.copy()
+        index = self._index_cache.get(path)
+        if index is not None and index.size >= path.stat().st_size:
+            return index
+        return self._load_index(path)
+
+    def _scan_segment(
+        self,
+        path: Path,
+        index: SegmentIndex,
+        symbol: Optional[str],
+        start_date: Optional[str],
+        end_date: Optional[str]
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield matching entries of one segment, newest first.
+
+        Only blocks whose index entry may match are read.
+        """
+        def matches(d: Dict[str, Any]) -> bool:
+            if symbol and d.get('symbol') != symbol:
+                return False
+            ts = d.get('timestamp', '')
+            if start_date and ts < start_date:
+                return False
+            if end_date and ts > end_date:
+                return False
+            return True
+
+        def block_entries(f, start: int, end: int) -> List[Dict[str, Any]]:
+            f.seek(start)
+            entries = []
+            for line in f.read(end - start).splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and matches(entry):
+                    entries.append(entry)
+            return entries
+
+        with open(path, 'rb') as f:
+            ranges = index.block_ranges(symbol, start_date, end_date)
+            if index.ordered:
+                for start, end in ranges:
+                    yield from reversed(block_entries(f, start, end))
+            else:
+                # Out-of-order timestamps: sort just this segment's matches
+                entries = [e for start, end in ranges for e in block_entries(f, start, end)]
+                entries.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+                yield from entries
+
+    def iter_decisions(self) -> Iterator[Dict[str, Any]]:
+        """Stream every logged decision in append order."""
+        for path in self.segments():
+            yield from self._iter_segment(path)
+
     def get_decisions(
         self,
         symbol: Optional[str] = None,
@@ -65,39 +292,176 @@ class DecisionLogger:
         limit: int = 100
     ) -> List[Dict[str, Any]]:
         """Get decisions with optional filtering.
-        
+
         Args:
             symbol: Filter by symbol
             start_date: Filter from date (ISO format)
             end_date: Filter to date (ISO format)
             limit: Maximum number of results
-            
+
         Returns:
             List of decision entries
         """
-        if not self.log_file.exists():
+        if limit <= 0:
             return []
-        
-        try:
-            with open(self.log_file, 'r') as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, IOError):
-            return []
-        
-        # Apply filters
-        if symbol:
-            data = [d for d in data if d.get('symbol') == symbol]
-        
-        if start_date:
-            data = [d for d in data if d.get('timestamp', '') >= start_date]
-        
-        if end_date:
-            data = [d for d in data if d.get('timestamp', '') <= end_date]
-        
+
+        # Visit candidate segments newest first; each yields newest first
+        candidates = []
+        for path in self.segments():
+            index = self._segment_index(path)
+            if index.may_match(symbol, start_date, end_date):
+                candidates.append((path, index))
+        candidates.sort(key=lambda c: c[1].max_ts, reverse=True)
+
+        # Min-heap of the best ``limit`` entries seen so far
+        heap: List[tuple] = []
+        seq = 0
+        for path, index in candidates:
+            if len(heap) >= limit and index.max_ts < heap[0][0]:
+                break  # Every remaining segment is older than the results
+            for entry in self._scan_segment(path, index, symbol, start_date, end_date):
+                ts = entry.get('timestamp', '')
+                seq += 1
+                if len(heap) < limit:
+                    heapq.heappush(heap, (ts, -seq, entry))
+                elif ts > heap[0][0]:
+                    heapq.heapreplace(heap, (ts, -seq, entry))
+                else:
+                    break  # The rest of this segment is older still
+
         # Return most recent first, limited
-        return sorted(data, key=lambda x: x.get('timestamp', ''), reverse=True)[:limit]
-    
+        return [entry for _, _, entry in sorted(heap, reverse=True)]
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
     def clear(self) -> None:
         """Clear all logged decisions."""
-        with open(self.log_file, 'w') as f:
-            f.write('[]')
+        with self._lock:
+            self._close_segment()
+            for path in self.segments():
+                path.unlink()
+                SegmentIndex.sidecar_path(path).unlink(missing_ok=True)
+            self._index_cache.clear()
+
+    def import_legacy(self, json_file: str) -> int:
+        """Append entries from a legacy ``decisions.json`` array file.
+
+        Args:
+            json_file: Path to the JSON array written by older versions
+
+        Returns:
+            Number of entries imported
+        """
+        with open(json_file, 'r') as f:
+            data = json.load(f)
+
+        for entry in data:
+            self._append(entry)
+        self.flush()
+        return len(data)
+
+    def _import_legacy_on_start(self) -> None:
+        """Carry a pre-journal ``decisions.json`` over into an empty journal."""
+        try:
+            count = self.import_legacy(self.legacy_file)
+        except (OSError, ValueError) as e:
+            logger.warning(
+                f"Could not import legacy decisions from {self.legacy_file} ({e}); run "
+                f"`python -m database.decision_logger import-legacy --legacy-file {self.legacy_file}`"
+            )
+            return
+        logger.info(f"Imported {count} legacy decisions from {self.legacy_file} into {self.log_dir}")
+
+    def compact(self, retain_days: Optional[int] = None) -> Dict[str, int]:
+        """Merge each closed day's segments into one timestamp-ordered segment.
+
+        Today's segments are left alone since they may still be appended to.
+        Corrupt lines are dropped along the way.
+
+        Args:
+            retain_days: Delete days older than this many days (default: keep all)
+
+        Returns:
+            Counts of days compacted, days dropped and entries written
+        """
+        today = datetime.now().strftime('%Y%m%d')
+        cutoff = None
+        if retain_days is not None:
+            cutoff = (datetime.now() - timedelta(days=retain_days)).strftime('%Y%m%d')
+
+        with self._lock:
+            if self._segment_day is not None and self._segment_day < today:
+                self._close_segment()
+
+        by_day: Dict[str, List[Path]] = {}
+        for path in self.segments():
+            by_day.setdefault(self._segment_key(path)[0], []).append(path)
+
+        stats = {'days_compacted': 0, 'days_dropped': 0, 'entries': 0}
+        for day, paths in by_day.items():
+            if day >= today:
+                continue
+
+            if cutoff is not None and day < cutoff:
+                for path in paths:
+                    self._remove_segment(path)
+                stats['days_dropped'] += 1
+                continue
+
+            entries = sorted(
+                (e for path in paths for e in self._iter_segment(path)),
+                key=lambda x: x.get('timestamp', '')
+            )
+            target = self.log_dir / f"{day}-0000{self.SEGMENT_SUFFIX}"
+            self._write_segment(target, entries)
+            # The merged segment is in place, so the rest are now duplicates
+            for path in paths:
+                if path != target:
+                    self._remove_segment(path)
+
+            stats['days_compacted'] += 1
+            stats['entries'] += len(entries)
+
+        return stats
+
+    def _write_segment(self, target: Path, entries: Iterable[Dict[str, Any]]) -> None:
+        """Atomically replace ``target`` with the given entries."""
+        tmp = target.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, target)
+
+        index = SegmentIndex.build(target, self.index_block_size)
+        index.save(target)
+        self._index_cache[target] = index
+
+    def _remove_segment(self, path: Path) -> None:
+        """Delete a segment and its sidecar index."""
+        path.unlink()
+        SegmentIndex.sidecar_path(path).unlink(missing_ok=True)
+        self._index_cache.pop(path, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decision journal maintenance")
+    parser.add_argument('command', choices=['compact', 'import-legacy'])
+    parser.add_argument('--log-dir', default='decisions')
+    parser.add_argument('--retain-days', type=int)
+    parser.add_argument('--legacy-file', default='decisions.json')
+    args = parser.parse_args()
+
+    journal = DecisionLogger(args.log_dir, auto_import=False)
+    if args.command == 'compact':
+        print(journal.compact(retain_days=args.retain_days))
+    else:
+        print(f"Imported {journal.import_legacy(args.legacy_file)} decisions")
+    journal.close()
+
+
+if __name__ == "__main__":
+    main()
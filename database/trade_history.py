@@ -1,25 +1,141 @@
 """SQLite database for trade history."""
-import sqlite3
+import logging
+import threading
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
 from pathlib import Path
 
+from .connection import ConnectionManager
+from .write_queue import WriteBehindQueue
+
+logger = logging.getLogger('tradebot')
+
+
+# One pass over trades for every statistic get_stats reports
+STATS_AGGREGATE_SQL = '''
+    SELECT COUNT(*),
+           COALESCE(SUM(pnl > 0), 0),
+           COALESCE(SUM(pnl < 0), 0),
+           COALESCE(SUM(pnl), 0)
+    FROM trades
+'''
+
+STATS_REBUILD_SQL = (
+    "INSERT OR REPLACE INTO trade_stats (id, total_trades, wins, losses, total_pnl) "
+    f"SELECT 1, * FROM ({STATS_AGGREGATE_SQL})"
+)
+
+# Write-behind inserts carry an ID reserved from sqlite_sequence
+QUEUED_INSERT_SQL = '''
+    INSERT INTO trades
+    (id, timestamp, symbol, signal, entry_price, exit_price, quantity, pnl, confidence, strategy, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+CLOSE_TRADE_SQL = '''
+    UPDATE trades SET exit_price = ?, pnl = ?, status = 'CLOSED'
+    WHERE id = ?
+'''
+
+# Schema migrations, applied in order. PRAGMA user_version holds the number applied.
+MIGRATIONS: Tuple[Tuple[str, ...], ...] = (
+    # 1: indexes for get_trades filters; (pnl) covers the stats aggregate
+    (
+        "CREATE INDEX IF NOT EXISTS idx_trades_symbol_ts ON trades(symbol, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_trades_status_ts ON trades(status, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_trades_pnl ON trades(pnl)",
+    ),
+    # 2: single-row statistics summary kept current by triggers
+    (
+        '''
+        CREATE TABLE IF NOT EXISTS trade_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_trades INTEGER NOT NULL,
+            wins INTEGER NOT NULL,
+            losses INTEGER NOT NULL,
+            total_pnl REAL NOT NULL
+        )
+        ''',
+        STATS_REBUILD_SQL,
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_trades_stats_insert AFTER INSERT ON trades
+        BEGIN
+            UPDATE trade_stats SET
+                total_trades = total_trades + 1,
+                wins = wins + (COALESCE(NEW.pnl, 0) > 0),
+                losses = losses + (COALESCE(NEW.pnl, 0) < 0),
+                total_pnl = total_pnl + COALESCE(NEW.pnl, 0)
+            WHERE id = 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_trades_stats_update AFTER UPDATE OF pnl ON trades
+        BEGIN
+            UPDATE trade_stats SET
+                wins = wins - (COALESCE(OLD.pnl, 0) > 0) + (COALESCE(NEW.pnl, 0) > 0),
+                losses = losses - (COALESCE(OLD.pnl, 0) < 0) + (COALESCE(NEW.pnl, 0) < 0),
+                total_pnl = total_pnl - COALESCE(OLD.pnl, 0) + COALESCE(NEW.pnl, 0)
+            WHERE id = 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_trades_stats_delete AFTER DELETE ON trades
+        BEGIN
+            UPDATE trade_stats SET
+                total_trades = total_trades - 1,
+                wins = wins - (COALESCE(OLD.pnl, 0) > 0),
+                losses = losses - (COALESCE(OLD.pnl, 0) < 0),
+                total_pnl = total_pnl - COALESCE(OLD.pnl, 0)
+            WHERE id = 1;
+        END
+        ''',
+    ),
+)
+
 
 class TradeHistory:
     """SQLite trade history database."""
     
-    def __init__(self, db_file: str = "trades.db"):
+    ID_LOOKUP_CHUNK = 64
+    ID_BLOCK = 64  # Trade IDs reserved per transaction in write-behind mode
+    
+    def __init__(
+        self,
+        db_file: str = "trades.db",
+        max_readers: int = 4,
+        write_behind: bool = False,
+        max_backlog: int = 10000
+    ):
         """Initialize database.
         
         Args:
             db_file: Path to SQLite database
+            max_readers: Size of the reader connection pool
+            write_behind: Queue writes to a background thread instead of
+                committing them on the caller's thread
+            max_backlog: Queued writes before callers block (write-behind only)
         """
         self.db_file = Path(db_file)
+        self.db = ConnectionManager(db_file, max_readers=max_readers)
         self._init_db()
+        
+        self._writes: Optional[WriteBehindQueue] = None
+        # Trades whose queued insert / close update was dropped (write-behind only)
+        self.failed_inserts: Set[int] = set()
+        self.failed_closes: Set[int] = set()
+        if write_behind:
+            # Trade IDs are handed out here so log_trade can return before the
+            # insert lands. They come from blocks reserved in sqlite_sequence,
+            # so other processes (AUTOINCREMENT inserts or their own blocks)
+            # never allocate the same IDs.
+            self._id_lock = threading.Lock()
+            self._next_id, self._block_end = 1, 0
+            self._writes = WriteBehindQueue(self.db, max_backlog=max_backlog, on_failure=self._write_failed)
     
     def _init_db(self) -> None:
         """Initialize database tables."""
-        with sqlite3.connect(self.db_file) as conn:
+        with self.db.writer() as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS trades (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -50,44 +166,128 @@ class TradeHistory:
                 )
             ''')
             
-            conn.commit()
+            self._migrate(conn)
+    
+    def _migrate(self, conn) -> None:
+        """Apply schema migrations newer than the database's user_version."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
+    
+    def _reserve_ids(self) -> None:
+        """Reserve the next block of trade IDs by advancing sqlite_sequence."""
+        with self.db.writer() as conn:
+            start = conn.execute('''
+                SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'trades'), 0),
+                           COALESCE((SELECT MAX(id) FROM trades), 0))
+            ''').fetchone()[0]
+            end = start + self.ID_BLOCK
+            if conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'trades'", (end,)).rowcount == 0:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('trades', ?)", (end,))
+        self._next_id, self._block_end = start + 1, end
+    
+    def _release_ids(self) -> None:
+        """Hand back the unused part of the current block if nobody reserved past it."""
+        if self._next_id > self._block_end:
+            return
+        with self.db.writer() as conn:
+            conn.execute(
+                "UPDATE sqlite_sequence SET seq = ? WHERE name = 'trades' AND seq = ?",
+                (self._next_id - 1, self._block_end)
+            )
+        self._next_id = self._block_end + 1
+    
+    def _write_failed(self, seq: int, sql: str, rows: List[tuple], error: Exception) -> None:
+        """Record the trades a dropped write-behind statement was for."""
+        if sql is QUEUED_INSERT_SQL:
+            trade_ids = [row[0] for row in rows]
+            self.failed_inserts.update(trade_ids)
+        else:
+            trade_ids = [row[-1] for row in rows]
+            self.failed_closes.update(trade_ids)
+        logger.error(f"Trade write failed for IDs {trade_ids}: {error}")
+    
+    def _sync_writes(self) -> None:
+        """Make queued writes visible before a read."""
+        if self._writes is not None:
+            self._writes.drain()
+    
+    def flush(self, timeout: Optional[float] = None, durable: bool = False) -> bool:
+        """Wait until every queued write is committed.
+        
+        Args:
+            timeout: Seconds to wait (default: forever)
+            durable: Also run a FULL WAL checkpoint, fsyncing the writes so
+                they survive power loss
+            
+        Returns:
+            True if all writes were committed in time (and checkpointed, if
+            durable); False if a queued write was dropped since the last
+            flush (see ``failed_inserts`` and ``failed_closes``)
+        """
+        done = self._writes.flush(timeout) if self._writes is not None else True
+        if done and durable:
+            done = self.db.checkpoint("FULL")
+        return done
     
     def log_trade(self, trade_data: Dict[str, Any]) -> int:
         """Log a trade.
         
+        In write-behind mode the insert is queued and a reserved ID is
+        returned immediately; if the insert is later dropped, the ID lands in
+        ``failed_inserts`` and ``flush`` returns False.
+        
         Args:
             trade_data: Trade data dictionary
             
         Returns:
             Trade ID
         """
-        with sqlite3.connect(self.db_file) as conn:
+        params = self._trade_params(trade_data)
+        
+        if self._writes is not None:
+            with self._id_lock:
+                if self._next_id > self._block_end:
+                    self._reserve_ids()
+                trade_id = self._next_id
+                self._writes.submit(QUEUED_INSERT_SQL, (trade_id, *params))
+                self._next_id += 1
+            return trade_id
+        
+        with self.db.writer() as conn:
             cursor = conn.execute('''
                 INSERT INTO trades
                 (timestamp, symbol, signal, entry_price, exit_price, quantity, pnl, confidence, strategy, status)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                trade_data.get('timestamp', datetime.now().isoformat()),
-                trade_data['symbol'],
-                trade_data['signal'],
-                trade_data['entry_price'],
-                trade_data.get('exit_price'),
-                trade_data['quantity'],
-                trade_data.get('pnl'),
-                trade_data['confidence'],
-                trade_data.get('strategy', 'UNKNOWN'),
-                trade_data.get('status', 'OPEN')
-            ))
-            conn.commit()
+            ''', params)
             return cursor.lastrowid
     
+    @staticmethod
+    def _trade_params(trade_data: Dict[str, Any]) -> Tuple:
+        """Column values for inserting a trade."""
+        return (
+            trade_data.get('timestamp', datetime.now().isoformat()),
+            trade_data['symbol'],
+            trade_data['signal'],
+            trade_data['entry_price'],
+            trade_data.get('exit_price'),
+            trade_data['quantity'],
+            trade_data.get('pnl'),
+            trade_data['confidence'],
+            trade_data.get('strategy', 'UNKNOWN'),
+            trade_data.get('status', 'OPEN')
+        )
+    
     def get_trades(
         self,
         symbol: Optional[str] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         status: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        strategy: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Get trades with filtering."""
         query = "SELECT * FROM trades WHERE 1=1"
@@ -109,36 +309,103 @@ class TradeHistory:
             query += " AND status = ?"
             params.append(status)
         
+        if strategy:
+            query += " AND strategy = ?"
+            params.append(strategy)
+        
         query += " ORDER BY timestamp DESC LIMIT ?"
         params.append(limit)
         
-        with sqlite3.connect(self.db_file) as conn:
-            conn.row_factory = sqlite3.Row
+        self._sync_writes()
+        with self.db.reader() as conn:
             cursor = conn.execute(query, params)
             return [dict(row) for row in cursor.fetchall()]
     
+    def get_trade(self, trade_id: int) -> Optional[Dict[str, Any]]:
+        """Get one trade by primary key."""
+        self._sync_writes()
+        with self.db.reader() as conn:
+            row = conn.execute("SELECT * FROM trades WHERE id = ?", (trade_id,)).fetchone()
+            return dict(row) if row else None
+    
+    def get_trades_by_ids(self, trade_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Get many trades by primary key.
+        
+        Returns:
+            Trades keyed by ID; unknown IDs are left out
+        """
+        ids = list(dict.fromkeys(trade_ids))
+        if not ids:
+            return {}
+        
+        # Chunks are padded to a fixed width so one prepared statement serves every call
+        chunk = self.ID_LOOKUP_CHUNK
+        query = f"SELECT * FROM trades WHERE id IN ({', '.join('?' * chunk)})"
+        trades = {}
+        
+        self._sync_writes()
+        with self.db.reader() as conn:
+            for start in range(0, len(ids), chunk):
+                params = ids[start:start + chunk]
+                params += [params[-1]] * (chunk - len(params))
+                for row in conn.execute(query, params):
+                    trades[row['id']] = dict(row)
+        return trades
+    
     def close_trade(self, trade_id: int, exit_price: float, pnl: float) -> bool:
-        """Close a trade."""
-        with sqlite3.connect(self.db_file) as conn:
-            cursor = conn.execute('''
-                UPDATE trades SET exit_price = ?, pnl = ?, status = 'CLOSED'
-                WHERE id = ?
-            ''', (exit_price, pnl, trade_id))
-            conn.commit()
+        """Close a trade.
+        
+        In write-behind mode the update is queued and True only means it
+        was accepted, not that the trade exists (check ``get_trade`` for
+        that). False is returned if the trade's insert was dropped; a
+        dropped update shows up in ``failed_closes`` and can be retried.
+        """
+        if self._writes is not None:
+            if trade_id in self.failed_inserts:
+                return False
+            self.failed_closes.discard(trade_id)
+            self._writes.submit(CLOSE_TRADE_SQL, (exit_price, pnl, trade_id))
+            return True
+        
+        with self.db.writer() as conn:
+            cursor = conn.execute(CLOSE_TRADE_SQL, (exit_price, pnl, trade_id))
             return cursor.rowcount > 0
     
-    def get_stats(self) -> Dict[str, Any]:
-        """Get trade statistics."""
-        with sqlite3.connect(self.db_file) as conn:
-            # Total trades
-            total = conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
-            
-            # Win rate
-            wins = conn.execute("SELECT COUNT(*) FROM trades WHERE pnl > 0").fetchone()[0]
-            losses = conn.execute("SELECT COUNT(*) FROM trades WHERE pnl < 0").fetchone()[0]
+    def close_trades(self, closes: Iterable[Tuple[int, float, float]]) -> int:
+        """Close many trades in a single transaction.
+        
+        In write-behind mode the batch is queued as one unit and the number
+        of trades submitted is returned, skipping trades whose insert was
+        dropped.
+        
+        Args:
+            closes: (trade_id, exit_price, pnl) tuples
             
-            # Total P&L
-            total_pnl = conn.execute("SELECT COALESCE(SUM(pnl), 0) FROM trades").fetchone()[0]
+        Returns:
+            Number of trades closed
+        """
+        rows = [(exit_price, pnl, trade_id) for trade_id, exit_price, pnl in closes]
+        if not rows:
+            return 0
+        
+        if self._writes is not None:
+            rows = [row for row in rows if row[-1] not in self.failed_inserts]
+            if rows:
+                self.failed_closes.difference_update(row[-1] for row in rows)
+                self._writes.submit_many(CLOSE_TRADE_SQL, rows)
+            return len(rows)
+        
+        with self.db.writer() as conn:
+            cursor = conn.executemany(CLOSE_TRADE_SQL, rows)
+            return cursor.rowcount
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get trade statistics from the trigger-maintained summary row."""
+        self._sync_writes()
+        with self.db.reader() as conn:
+            total, wins, losses, total_pnl = conn.execute(
+                "SELECT total_trades, wins, losses, total_pnl FROM trade_stats WHERE id = 1"
+            ).fetchone()
             
             return {
                 'total_trades': total,
@@ -147,3 +414,17 @@ class TradeHistory:
                 'win_rate': wins / total if total > 0 else 0,
                 'total_pnl': total_pnl
             }
+    
+    def rebuild_stats(self) -> None:
+        """Recompute the statistics summary from the trades table."""
+        self._sync_writes()
+        with self.db.writer() as conn:
+            conn.execute(STATS_REBUILD_SQL)
+    
+    def close(self) -> None:
+        """Flush queued writes and close database connections."""
+        if self._writes is not None:
+            self._writes.close()
+            with self._id_lock:
+                self._release_ids()
+        self.db.close()
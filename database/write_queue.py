@@ -0,0 +1,246 @@
+"""Write-behind queue for batched SQLite writes."""
+import atexit
+import itertools
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .connection import ConnectionManager
+
+logger = logging.getLogger('tradebot')
+
+_STOP = object()
+
+# Errors a retry can't fix (constraint violations, bad SQL)
+NON_RETRYABLE = (sqlite3.IntegrityError, sqlite3.ProgrammingError)
+
+# on_failure(seq, sql, rows, error) for a write that was dropped
+FailureCallback = Callable[[int, str, List[tuple], Exception], None]
+
+# prepare(sql, rows) -> statement parameters, run on the writer thread
+PrepareCallback = Callable[[str, List[tuple]], List[tuple]]
+
+
+class WriteBehindQueue:
+    """Apply SQL writes on a background thread in grouped transactions.
+
+    Callers enqueue statements and return immediately. The writer thread
+    drains whatever is queued, runs consecutive statements with the same
+    SQL as a single ``executemany`` and commits the whole batch at once.
+
+    A write that still fails after retries is dropped: its sequence number
+    goes into ``failed_writes`` and ``on_failure`` is called. The next
+    ``wait_for`` or ``flush`` barrier covering it returns False; later
+    barriers only report drops since then (or waiting on the dropped
+    write itself).
+    """
+
+    def __init__(
+        self,
+        db: ConnectionManager,
+        max_backlog: int = 10000,
+        max_batch: int = 1000,
+        on_failure: Optional[FailureCallback] = None,
+        prepare: Optional[PrepareCallback] = None
+    ):
+        """Start the writer thread.
+
+        Args:
+            db: Connection manager providing the writer connection
+            max_backlog: Queued statements before ``submit`` blocks
+            max_batch: Maximum statements per transaction
+            on_failure: Called on the writer thread with (seq, sql, rows, error)
+                for each dropped write
+            prepare: Called on the writer thread with (sql, rows) to turn
+                submitted rows into statement parameters, e.g. to keep
+                serialization off the callers' threads
+        """
+        self.db = db
+        self.max_batch = max_batch
+        self.on_failure = on_failure
+        self.prepare = prepare
+        self.failed_writes: Set[int] = set()
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_backlog)
+        self._submit_lock = threading.Lock()
+        self._done = threading.Condition()
+        self._submitted = 0
+        self._applied = 0
+        self._reported = 0
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, sql: str, params: Sequence[Any], timeout: Optional[float] = None) -> int:
+        """Queue one statement.
+
+        Blocks while the backlog is full.
+
+        Args:
+            sql: SQL statement
+            params: Statement parameters
+            timeout: Seconds to wait for backlog space (default: forever)
+
+        Returns:
+            Sequence number of the write, usable with ``wait_for``
+
+        Raises:
+            queue.Full: If the backlog stays full past ``timeout``
+            RuntimeError: If the queue is closed
+        """
+        return self.submit_many(sql, [params], timeout)
+
+    def submit_many(
+        self,
+        sql: str,
+        rows: Iterable[Sequence[Any]],
+        timeout: Optional[float] = None
+    ) -> int:
+        """Queue one statement for many parameter rows, committed together.
+
+        Args:
+            sql: SQL statement
+            rows: Parameter rows
+            timeout: Seconds to wait for backlog space (default: forever)
+
+        Returns:
+            Sequence number of the write, usable with ``wait_for``
+        """
+        rows = [tuple(params) for params in rows]
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError("Write queue is closed")
+            seq = self._submitted + 1
+            self._queue.put((seq, sql, rows), timeout=timeout)
+            self._submitted = seq
+            return seq
+
+    def wait_for(self, seq: int, timeout: Optional[float] = None) -> bool:
+        """Wait until the writes numbered up to ``seq`` have been applied.
+
+        Returns:
+            True if they were all committed before the timeout; False on
+            timeout, if write ``seq`` was dropped, or if any write up to
+            ``seq`` was dropped since the last barrier reported it
+        """
+        with self._done:
+            if not self._done.wait_for(lambda: self._applied >= seq, timeout=timeout):
+                return False
+            reported, self._reported = self._reported, max(self._reported, seq)
+            return seq not in self.failed_writes and not any(
+                reported < failed <= seq for failed in self.failed_writes
+            )
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Durability barrier: wait for every write submitted so far.
+
+        Returns:
+            True if the backlog drained before the timeout and no write
+            was dropped since the last barrier
+        """
+        return self.wait_for(self._submitted, timeout)
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait for every write submitted so far to be attempted, for read-your-writes.
+
+        Unlike ``flush`` this neither reports nor consumes dropped writes.
+
+        Returns:
+            True if the backlog drained before the timeout
+        """
+        seq = self._submitted
+        with self._done:
+            return self._done.wait_for(lambda: self._applied >= seq, timeout=timeout)
+
+    @property
+    def failed(self) -> int:
+        """Number of dropped writes."""
+        return len(self.failed_writes)
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted writes not yet committed."""
+        return self._submitted - self._applied
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Drain the backlog and stop the writer thread."""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def _run(self) -> None:
+        """Writer loop: drain, group, commit."""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in batch)
+            ops = [item for item in batch if item is not _STOP]
+            if self.prepare is not None:
+                ops = [(seq, sql, self._prepare(seq, sql, rows)) for seq, sql, rows in ops]
+            if ops:
+                self._apply(ops)
+                with self._done:
+                    self._applied = ops[-1][0]
+                    self._done.notify_all()
+
+            if stop:
+                return
+
+    def _prepare(self, seq: int, sql: str, rows: List[tuple]) -> List[tuple]:
+        """Run ``prepare`` on one write; a failure drops the write."""
+        try:
+            return self.prepare(sql, rows)
+        except Exception as e:
+            self._dropped(seq, sql, rows, e)
+            return []
+
+    def _apply(self, ops: List[Tuple[int, str, List[tuple]]]) -> None:
+        """Commit a batch, falling back to one transaction per write on error."""
+        groups = [
+            (sql, [params for _, _, rows in group for params in rows])
+            for sql, group in itertools.groupby(ops, key=lambda op: op[1])
+        ]
+        try:
+            with self.db.writer() as conn:
+                for sql, rows in groups:
+                    conn.executemany(sql, rows)
+            return
+        except Exception as e:
+            logger.error(f"Batched write of {len(ops)} statements failed, retrying individually: {e}")
+
+        for seq, sql, rows in ops:
+            for attempt in range(3):
+                try:
+                    with self.db.writer() as conn:
+                        conn.executemany(sql, rows)
+                    break
+                except Exception as e:
+                    if attempt == 2 or isinstance(e, NON_RETRYABLE):
+                        self._dropped(seq, sql, rows, e)
+                        break
+                    time.sleep(0.05 * (attempt + 1))
+
+    def _dropped(self, seq: int, sql: str, rows: List[tuple], error: Exception) -> None:
+        """Record a write that will never land."""
+        logger.error(f"Dropped write #{seq}: {error}")
+        with self._done:
+            self.failed_writes.add(seq)
+        if self.on_failure is not None:
+            try:
+                self.on_failure(seq, sql, rows, error)
+            except Exception as e:
+                logger.error(f"Write failure callback raised: {e}")
@@ -1,5 +1,16 @@
-"""Execution package for tradebot."""
-from .trade_executor import TradeExecutor, MockBrokerAPI
-from .alert_manager import AlertManager
+"""Execution package for tradebot.
+
+Names are imported from their submodules on first access (PEP 562).
+"""
+from utils.lazy import lazy_exports
+
+# Exported name -> submodule defining it
+_EXPORTS = {
+    'TradeExecutor': 'trade_executor',
+    'MockBrokerAPI': 'trade_executor',
+    'AlertManager': 'alert_manager',
+}
 
 __all__ = ['TradeExecutor', 'MockBrokerAPI', 'AlertManager']
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -1,8 +1,5 @@
 """Alert management for tradebot."""
 import logging
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from typing import List, Optional
 from datetime import datetime
 
@@ -36,6 +33,11 @@ class AlertManager:
             logger.warning("Email credentials not configured")
             return False
         
+        # Imported here: most runs never send mail, and these are slow to import
+        import smtplib
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+        
         try:
             msg = MIMEMultipart()
             msg['From'] = self.email
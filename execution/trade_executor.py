@@ -1,6 +1,6 @@
 """Trade execution module."""
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from datetime import datetime
 from utils.validators import validate_order_params
 
@@ -142,18 +142,13 @@ class TradeExecutor:
             return {'success': False}
         
         # Get trade info
-        trades = self.trade_history.get_trades(status='OPEN')
-        trade = next((t for t in trades if t['id'] == trade_id), None)
+        trade = self.trade_history.get_trade(trade_id)
         
-        if not trade:
+        if not trade or trade['status'] != 'OPEN':
             logger.error(f"Trade {trade_id} not found")
             return {'success': False}
         
-        # Calculate P&L
-        if trade['signal'] == 'BUY':
-            pnl = (exit_price - trade['entry_price']) * trade['quantity']
-        else:
-            pnl = (trade['entry_price'] - exit_price) * trade['quantity']
+        pnl = self._calculate_pnl(trade, exit_price)
         
         # Close in database
         self.trade_history.close_trade(trade_id, exit_price, pnl)
@@ -165,3 +160,83 @@ class TradeExecutor:
             'pnl': pnl,
             'trade_id': trade_id
         }
+    
+    def close_positions(self, exits: Dict[int, float]) -> Dict[str, Any]:
+        """Close many open positions in one database transaction.
+        
+        Args:
+            exits: Exit price keyed by trade ID
+            
+        Returns:
+            Close result with per-trade P&L and IDs that were not open
+        """
+        if not self.trade_history:
+            logger.warning("No trade history configured")
+            return {'success': False}
+        
+        trades = self.trade_history.get_trades_by_ids(exits.keys())
+        
+        closes = []
+        missing: List[int] = []
+        for trade_id, exit_price in exits.items():
+            trade = trades.get(trade_id)
+            if not trade or trade['status'] != 'OPEN':
+                missing.append(trade_id)
+                continue
+            closes.append((trade_id, exit_price, self._calculate_pnl(trade, exit_price)))
+        
+        if missing:
+            logger.error(f"Trades not found or not open: {missing}")
+        
+        self.trade_history.close_trades(closes)
+        
+        total_pnl = sum(pnl for _, _, pnl in closes)
+        logger.info(f"Closed {len(closes)} trades: P&L = {total_pnl:.2f}")
+        
+        return {
+            'success': not missing,
+            'pnl': {trade_id: pnl for trade_id, _, pnl in closes},
+            'total_pnl': total_pnl,
+            'missing': missing
+        }
+    
+    def square_off(self, exits: Dict[int, float]) -> Dict[str, Any]:
+        """Place the offsetting order for each open position, then close them.
+        
+        Args:
+            exits: Exit price keyed by trade ID
+            
+        Returns:
+            ``close_positions`` result for the positions squared off
+        """
+        if not self.trade_history:
+            logger.warning("No trade history configured")
+            return {'success': False}
+        
+        trades = self.trade_history.get_trades_by_ids(exits.keys())
+        squared: Dict[int, float] = {}
+        for trade_id, exit_price in exits.items():
+            trade = trades.get(trade_id)
+            if not trade or trade['status'] != 'OPEN':
+                continue
+            try:
+                self.broker.place_order(
+                    symbol=trade['symbol'],
+                    transaction_type='SELL' if trade['signal'] == 'BUY' else 'BUY',
+                    quantity=trade['quantity'],
+                    price=exit_price,
+                    product="MIS"
+                )
+            except Exception as e:
+                logger.error(f"Square-off order failed for trade {trade_id}: {e}")
+                continue
+            squared[trade_id] = exit_price
+        
+        return self.close_positions(squared)
+    
+    @staticmethod
+    def _calculate_pnl(trade: Dict[str, Any], exit_price: float) -> float:
+        """P&L of closing ``trade`` at ``exit_price``."""
+        if trade['signal'] == 'BUY':
+            return (exit_price - trade['entry_price']) * trade['quantity']
+        return (trade['entry_price'] - exit_price) * trade['quantity']
@@ -1,25 +1,108 @@
-"""NSE Options Trading Main Agent - Orchestrator."""
-import yaml
+"""NSE Options Trading Main Agent - Orchestrator.
+
+Startup is kept cheap for one-shot cron runs: agents are registered by
+import path and only imported and built when first used, the trade
+database is opened on the first trade, and NumPy (market snapshots) and
+YAML load on demand. ``tests/test_startup.py`` holds the import budget.
+
+``--daemon`` instead keeps one orchestrator resident (see ``scheduler.py``)
+so agents, caches and connections stay warm across scans.
+"""
 import argparse
+import asyncio
+import functools
 import logging
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, Any, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Any, Iterator, List, Optional, Set, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 
 from utils.logger import setup_logging
 from database.decision_logger import DecisionLogger
-from database.trade_history import TradeHistory
-from execution.trade_executor import TradeExecutor
 from execution.alert_manager import AlertManager
 
-from agents import (
-    OptionsChainAnalyzer, IntradayStrategyAgent, SwingStrategyAgent,
-    SentimentScout, RiskManager, MainDecisionAgent, AgentResponse
-)
+from agents.base_agent import AgentResponse
+from agents.registry import AgentRegistry
+from agents.runner import AgentRunner
+
+if TYPE_CHECKING:
+    from data_sources.snapshot import MarketSnapshot
+    from database.trade_history import TradeHistory
+    from execution.trade_executor import TradeExecutor
 
 logger = logging.getLogger('tradebot')
 
 
+@dataclass
+class _SymbolJob:
+    """Agent calls for one symbol and the times they must answer by.
+    
+    ``futures`` may hold ``concurrent.futures.Future`` or asyncio tasks;
+    only ``done``/``result``/``cancelled``/``add_done_callback`` are used.
+    """
+    symbol: str
+    snapshot: 'MarketSnapshot'
+    option_chain: Dict
+    futures: Dict[Any, str]  # Future -> agent name
+    started: float
+    budgets: Dict[str, float]  # Agent name -> monotonic time it must answer by
+    responses: List[AgentResponse] = field(default_factory=list)
+    answered: Set[str] = field(default_factory=set)
+    expired: Set[str] = field(default_factory=set)
+    collected: Set[Any] = field(default_factory=set)
+    stragglers: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    
+    def outstanding(self) -> List[Any]:
+        """Calls still worth waiting for."""
+        return [f for f, name in self.futures.items() if f not in self.collected and name not in self.expired]
+    
+    @property
+    def complete(self) -> bool:
+        return not self.outstanding()
+    
+    def next_deadline(self) -> Optional[float]:
+        """Earliest budget among the outstanding calls."""
+        pending = self.outstanding()
+        return min(self.budgets[self.futures[f]] for f in pending) if pending else None
+    
+    def collect(self, future: Any) -> None:
+        """Record a finished call, unless its agent already ran out of budget."""
+        name = self.futures[future]
+        if future in self.collected or name in self.expired:
+            return
+        self.collected.add(future)
+        if future.cancelled():
+            return
+        try:
+            response = future.result()
+            logger.info(f"  {self.symbol} {name}: {response.signal} ({response.confidence:.0f}%)")
+            self.responses.append(response)
+            self.answered.add(name)
+        except Exception as e:
+            logger.error(f"Agent error ({self.symbol} {name}): {e}")
+    
+    def expire(self, now: float) -> None:
+        """Give up on outstanding calls whose budget has passed."""
+        for future in self.outstanding():
+            name = self.futures[future]
+            if self.budgets[name] <= now:
+                self.expired.add(name)
+                logger.warning(
+                    f"{self.symbol}: {name} missed its {self.budgets[name] - self.started:.2f}s budget"
+                )
+    
+    @property
+    def missing(self) -> List[str]:
+        """Agents without a response: over budget or failed."""
+        return sorted(set(self.futures.values()) - self.answered)
+
+
 class TradingOrchestrator:
     """Main orchestrator."""
     
@@ -28,81 +111,474 @@ class TradingOrchestrator:
         self.config = self._load_config(config_path)
         
         self.decision_logger = DecisionLogger()
-        self.trade_history = TradeHistory()
-        self.trade_executor = TradeExecutor(trade_history=self.trade_history)
         self.alert_manager = AlertManager()
         
-        self.agents = {
-            'OptionsChainAnalyzer': OptionsChainAnalyzer(),
-            'IntradayStrategyAgent': IntradayStrategyAgent(),
-            'SwingStrategyAgent': SwingStrategyAgent(),
-            'SentimentScout': SentimentScout(),
-            'RiskManager': RiskManager(self.config.get('capital', 100000)),
-            'MainDecisionAgent': MainDecisionAgent(config_path),
+        deadlines = self.config.get('deadlines', {})
+        self.decision_deadline = deadlines.get('decision_seconds', 5.0)
+        self.agent_budgets = deadlines.get('agent_budgets') or {}
+        # Results that arrived after their symbol was decided, for latency analysis
+        self.late_results = deque(maxlen=deadlines.get('late_results_kept', 1000))
+        
+        # Specialist agents as (import path, kwargs): imported and built on first
+        # use, and worker processes can build their own
+        self.agent_specs = {
+            'OptionsChainAnalyzer': ('agents.options_chain_analyzer:OptionsChainAnalyzer', {}),
+            'IntradayStrategyAgent': ('agents.intraday_strategy_agent:IntradayStrategyAgent', {}),
+            'SwingStrategyAgent': ('agents.swing_strategy_agent:SwingStrategyAgent', {
+                'state_dir': self.config.get('indicators', {}).get('swing_state_dir')
+            }),
+            'SentimentScout': ('agents.sentiment_scout:SentimentScout', {
+                'cache_db': self.config.get('data_sources', {}).get('cache_db')
+            }),
+            'RiskManager': ('agents.risk_manager:RiskManager', {'max_exposure': self.config.get('capital', 100000)}),
         }
-        self.main_agent = self.agents['MainDecisionAgent']
+        self.agents = AgentRegistry(dict(
+            self.agent_specs,
+            MainDecisionAgent=('agents.main_decision_agent:MainDecisionAgent', {
+                'config_path': config_path,
+                'missing_agent_policy': deadlines.get('missing_agent_policy', 'redistribute'),
+                'min_weight_coverage': deadlines.get('min_weight_coverage', 0.6),
+            }),
+        ))
+        
+        execution = self.config.get('execution', {})
+        self.runner = AgentRunner(
+            self.agent_specs,
+            agents=self.agents,
+            mode=execution.get('mode', 'thread'),
+            max_threads=execution.get('max_threads', 8),
+            max_processes=execution.get('max_processes', 2),
+        )
+        
+        scan = self.config.get('scan', {})
+        self.max_concurrent_symbols = scan.get('max_concurrent_symbols', 16)
         
         logger.info("TradingOrchestrator initialized")
     
     def _load_config(self, path: str) -> Dict:
+        import yaml
+        
         with open(path, 'r') as f:
             return yaml.safe_load(f)
     
-    def run_agents_in_parallel(self, symbol, option_chain, market_data, sentiment_data):
-        responses = []
+    @property
+    def main_agent(self):
+        return self.agents['MainDecisionAgent']
+    
+    @functools.cached_property
+    def trade_history(self) -> 'TradeHistory':
+        """Trade database, opened (and its schema checked) on first use."""
+        from database.trade_history import TradeHistory
         
-        def run_agent(name, agent):
-            return name, agent.analyze(symbol, option_chain, market_data, sentiment_data)
+        # Trade inserts are queued so order placement never waits on a commit
+        return TradeHistory(write_behind=True)
+    
+    @functools.cached_property
+    def trade_executor(self) -> 'TradeExecutor':
+        from execution.trade_executor import TradeExecutor
+        
+        return TradeExecutor(trade_history=self.trade_history)
+    
+    def _new_job(
+        self,
+        symbol: str,
+        option_chain: Dict,
+        snapshot: 'MarketSnapshot',
+        futures: Dict[Any, str],
+        started: float,
+        deadline: Optional[float] = None
+    ) -> _SymbolJob:
+        """Track submitted agent calls against their budgets, capped at the decision deadline."""
+        deadline = self.decision_deadline if deadline is None else deadline
+        budgets = {
+            name: started + min(self.agent_budgets.get(name, deadline), deadline)
+            for name in futures.values()
+        }
+        return _SymbolJob(symbol, snapshot, option_chain, futures, started, budgets)
+    
+    def _submit(
+        self,
+        symbol: str,
+        option_chain: Dict,
+        market_data: Dict,
+        sentiment_data: Dict,
+        deadline: Optional[float] = None
+    ) -> _SymbolJob:
+        """Queue every specialist agent on the runner for one symbol."""
+        from data_sources.snapshot import MarketSnapshot
         
-        agents_to_run = [(n, a) for n, a in self.agents.items() if n != 'MainDecisionAgent']
+        # One shared, read-only copy of the tick's inputs for every agent
+        snapshot = MarketSnapshot.build(option_chain, market_data, sentiment_data)
+        started = time.monotonic()
+        try:
+            futures = self.runner.submit_all(symbol, snapshot)
+        except BaseException:
+            snapshot.close()
+            raise
+        return self._new_job(symbol, option_chain, snapshot, futures, started, deadline)
+    
+    def _release(self, job: _SymbolJob) -> None:
+        """Hand a decided job's unfinished calls over to the late-result log.
         
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = {executor.submit(run_agent, n, a): n for n, a in agents_to_run}
-            for future in as_completed(futures):
-                try:
-                    name, response = future.result()
-                    logger.info(f"  {name}: {response.signal} ({response.confidence:.0f}%)")
-                    responses.append(response)
-                except Exception as e:
-                    logger.error(f"Agent error: {e}")
+        Calls still queued are cancelled; running ones are recorded when they
+        finish, and the snapshot is freed after the last of them.
+        """
+        stragglers = [f for f in job.futures if f not in job.collected]
+        for future in stragglers:
+            if isinstance(future, Future):
+                future.cancel()  # Only succeeds if the call hasn't started
         
-        return responses
+        with job.lock:
+            job.stragglers = len(stragglers)
+        if not stragglers:
+            job.snapshot.close()
+            return
+        for future in stragglers:
+            future.add_done_callback(functools.partial(self._record_late, job))
     
-    def analyze_symbol(self, symbol: str, trade_type: str = "INTRADAY"):
-        symbol = symbol.upper()
-        logger.info(f"Analyzing {symbol}")
+    def _record_late(self, job: _SymbolJob, future: Any) -> None:
+        name = job.futures[future]
+        if not future.cancelled() and future.exception() is None:
+            response = future.result()
+            latency = time.monotonic() - job.started
+            budget = job.budgets[name] - job.started
+            self.late_results.append({
+                'symbol': job.symbol,
+                'agent_name': name,
+                'latency': latency,
+                'budget': budget,
+                'signal': response.signal,
+                'confidence': response.confidence,
+                'timestamp': datetime.now().isoformat(),
+            })
+            logger.info(
+                f"Late result {job.symbol} {name}: {response.signal} ({response.confidence:.0f}%) "
+                f"after {latency:.2f}s, budget {budget:.2f}s"
+            )
         
+        with job.lock:
+            job.stragglers -= 1
+            last = job.stragglers == 0
+        if last:
+            job.snapshot.close()
+    
+    def _run_job(self, symbol, option_chain, market_data, sentiment_data) -> _SymbolJob:
+        """Run all agents on one symbol until each answers or exhausts its budget."""
+        job = self._submit(symbol, option_chain, market_data, sentiment_data)
+        try:
+            while not job.complete:
+                timeout = max(job.next_deadline() - time.monotonic(), 0)
+                done, _ = wait(job.outstanding(), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job.collect(future)
+                job.expire(time.monotonic())
+        finally:
+            self._release(job)
+        return job
+    
+    def run_agents_in_parallel(self, symbol, option_chain, market_data, sentiment_data):
+        return self._run_job(symbol, option_chain, market_data, sentiment_data).responses
+    
+    def _gather_inputs(self, symbol: str) -> Tuple[Dict, Dict, Dict]:
+        """Option chain, market data and sentiment for one symbol."""
         # Mock data
         option_chain = {'spot_price': 18000, 'pcr': 1.2}
         market_data = {'ohlc_intraday': [], 'ohlc_daily': []}
         sentiment_data = {'fii_net_flow': 300}
+        return option_chain, market_data, sentiment_data
+    
+    def analyze_symbol(self, symbol: str, trade_type: str = "INTRADAY"):
+        symbol = symbol.upper()
+        logger.info(f"Analyzing {symbol}")
         
-        responses = self.run_agents_in_parallel(symbol, option_chain, market_data, sentiment_data)
-        decision = self.main_agent.aggregate(responses, trade_type)
+        option_chain, market_data, sentiment_data = self._gather_inputs(symbol)
+        job = self._run_job(symbol, option_chain, market_data, sentiment_data)
+        return self._decide(symbol, trade_type, option_chain, job.responses, job.missing)
+    
+    def _decide(
+        self,
+        symbol: str,
+        trade_type: str,
+        option_chain: Dict,
+        responses: List[AgentResponse],
+        missing_agents: Optional[List[str]] = None
+    ):
+        """Aggregate agent responses, log the decision and act on it."""
+        decision = self.main_agent.aggregate(responses, trade_type, missing_agents=missing_agents)
         
         self.decision_logger.log_decision(symbol, decision.to_dict())
         
         if decision.confidence >= 70 and decision.signal in ['BUY', 'SELL']:
             try:
-                self.trade_executor.execute_trade(
-                    symbol=symbol,
-                    signal=decision.signal,
-                    quantity=50,
-                    price=option_chain['spot_price'],
-                    confidence=decision.confidence,
-                    strategy=trade_type
-                )
-                self.alert_manager.send_trade_alert(symbol, decision.signal, decision.confidence)
+                # Repeated scans (the daemon) must not stack positions in one symbol
+                open_trades = self.trade_history.get_trades(symbol=symbol, status='OPEN', limit=1)
+                if open_trades:
+                    logger.info(f"Skipping {decision.signal} {symbol}: trade {open_trades[0]['id']} still open")
+                else:
+                    self.trade_executor.execute_trade(
+                        symbol=symbol,
+                        signal=decision.signal,
+                        quantity=50,
+                        price=option_chain['spot_price'],
+                        confidence=decision.confidence,
+                        strategy=trade_type
+                    )
+                    self.alert_manager.send_trade_alert(symbol, decision.signal, decision.confidence)
             except Exception as e:
                 logger.error(f"Trade execution failed: {e}")
         
         return {'decision': decision.to_dict(), 'agent_responses': [r.to_dict() for r in responses]}
     
-    def run_scan(self, symbols=None):
+    def iter_scan(
+        self,
+        symbols: List[str],
+        trade_type: str = "INTRADAY",
+        max_concurrent_symbols: Optional[int] = None,
+        decision_deadline: Optional[float] = None
+    ) -> Iterator[Tuple[str, Dict]]:
+        """Analyze many symbols at once, yielding results as each completes.
+        
+        Every agent of every in-flight symbol is queued on the runner
+        together, so one slow agent holds up only its own symbol. At most
+        ``max_concurrent_symbols`` symbols (each with its snapshot) are in
+        flight; the next one starts as soon as a slot frees up. A symbol is
+        decided once each agent has answered or used up its budget, and
+        never later than ``decision_deadline`` seconds after it started.
+        
+        Decisions, logging and trade execution run on the calling thread,
+        one symbol at a time.
+        
+        Args:
+            symbols: Symbols to scan
+            trade_type: 'INTRADAY' or 'SWING'
+            max_concurrent_symbols: Symbols in flight (default: config scan.max_concurrent_symbols)
+            decision_deadline: Per-symbol deadline in seconds (default: config deadlines.decision_seconds)
+        
+        Yields:
+            (symbol, result) in completion order; result is shaped like
+            ``analyze_symbol``'s, or ``{'error': ...}`` if the symbol failed
+        """
+        limit = max(max_concurrent_symbols or self.max_concurrent_symbols, 1)
+        
+        waiting = list(reversed(dict.fromkeys(symbol.upper() for symbol in symbols)))
+        jobs: Dict[str, _SymbolJob] = {}
+        done: queue.Queue = queue.Queue()
+        
+        def start(symbol: str) -> None:
+            option_chain, market_data, sentiment_data = self._gather_inputs(symbol)
+            job = self._submit(symbol, option_chain, market_data, sentiment_data, decision_deadline)
+            jobs[symbol] = job
+            for future in job.futures:
+                future.add_done_callback(lambda f, job=job: done.put((job, f)))
+        
+        def finish(job: _SymbolJob) -> Tuple[str, Dict]:
+            del jobs[job.symbol]
+            self._release(job)
+            try:
+                return job.symbol, self._decide(
+                    job.symbol, trade_type, job.option_chain, job.responses, job.missing
+                )
+            except Exception as e:
+                logger.error(f"Decision failed for {job.symbol}: {e}")
+                return job.symbol, {'error': str(e)}
+        
+        try:
+            while waiting or jobs:
+                while waiting and len(jobs) < limit:
+                    symbol = waiting.pop()
+                    try:
+                        start(symbol)
+                    except Exception as e:
+                        logger.error(f"Could not start {symbol}: {e}")
+                        yield symbol, {'error': str(e)}
+                
+                deadlines = [d for d in (job.next_deadline() for job in jobs.values()) if d is not None]
+                if deadlines:
+                    try:
+                        job, future = done.get(timeout=max(min(deadlines) - time.monotonic(), 0))
+                        if jobs.get(job.symbol) is job:
+                            job.collect(future)
+                    except queue.Empty:
+                        pass
+                
+                now = time.monotonic()
+                for job in list(jobs.values()):
+                    job.expire(now)
+                    if job.complete:
+                        yield finish(job)
+        finally:
+            for job in list(jobs.values()):
+                self._release(job)
+    
+    def run_scan(self, symbols=None, trade_type: str = "INTRADAY"):
+        symbols = symbols or ['NIFTY', 'BANKNIFTY']
+        started = time.monotonic()
+        results = {}
+        for symbol, result in self.iter_scan(symbols, trade_type):
+            results[symbol] = result
+        logger.info(f"Scanned {len(results)} symbols in {time.monotonic() - started:.2f}s")
+        return results
+    
+    def square_off(self, strategy: str = "INTRADAY") -> Dict[str, Any]:
+        """Close every open position of one strategy at the current spot price.
+        
+        The daemon calls this for INTRADAY at the intraday cutoff.
+        
+        Returns:
+            ``TradeExecutor.square_off`` result
+        """
+        open_trades = self.trade_history.get_trades(status='OPEN', strategy=strategy, limit=1000)
+        spots: Dict[str, float] = {}
+        exits = {}
+        for trade in open_trades:
+            if trade['symbol'] not in spots:
+                spots[trade['symbol']] = self._gather_inputs(trade['symbol'])[0]['spot_price']
+            exits[trade['id']] = spots[trade['symbol']]
+        
+        result = self.trade_executor.square_off(exits)
+        logger.info(f"Squared off {len(result.get('pnl', {}))} {strategy} positions")
+        return result
+    
+    def flush(self) -> None:
+        """Make logged decisions and recorded trades durable (the daemon calls this periodically)."""
+        self.decision_logger.flush()
+        if 'trade_history' in self.__dict__:
+            self.trade_history.flush(durable=True)
+    
+    def shutdown(self):
+        """Flush pending writes and release resources."""
+        self.runner.close()
+        for agent in self.agents.loaded().values():
+            agent.close()
+        if 'trade_history' in self.__dict__:
+            self.trade_history.close()
+        self.decision_logger.close()
+        logger.info("TradingOrchestrator shut down")
+
+
+class AsyncTradingOrchestrator(TradingOrchestrator):
+    """Orchestrator driven by an asyncio event loop.
+    
+    Agents are awaited through ``analyze_async``: agents with native async
+    I/O wait on the loop without holding a thread, the rest run on the
+    loop's default thread pool. Configuration, agents, deadlines and
+    decision handling are shared with ``TradingOrchestrator``.
+    """
+    
+    async def _run_job_async(
+        self,
+        symbol: str,
+        option_chain: Dict,
+        market_data: Dict,
+        sentiment_data: Dict,
+        deadline: Optional[float] = None
+    ) -> _SymbolJob:
+        """Await all agents on one symbol until each answers or exhausts its budget."""
+        from data_sources.snapshot import MarketSnapshot
+        
+        snapshot = MarketSnapshot.build(option_chain, market_data, sentiment_data)
+        started = time.monotonic()
+        tasks = {
+            asyncio.ensure_future(self.agents[name].analyze_async(
+                symbol, snapshot.option_chain, snapshot.market_data, snapshot.sentiment_data
+            )): name
+            for name in self.agent_specs
+        }
+        job = self._new_job(symbol, option_chain, snapshot, tasks, started, deadline)
+        try:
+            while not job.complete:
+                timeout = max(job.next_deadline() - time.monotonic(), 0)
+                done, _ = await asyncio.wait(job.outstanding(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    job.collect(task)
+                job.expire(time.monotonic())
+        finally:
+            self._release(job)
+        return job
+    
+    async def run_agents_async(
+        self,
+        symbol: str,
+        option_chain: Dict,
+        market_data: Dict,
+        sentiment_data: Dict,
+        deadline: Optional[float] = None
+    ) -> List[AgentResponse]:
+        """Await every specialist agent on one symbol.
+        
+        Args:
+            symbol: Symbol to analyze
+            option_chain: Option chain dict
+            market_data: Market data dict
+            sentiment_data: Sentiment dict
+            deadline: Seconds before deciding without the stragglers
+                (default: config deadlines.decision_seconds)
+        
+        Returns:
+            Responses of the agents that answered within their budgets
+        """
+        job = await self._run_job_async(symbol, option_chain, market_data, sentiment_data, deadline)
+        return job.responses
+    
+    async def analyze_symbol_async(self, symbol: str, trade_type: str = "INTRADAY"):
+        """Awaitable ``analyze_symbol``."""
+        symbol = symbol.upper()
+        logger.info(f"Analyzing {symbol}")
+        
+        option_chain, market_data, sentiment_data = self._gather_inputs(symbol)
+        job = await self._run_job_async(symbol, option_chain, market_data, sentiment_data)
+        return self._decide(symbol, trade_type, option_chain, job.responses, job.missing)
+    
+    async def iter_scan_async(
+        self,
+        symbols: List[str],
+        trade_type: str = "INTRADAY",
+        max_concurrent_symbols: Optional[int] = None,
+        decision_deadline: Optional[float] = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """Async counterpart of ``iter_scan``: yield results as symbols complete.
+        
+        A semaphore bounds the symbols in flight; decisions run on the loop
+        one symbol at a time.
+        """
+        limit = asyncio.Semaphore(max(max_concurrent_symbols or self.max_concurrent_symbols, 1))
+        
+        async def scan(symbol: str):
+            async with limit:
+                try:
+                    option_chain, market_data, sentiment_data = self._gather_inputs(symbol)
+                    job = await self._run_job_async(
+                        symbol, option_chain, market_data, sentiment_data, decision_deadline
+                    )
+                    return symbol, job, None
+                except Exception as e:
+                    logger.error(f"Scan failed for {symbol}: {e}")
+                    return symbol, None, e
+        
+        tasks = [asyncio.ensure_future(scan(symbol)) for symbol in dict.fromkeys(s.upper() for s in symbols)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                symbol, job, error = await next_done
+                if error is not None:
+                    yield symbol, {'error': str(error)}
+                    continue
+                try:
+                    yield symbol, self._decide(symbol, trade_type, job.option_chain, job.responses, job.missing)
+                except Exception as e:
+                    logger.error(f"Decision failed for {symbol}: {e}")
+                    yield symbol, {'error': str(e)}
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def run_scan_async(self, symbols=None, trade_type: str = "INTRADAY"):
+        """Awaitable ``run_scan``."""
         symbols = symbols or ['NIFTY', 'BANKNIFTY']
+        started = time.monotonic()
         results = {}
-        for symbol in symbols:
-            results[symbol] = self.analyze_symbol(symbol)
+        async for symbol, result in self.iter_scan_async(symbols, trade_type):
+            results[symbol] = result
+        logger.info(f"Scanned {len(results)} symbols in {time.monotonic() - started:.2f}s")
         return results
 
 
@@ -110,15 +586,51 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--symbol', '-s')
     parser.add_argument('--scan', action='store_true')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Run agents on an asyncio event loop')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Stay resident and rescan the configured watchlists during market hours')
     args = parser.parse_args()
     
+    if args.daemon:
+        from scheduler import MarketScheduler
+        
+        orch = TradingOrchestrator()
+        scheduler = MarketScheduler.from_config(orch)
+        
+        def request_stop(signum, frame):
+            logger.info(f"Received {signal.Signals(signum).name}, stopping after the current scan")
+            scheduler.stop()
+        
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+        try:
+            scheduler.run()
+        finally:
+            orch.shutdown()
+        return
+    
+    if args.use_async:
+        orch = AsyncTradingOrchestrator()
+        try:
+            if args.scan:
+                asyncio.run(orch.run_scan_async())
+            else:
+                asyncio.run(orch.analyze_symbol_async((args.symbol or "NIFTY").upper()))
+        finally:
+            orch.shutdown()
+        return
+    
     orch = TradingOrchestrator()
-    if args.symbol:
-        orch.analyze_symbol(args.symbol.upper())
-    elif args.scan:
-        orch.run_scan()
-    else:
-        orch.analyze_symbol("NIFTY")
+    try:
+        if args.symbol:
+            orch.analyze_symbol(args.symbol.upper())
+        elif args.scan:
+            orch.run_scan()
+        else:
+            orch.analyze_symbol("NIFTY")
+    finally:
+        orch.shutdown()
 
 
 if __name__ == "__main__":
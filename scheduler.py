@@ -0,0 +1,246 @@
+"""Market-hours-aware scheduling for the resident (daemon) orchestrator.
+
+``MarketScheduler`` keeps one ``TradingOrchestrator`` (agents, caches, DB
+connections) alive across cycles and rescans each watched symbol on its
+own cadence, only while NSE is open. Intraday symbols stop at the
+configured intraday cutoff, where open intraday positions are squared
+off; swing symbols run until the close. Outside market hours it sleeps
+until the next session.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timedelta, tzinfo
+from typing import TYPE_CHECKING, Callable, Dict, FrozenSet, List, Optional
+from zoneinfo import ZoneInfo
+
+if TYPE_CHECKING:
+    from main_agent import TradingOrchestrator
+
+logger = logging.getLogger('tradebot')
+
+IST = ZoneInfo('Asia/Kolkata')
+
+
+def _parse_time(value: str) -> dtime:
+    return datetime.strptime(value, '%H:%M').time()
+
+
+@dataclass(frozen=True)
+class TradingHours:
+    """NSE session times in the exchange's timezone."""
+    market_open: dtime
+    market_close: dtime
+    intraday_cutoff: dtime
+    tz: tzinfo = IST
+    holidays: FrozenSet[date] = frozenset()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'TradingHours':
+        """Build from the ``trading_hours`` (and ``daemon.timezone``) config sections."""
+        hours = config.get('trading_hours', {})
+        return cls(
+            market_open=_parse_time(hours.get('market_open', '09:15')),
+            market_close=_parse_time(hours.get('market_close', '15:30')),
+            intraday_cutoff=_parse_time(hours.get('intraday_cutoff', '14:30')),
+            tz=ZoneInfo(config.get('daemon', {}).get('timezone', 'Asia/Kolkata')),
+            holidays=frozenset(date.fromisoformat(str(d)) for d in hours.get('holidays') or []),
+        )
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def is_open(self, now: datetime) -> bool:
+        now = now.astimezone(self.tz)
+        return self.is_trading_day(now.date()) and self.market_open <= now.time() < self.market_close
+
+    def allows(self, trade_type: str, now: datetime) -> bool:
+        """Whether a scan of this trade type should run now."""
+        if not self.is_open(now):
+            return False
+        return trade_type != 'INTRADAY' or now.astimezone(self.tz).time() < self.intraday_cutoff
+
+    def next_open(self, now: datetime) -> datetime:
+        """Start of the next session (``now``'s session if it hasn't opened yet)."""
+        now = now.astimezone(self.tz)
+        day = now.date()
+        if now.time() >= self.market_open:
+            day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return datetime.combine(day, self.market_open, tzinfo=self.tz)
+
+    def close_of(self, now: datetime) -> datetime:
+        """Close of ``now``'s session."""
+        now = now.astimezone(self.tz)
+        return datetime.combine(now.date(), self.market_close, tzinfo=self.tz)
+
+    def cutoff_of(self, now: datetime) -> datetime:
+        """Intraday cutoff of ``now``'s session."""
+        now = now.astimezone(self.tz)
+        return datetime.combine(now.date(), self.intraday_cutoff, tzinfo=self.tz)
+
+
+@dataclass
+class Cadence:
+    """One symbol rescanned every ``interval`` seconds for one trade type."""
+    symbol: str
+    trade_type: str
+    interval: float
+    next_due: float = 0.0  # time.monotonic() of the next scan
+
+    def reschedule(self, now: float) -> None:
+        """Keep a fixed rhythm, but skip (don't replay) slots missed while closed or busy."""
+        following = self.next_due + self.interval
+        self.next_due = following if following > now else now + self.interval
+
+
+def cadences_from_config(config: Dict) -> List[Cadence]:
+    """Cadences for the ``daemon.intraday`` and ``daemon.swing`` watchlists.
+
+    Each basket has ``symbols``, a default ``interval_seconds`` and optional
+    per-symbol ``symbol_intervals``.
+    """
+    daemon = config.get('daemon', {})
+    defaults = {'intraday': 60, 'swing': 900}
+    cadences = []
+    for basket, default in defaults.items():
+        settings = daemon.get(basket) or {}
+        overrides = settings.get('symbol_intervals') or {}
+        for symbol in settings.get('symbols') or []:
+            interval = overrides.get(symbol, settings.get('interval_seconds', default))
+            cadences.append(Cadence(symbol.upper(), basket.upper(), float(interval)))
+    return cadences
+
+
+class MarketScheduler:
+    """Run an orchestrator's scans on per-symbol cadences during market hours."""
+
+    def __init__(
+        self,
+        orchestrator: 'TradingOrchestrator',
+        hours: TradingHours,
+        cadences: List[Cadence],
+        flush_seconds: float = 30.0,
+        clock: Optional[Callable[[], datetime]] = None
+    ):
+        """Initialize scheduler.
+
+        Args:
+            orchestrator: Long-lived orchestrator to run scans on
+            hours: Session times
+            cadences: Symbols and how often to scan each
+            flush_seconds: How often decisions and trades are made durable
+            clock: Current time as an aware datetime (default: now in ``hours.tz``)
+        """
+        self.orchestrator = orchestrator
+        self.hours = hours
+        self.cadences = cadences
+        self.flush_seconds = flush_seconds
+        self.clock = clock or (lambda: datetime.now(hours.tz))
+        self.cycles = 0
+        self._stop = threading.Event()
+        # Whether intraday trading was allowed at the last check (None: not checked yet)
+        self._intraday_live: Optional[bool] = None
+
+    @classmethod
+    def from_config(cls, orchestrator: 'TradingOrchestrator') -> 'MarketScheduler':
+        config = orchestrator.config
+        return cls(
+            orchestrator,
+            TradingHours.from_config(config),
+            cadences_from_config(config),
+            flush_seconds=config.get('daemon', {}).get('flush_seconds', 30),
+        )
+
+    def stop(self) -> None:
+        """Ask ``run`` to return after the scan in progress (safe from signal handlers)."""
+        self._stop.set()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    def run_once(self) -> int:
+        """Scan every symbol that is due and allowed now.
+
+        Returns:
+            Number of symbols scanned
+        """
+        now, mono = self.clock(), time.monotonic()
+        self._square_off_intraday(now)
+
+        due: Dict[str, List[Cadence]] = {}
+        for cadence in self.cadences:
+            if cadence.next_due <= mono and self.hours.allows(cadence.trade_type, now):
+                due.setdefault(cadence.trade_type, []).append(cadence)
+
+        scanned = 0
+        for trade_type, batch in due.items():
+            try:
+                for _ in self.orchestrator.iter_scan([c.symbol for c in batch], trade_type):
+                    scanned += 1
+            except Exception as e:
+                logger.error(f"{trade_type} scan failed: {e}")
+            finally:
+                finished = time.monotonic()
+                for cadence in batch:
+                    cadence.reschedule(finished)
+        if scanned:
+            self.cycles += 1
+        return scanned
+
+    def _square_off_intraday(self, now: datetime) -> None:
+        """Close intraday positions when the intraday window shuts (or at startup outside it)."""
+        live = self.hours.allows('INTRADAY', now)
+        if not live and self._intraday_live is not False:
+            try:
+                self.orchestrator.square_off('INTRADAY')
+            except Exception as e:
+                # Leave the flag alone so the next pass tries again
+                logger.error(f"Intraday square-off failed: {e}")
+                return
+        self._intraday_live = live
+
+    def seconds_until_next(self) -> float:
+        """How long to sleep before something could be due."""
+        now = self.clock()
+        if not self.hours.is_open(now):
+            return max((self.hours.next_open(now) - now).total_seconds(), 0.0)
+
+        mono = time.monotonic()
+        waits = [c.next_due - mono for c in self.cadences if self.hours.allows(c.trade_type, now)]
+        if self.hours.allows('INTRADAY', now):
+            # Wake at the cutoff to square off
+            waits.append((self.hours.cutoff_of(now) - now).total_seconds())
+        if waits:
+            return max(min(waits), 0.0)
+        # Nothing allowed for the rest of this session (e.g. intraday-only after the cutoff)
+        return max((self.hours.close_of(now) - now).total_seconds(), 0.0)
+
+    def run(self) -> None:
+        """Scan until ``stop`` is called; flush writes periodically and on the way out."""
+        logger.info(
+            f"Daemon started: {len(self.cadences)} symbol cadences, "
+            f"session {self.hours.market_open:%H:%M}-{self.hours.market_close:%H:%M} {self.hours.tz}"
+        )
+        next_flush = time.monotonic() + self.flush_seconds
+        was_open = None
+        try:
+            while not self._stop.is_set():
+                self.run_once()
+                if time.monotonic() >= next_flush:
+                    self.orchestrator.flush()
+                    next_flush = time.monotonic() + self.flush_seconds
+
+                now = self.clock()
+                is_open = self.hours.is_open(now)
+                if not is_open and was_open is not False:
+                    logger.info(f"Market closed; next session at {self.hours.next_open(now):%Y-%m-%d %H:%M %Z}")
+                was_open = is_open
+
+                self._stop.wait(min(self.seconds_until_next(), max(next_flush - time.monotonic(), 0.0)))
+        finally:
+            self.orchestrator.flush()
+            logger.info(f"Daemon stopped after {self.cycles} scan cycles")
@@ -1,5 +1,12 @@
 """Tests for agents."""
+import asyncio
+import os
+import shutil
+import signal
+import tempfile
+import time
 import unittest
+from datetime import datetime
 from unittest.mock import Mock, patch
 import sys
 sys.path.append('/data/.openclaw/workspace/tradebot')
@@ -9,6 +16,11 @@ from agents.intraday_strategy_agent import IntradayStrategyAgent
 from agents.swing_strategy_agent import SwingStrategyAgent
 from agents.sentiment_scout import SentimentScout
 from agents.risk_manager import RiskManager
+from agents.main_decision_agent import MainDecisionAgent
+from agents.base_agent import AgentResponse
+from agents.runner import AgentRunner
+from data_sources.snapshot import MarketSnapshot
+from analysis.indicators import SwingIndicators
 
 
 class TestOptionsChainAnalyzer(unittest.TestCase):
@@ -30,6 +42,79 @@ class TestOptionsChainAnalyzer(unittest.TestCase):
         strike = self.analyzer.suggest_optimal_strike(18000, "CALL")
         # Low vol should stick to ATM
         self.assertEqual(strike, 18000)
+    
+    def test_calculate_max_pain(self):
+        """Test max pain matches a brute-force pain calculation."""
+        strikes = [17800, 17900, 18000, 18100, 18200]
+        call_oi = [500, 400, 300, 200, 100]
+        put_oi = [100, 250, 300, 450, 600]
+        
+        def pain(k):
+            return (sum(c * (k - s) for s, c in zip(strikes, call_oi) if s < k)
+                    + sum(p * (s - k) for s, p in zip(strikes, put_oi) if s > k))
+        
+        expected = max(strikes, key=pain)
+        self.assertEqual(self.analyzer.calculate_max_pain(strikes, call_oi, put_oi), expected)
+        
+        result = self.analyzer.calculate_max_pain_curve(strikes, call_oi, put_oi)
+        self.assertEqual(list(result.pain), [pain(k) for k in strikes])
+    
+    def test_calculate_max_pain_batch(self):
+        """Test a batch of chains, including a NaN-padded ragged row."""
+        nan = float('nan')
+        strikes = [[100, 200, 300], [300, 100, 200], [100, 200, nan]]
+        call_oi = [[5, 1, 1], [1, 5, 1], [1, 5, 0]]
+        put_oi = [[1, 1, 5], [5, 1, 1], [5, 1, 0]]
+        
+        result = self.analyzer.calculate_max_pain_curve(strikes, call_oi, put_oi)
+        # Rows 1 and 2 tie 100 and 300; the strike listed first wins
+        self.assertEqual(list(result.strike), [100, 300, 100])
+        self.assertEqual(result.pain.shape, (3, 3))
+    
+    def test_calculate_max_pain_ties_follow_input_order(self):
+        """Test ties and empty OI pick the first strike listed, like the original loop."""
+        def reference(strikes, call_oi, put_oi):
+            best, best_strike = 0, strikes[0]
+            for k in strikes:
+                pain = sum(c * (k - s) for s, c in zip(strikes, call_oi) if s < k)
+                pain += sum(p * (s - k) for s, p in zip(strikes, put_oi) if s > k)
+                if pain > best:
+                    best, best_strike = pain, k
+            return best_strike
+        
+        chains = [
+            ([22100, 22000, 21900], [0, 0, 0], [0, 0, 0]),
+            ([200, 100], [1, 1], [1, 1]),
+            ([18100, 17900, 18000, 18200], [3, 7, 5, 1], [4, 2, 3, 6]),
+        ]
+        for chain in chains:
+            self.assertEqual(self.analyzer.calculate_max_pain(*chain), reference(*chain))
+        self.assertEqual(self.analyzer.calculate_max_pain(*chains[0]), 22100)
+
+    def test_calculate_chain_greeks(self):
+        """Test chain-wide IV recovers the volatility the prices were built with."""
+        from analysis.greeks import bs_price
+
+        strikes = [21800, 21900, 22000, 22100, 22200]
+        t = 7 / 365
+        chain = {
+            'spot_price': 22000,
+            'strikes': strikes,
+            'days_to_expiry': 7,
+            'expiry_dates': ['2025-01-09'],
+            'call_ltp': list(bs_price(22000, strikes, t, 0.065, 0.18, True)),
+            'put_ltp': list(bs_price(22000, strikes, t, 0.065, 0.18, False)),
+        }
+
+        greeks = self.analyzer.calculate_chain_greeks('NIFTY', chain)
+        for side in ('call', 'put'):
+            for iv in greeks[side]['iv']:
+                self.assertAlmostEqual(iv, 0.18, places=4)
+        self.assertAlmostEqual(greeks['call']['delta'][2] - greeks['put']['delta'][2], 1.0, places=6)
+
+        response = self.analyzer.analyze('NIFTY', option_chain=chain)
+        self.assertAlmostEqual(response.metadata['iv_current'], 18.0, places=2)
+        self.assertEqual(response.metadata['greeks']['atm_strike'], 22000)
 
 
 class TestIntradayStrategyAgent(unittest.TestCase):
@@ -50,6 +135,53 @@ class TestIntradayStrategyAgent(unittest.TestCase):
         suboptimal_time = datetime(2025, 1, 1, 9, 0, 0)
         self.assertFalse(self.agent.is_optimal_entry_time(suboptimal_time))
 
+    def _bars(self, count):
+        from datetime import datetime, timedelta
+        start = datetime(2025, 1, 1, 9, 15)
+        return [
+            {
+                'time': start + timedelta(minutes=i),
+                'open': 100 + i % 7, 'high': 102 + i % 7, 'low': 98 + i % 5,
+                'close': 100 + (i * 3) % 11, 'volume': 1000 + (i * 37) % 500
+            }
+            for i in range(count)
+        ]
+
+    def test_indicators_incremental_matches_replay(self):
+        """Test feeding bars in pieces gives the same state as one full pass."""
+        bars = self._bars(40)
+        self.agent.indicators.sync('NIFTY', bars[:25])
+        state = self.agent.indicators.sync('NIFTY', bars)
+        fresh = self.agent.indicators.replay('BANKNIFTY', bars)
+
+        self.assertEqual(state.bars, 40)
+        for attr in ('vwap', 'rsi', 'avg_volume', 'orb', 'prev_close'):
+            self.assertAlmostEqual(getattr(state, attr), getattr(fresh, attr))
+
+        vwap = sum((b['high'] + b['low'] + b['close']) / 3 * b['volume'] for b in bars)
+        self.assertAlmostEqual(state.vwap, vwap / sum(b['volume'] for b in bars))
+        self.assertAlmostEqual(state.avg_volume, sum(b['volume'] for b in bars[-10:]) / 10)
+
+    def test_indicators_rebuild_on_revised_history(self):
+        """Test a series that no longer contains the last seen bar is replayed."""
+        bars = self._bars(20)
+        self.agent.indicators.sync('NIFTY', bars)
+        revised = self._bars(30)[20:]
+        revised[0]['time'] = bars[-1]['time'].replace(second=30)
+        state = self.agent.indicators.sync('NIFTY', bars[:-1] + revised)
+        self.assertEqual(state.bars, 29)
+
+    def test_indicators_rebuild_without_timestamps(self):
+        """Test bars without a time field are replayed fresh rather than stacked on old state."""
+        bars = [{k: v for k, v in bar.items() if k != 'time'} for bar in self._bars(20)]
+        self.agent.indicators.sync('NIFTY', bars)
+        state = self.agent.indicators.sync('NIFTY', bars)
+        fresh = self.agent.indicators.replay('BANKNIFTY', bars)
+
+        self.assertEqual(state.bars, 20)
+        self.assertEqual(state.rsi_state.changes, fresh.rsi_state.changes)
+        self.assertAlmostEqual(state.vwap, fresh.vwap)
+
 
 class TestSwingStrategyAgent(unittest.TestCase):
     """Test SwingStrategyAgent."""
@@ -71,6 +203,63 @@ class TestSwingStrategyAgent(unittest.TestCase):
         self.assertEqual(result['resistance'], 110)
         self.assertEqual(result['support'], 88)
 
+    def test_indicator_state_persists_across_runs(self):
+        """Test a new agent resumes from saved state and matches a full recompute."""
+        import shutil
+        import tempfile
+        from datetime import date, timedelta
+
+        state_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, state_dir, ignore_errors=True)
+        bars = [
+            {
+                'date': date(2025, 1, 1) + timedelta(days=i),
+                'high': 101 + i % 9, 'low': 97 + i % 4,
+                'close': 99 + (i * 7) % 13, 'volume': 1000 + (i * 53) % 700
+            }
+            for i in range(60)
+        ]
+
+        SwingStrategyAgent(state_dir=state_dir).indicators.sync('NIFTY', bars[:55])
+        resumed = SwingStrategyAgent(state_dir=state_dir)
+        state = resumed.indicators.sync('NIFTY', bars[55:])
+        fresh = SwingIndicators()
+        for bar in bars:
+            fresh.update(bar)
+
+        self.assertEqual(state.bars, 60)
+        self.assertEqual(state.ema(20), fresh.ema(20))
+        self.assertEqual(state.ema(50), fresh.ema(50))
+        self.assertAlmostEqual(state.rsi, fresh.rsi)
+        self.assertEqual(state.support_resistance(), self.agent.calculate_support_resistance(bars))
+
+    def test_gap_after_persisted_state_rebuilds(self):
+        """Test bars that skip past the saved state rebuild it instead of bridging the gap."""
+        import shutil
+        import tempfile
+        from datetime import date, timedelta
+
+        state_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, state_dir, ignore_errors=True)
+        bars = [
+            {
+                'date': date(2025, 1, 1) + timedelta(days=i),
+                'high': 101 + i % 9, 'low': 97 + i % 4,
+                'close': 99 + (i * 7) % 13, 'volume': 1000 + (i * 53) % 700
+            }
+            for i in range(90)
+        ]
+
+        SwingStrategyAgent(state_dir=state_dir).indicators.sync('NIFTY', bars[:55])
+        state = SwingStrategyAgent(state_dir=state_dir).indicators.sync('NIFTY', bars[65:])
+        fresh = SwingIndicators()
+        for bar in bars[65:]:
+            fresh.update(bar)
+
+        self.assertEqual(state.bars, 25)
+        self.assertEqual(state.ema(20), fresh.ema(20))
+        self.assertAlmostEqual(state.rsi, fresh.rsi)
+
 
 class TestSentimentScout(unittest.TestCase):
     """Test SentimentScout."""
@@ -82,6 +271,72 @@ class TestSentimentScout(unittest.TestCase):
         """Test neutral sentiment."""
         sentiment = self.scout.get_sentiment("NIFTY")
         self.assertIn(sentiment, ['BULLISH', 'BEARISH', 'NEUTRAL'])
+    
+    def test_analyze_async_matches_analyze(self):
+        """Test the native async path scores sentiment like the sync one."""
+        sentiment = {'fii_net_flow': 900, 'global_cues': {'sgx_nifty': 80}}
+        with patch.object(self.scout, '_mock_fii_flows', return_value={'fii_net_flow': 0}):
+            sync = self.scout.analyze("NIFTY", sentiment_data=sentiment)
+            result = asyncio.run(self.scout.analyze_async("NIFTY", sentiment_data=sentiment))
+        
+        self.assertEqual((result.signal, result.confidence), (sync.signal, sync.confidence))
+        self.assertEqual(result.signal, "BUY")
+    
+    def test_fetch_failure_reaches_retry_not_cache(self):
+        """Test a failed FII fetch is retried instead of caching a zero placeholder."""
+        flows = {'fii_net_flow': 900, 'dii_net_flow': 100}
+        with patch.object(self.scout, '_mock_fii_flows', side_effect=[RuntimeError('NSE down'), flows]), \
+                patch('utils.decorators.time.sleep'):
+            self.assertEqual(self.scout.fetch_fii_flows(), flows)
+        self.assertEqual(self.scout.cache.get('fii_flows'), flows)
+
+
+class TestMainDecisionAgent(unittest.TestCase):
+    """Test MainDecisionAgent."""
+    
+    def setUp(self):
+        self.responses = [
+            AgentResponse(name, 90, "BUY", "", {}, datetime.now(), "INTRADAY")
+            for name in ('OptionsChainAnalyzer', 'IntradayStrategyAgent')
+        ]
+    
+    def test_missing_agents_redistribute_or_count_as_hold(self):
+        """Test missing agents' weight is spread over the rest or counted as neutral."""
+        missing = ['SentimentScout']
+        redistribute = MainDecisionAgent(missing_agent_policy='redistribute')
+        neutral = MainDecisionAgent(missing_agent_policy='neutral')
+        
+        full = redistribute.aggregate(self.responses, missing_agents=[])
+        partial = redistribute.aggregate(self.responses, missing_agents=missing)
+        damped = neutral.aggregate(self.responses, missing_agents=missing)
+        
+        self.assertAlmostEqual(partial.confidence, full.confidence)
+        self.assertLess(damped.confidence, partial.confidence)
+        self.assertEqual(partial.metadata['missing_agents'], ['SentimentScout'])
+        self.assertLess(partial.metadata['weight_coverage'], 1.0)
+    
+    def test_no_trade_without_risk_manager_or_coverage(self):
+        """Test a lone confident agent can't trade past a missing RiskManager or thin coverage."""
+        agent = MainDecisionAgent(missing_agent_policy='redistribute', min_weight_coverage=0.6)
+        lone = self.responses[:1]
+        
+        no_risk = agent.aggregate(lone, missing_agents=['RiskManager'])
+        self.assertGreater(no_risk.metadata['composite_probability'], 0.9)
+        self.assertEqual(no_risk.signal, 'NO_SIGNAL')
+        self.assertLess(no_risk.confidence, 50)
+        self.assertFalse(agent.should_execute(no_risk))
+        
+        # Without an explicit list, agents missing from the responses count as missing
+        implicit = agent.aggregate(self.responses)
+        self.assertEqual(implicit.metadata['missing_agents'], ['RiskManager', 'SentimentScout', 'SwingStrategyAgent'])
+        self.assertEqual(implicit.signal, 'NO_SIGNAL')
+        
+        thin = agent.aggregate(lone, missing_agents=['IntradayStrategyAgent', 'SwingStrategyAgent', 'SentimentScout'])
+        self.assertLess(thin.metadata['weight_coverage'], 0.6)
+        self.assertEqual(thin.signal, 'NO_SIGNAL')
+        
+        covered = agent.aggregate(self.responses, missing_agents=['SentimentScout'])
+        self.assertEqual(covered.signal, 'BUY')
 
 
 class TestRiskManager(unittest.TestCase):
@@ -98,5 +353,127 @@ class TestRiskManager(unittest.TestCase):
         self.assertFalse(valid)
 
 
+class TestAgentRunner(unittest.TestCase):
+    """Test AgentRunner."""
+    
+    def setUp(self):
+        self.specs = {
+            'SentimentScout': (SentimentScout, {}),
+            'RiskManager': (RiskManager, {'max_exposure': 100000}),
+        }
+    
+    def test_runs_agents_from_snapshot(self):
+        """Test every agent returns a response for the symbol."""
+        runner = AgentRunner(self.specs, mode='inline')
+        self.addCleanup(runner.close)
+        sentiment = {'fii_net_flow': 500, 'dii_net_flow': 200}
+        with MarketSnapshot.build({}, {'current_price': 22000}, sentiment) as snapshot:
+            futures = runner.submit_all('NIFTY', snapshot)
+            responses = {name: future.result() for future, name in futures.items()}
+        
+        self.assertEqual(set(responses), set(self.specs))
+        self.assertEqual(responses['RiskManager'].agent_name, 'RiskManager')
+    
+    def test_process_mode_routes_only_cpu_bound_agents(self):
+        """Test I/O-bound and stateful agents stay in-process."""
+        specs = dict(self.specs, SwingStrategyAgent=(SwingStrategyAgent, {}))
+        runner = AgentRunner(specs, mode='process', max_processes=1)
+        self.addCleanup(runner.close)
+        
+        self.assertEqual(runner.route('SwingStrategyAgent'), 'process')
+        self.assertEqual(runner.route('SentimentScout'), 'thread')
+        self.assertEqual(runner.route('RiskManager'), 'thread')
+    
+    def test_process_workers_survive_ctrl_c(self):
+        """Test SIGINT (Ctrl-C hits the whole process group) doesn't break worker pools."""
+        specs = dict(self.specs, SwingStrategyAgent=(SwingStrategyAgent, {}))
+        runner = AgentRunner(specs, mode='process', max_processes=1)
+        self.addCleanup(runner.close)
+        
+        with MarketSnapshot.build({}, {'current_price': 22000}, {}) as snapshot:
+            runner.submit('SwingStrategyAgent', 'NIFTY', snapshot).result(timeout=30)
+            for pid in list(runner._processes[0]._processes):
+                os.kill(pid, signal.SIGINT)
+            time.sleep(0.2)
+            response = runner.submit('SwingStrategyAgent', 'NIFTY', snapshot).result(timeout=30)
+        self.assertEqual(response.agent_name, 'SwingStrategyAgent')
+
+
+class TestTradingOrchestratorScan(unittest.TestCase):
+    """Test the pipelined multi-symbol scan."""
+    
+    def setUp(self):
+        from main_agent import TradingOrchestrator
+        
+        config = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.yaml')
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(workdir)
+        
+        self.orchestrator = TradingOrchestrator(config)
+        self.addCleanup(self.orchestrator.shutdown)
+    
+    def test_scan_streams_every_symbol(self):
+        """Test each symbol is yielded once with every agent's response."""
+        symbols = [f"SYM{i}" for i in range(20)] + ['sym0']
+        results = dict(self.orchestrator.iter_scan(symbols, max_concurrent_symbols=4))
+        
+        self.assertEqual(set(results), {f"SYM{i}" for i in range(20)})
+        for result in results.values():
+            self.assertEqual(len(result['agent_responses']), 5)
+    
+    def test_slow_agent_misses_symbol_deadline(self):
+        """Test a symbol is decided without agents that overrun its deadline."""
+        scout = self.orchestrator.agents['SentimentScout']
+        analyze = scout.analyze
+        scout.analyze = lambda *args: (time.sleep(0.5), analyze(*args))[1]
+        
+        started = time.monotonic()
+        results = dict(self.orchestrator.iter_scan(['NIFTY', 'BANKNIFTY'], decision_deadline=0.1))
+        
+        self.assertLess(time.monotonic() - started, 0.4)
+        for result in results.values():
+            names = {r['agent_name'] for r in result['agent_responses']}
+            self.assertNotIn('SentimentScout', names)
+            self.assertEqual(len(names), 4)
+            self.assertEqual(result['decision']['metadata']['missing_agents'], ['SentimentScout'])
+    
+    def test_agent_budget_bounds_decision_and_late_result_is_kept(self):
+        """Test an agent's budget caps decision latency and its late answer is recorded."""
+        self.orchestrator.agent_budgets = {'SentimentScout': 0.1}
+        scout = self.orchestrator.agents['SentimentScout']
+        analyze = scout.analyze
+        scout.analyze = lambda *args: (time.sleep(0.3), analyze(*args))[1]
+        
+        started = time.monotonic()
+        result = self.orchestrator.analyze_symbol('NIFTY')
+        self.assertLess(time.monotonic() - started, 0.25)
+        self.assertLess(result['decision']['metadata']['weight_coverage'], 1.0)
+        
+        time.sleep(0.4)
+        self.assertEqual([r['agent_name'] for r in self.orchestrator.late_results], ['SentimentScout'])
+    
+    def test_open_position_blocks_new_trade_until_squared_off(self):
+        """Test rescans don't stack positions and square_off closes intraday ones."""
+        buy = AgentResponse('MainDecisionAgent', 90, 'BUY', '', {}, datetime.now(), 'INTRADAY')
+        patcher = patch.object(self.orchestrator.main_agent, 'aggregate', return_value=buy)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        option_chain = {'spot_price': 18000}
+        
+        for _ in range(3):
+            self.orchestrator._decide('NIFTY', 'INTRADAY', option_chain, [])
+        history = self.orchestrator.trade_history
+        self.assertEqual(len(history.get_trades(symbol='NIFTY', status='OPEN')), 1)
+        
+        result = self.orchestrator.square_off('INTRADAY')
+        self.assertEqual(len(result['pnl']), 1)
+        self.assertEqual(history.get_trades(status='OPEN'), [])
+        
+        self.orchestrator._decide('NIFTY', 'INTRADAY', option_chain, [])
+        self.assertEqual(len(history.get_trades(symbol='NIFTY', status='OPEN')), 1)
+
+
 if __name__ == '__main__':
     unittest.main()
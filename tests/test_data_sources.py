@@ -0,0 +1,217 @@
+"""Tests for data sources."""
+import pickle
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from multiprocessing import resource_tracker
+from unittest.mock import patch
+
+import numpy as np
+
+from data_sources.bar_archive import RECORD_SIZE, BarArchive
+from data_sources.bars import BarSeries
+from data_sources.nse_data import NSEDataFetcher
+from data_sources.snapshot import MarketSnapshot
+
+
+class TestBarSeries(unittest.TestCase):
+    """Test BarSeries."""
+
+    def setUp(self):
+        self.start = datetime(2025, 1, 1, 9, 15)
+        self.records = [
+            {
+                'time': self.start + timedelta(minutes=i),
+                'open': 100.0 + i, 'high': 101.0 + i, 'low': 99.0 + i,
+                'close': 100.5 + i, 'volume': 1000 + i
+            }
+            for i in range(50)
+        ]
+        self.series = BarSeries.from_records(self.records)
+
+    def test_legacy_dict_access(self):
+        """Test bars read back as the dicts they were built from."""
+        self.assertEqual(len(self.series), 50)
+        self.assertEqual(self.series[0], self.records[0])
+        self.assertEqual(self.series[-1], self.records[-1])
+        self.assertEqual([c['close'] for c in self.series], [r['close'] for r in self.records])
+
+    def test_slices_share_memory_until_appended(self):
+        """Test windows are zero-copy and appending to one leaves the parent alone."""
+        window = self.series.tail(10)
+        self.assertTrue(np.shares_memory(window.close, self.series.close))
+        self.assertEqual(window[0], self.records[40])
+
+        window.append(self.start, 1, 1, 1, 1, 1)
+        self.assertEqual(len(window), 11)
+        self.assertEqual(len(self.series), 50)
+        self.assertFalse(np.shares_memory(window.close, self.series.close))
+        self.assertEqual(self.series[40], self.records[40])
+
+    def test_between_and_pickle(self):
+        """Test time-range windows and that pickling keeps only the stored bars."""
+        window = self.series.between(self.start + timedelta(minutes=5), self.start + timedelta(minutes=8))
+        self.assertEqual([bar['volume'] for bar in window], [1005, 1006, 1007])
+
+        restored = pickle.loads(pickle.dumps(window))
+        self.assertEqual(restored.to_records(), window.to_records())
+
+    def test_columns_are_read_only(self):
+        """Test column views cannot modify the series."""
+        with self.assertRaises(ValueError):
+            self.series.close[0] = 0.0
+
+
+class TestBarArchive(unittest.TestCase):
+    """Test BarArchive."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.archive = BarArchive(self.root)
+        self.start = datetime(2025, 1, 1, 23, 0)
+        self.bars = BarSeries.from_arrays(
+            [self.start + timedelta(minutes=i) for i in range(120)],
+            open=np.arange(120.0), high=np.arange(120.0) + 1,
+            low=np.arange(120.0) - 1, close=np.arange(120.0) + 0.5,
+            volume=np.arange(120) * 10
+        )
+
+    def test_round_trip_across_partitions(self):
+        """Test bars spanning midnight are split by day and read back intact."""
+        self.archive.write('NIFTY', '1min', self.bars)
+        self.assertEqual([p.stem for p in self.archive.partitions('NIFTY', '1min')], ['2025-01-01', '2025-01-02'])
+        self.assertEqual(self.archive.read('NIFTY', '1min').to_records(), self.bars.to_records())
+
+        window = self.archive.read('NIFTY', '1min', self.start, self.start + timedelta(minutes=30))
+        self.assertEqual(len(window), 30)
+        self.assertFalse(window.close.flags.owndata)  # Served straight from the mapping
+
+    def test_overlapping_write_merges_and_torn_tail_is_ignored(self):
+        """Test rewriting stored bars replaces them and a partial record is skipped."""
+        self.archive.write('NIFTY', '1min', self.bars[:30])
+        path = self.archive.partitions('NIFTY', '1min')[0]
+        with open(path, 'ab') as f:
+            f.write(b'\x00' * (RECORD_SIZE // 2))
+        self.assertEqual(len(self.archive.read('NIFTY', '1min')), 30)
+
+        self.archive.write('NIFTY', '1min', self.bars[30:])
+        self.assertEqual(path.stat().st_size % RECORD_SIZE, 0)
+
+        revised = BarSeries.from_records([dict(self.bars[10], close=-1.0)])
+        self.archive.write('NIFTY', '1min', revised)
+        stored = self.archive.read('NIFTY', '1min')
+        self.assertEqual(len(stored), 120)
+        self.assertEqual(stored[10]['close'], -1.0)
+
+    def test_fetcher_only_fetches_missing_ranges(self):
+        """Test the fetcher fills gaps around what the archive already covers."""
+        fetcher = NSEDataFetcher(archive_dir=self.root)
+        fetched = []
+        fetch = fetcher._fetch_bars
+        fetcher._fetch_bars = lambda *args: fetched.append(args[2:4]) or fetch(*args)
+
+        day = datetime(2025, 1, 1)
+        fetcher.get_bars('NIFTY', '1d', day, day + timedelta(days=10))
+        first = fetcher.get_bars('NIFTY', '1d', day, day + timedelta(days=10))
+        fetcher.get_bars('NIFTY', '1d', day - timedelta(days=5), day + timedelta(days=12))
+
+        self.assertEqual(fetched, [
+            (day, day + timedelta(days=10)),
+            (day - timedelta(days=5), day),
+            (day + timedelta(days=10), day + timedelta(days=12)),
+        ])
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(fetcher.get_bars('NIFTY', '1d', day - timedelta(days=5), day + timedelta(days=12))), 17)
+
+
+
+class TestNSEDataFetcher(unittest.TestCase):
+    """Test NSEDataFetcher."""
+
+    def test_restart_warms_last_good_from_one_namespace(self):
+        """Test responses are persisted once and both caches start warm after a restart."""
+        import sqlite3
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_db = f"{tmp}/cache.db"
+            fetcher = NSEDataFetcher(cache_db=cache_db)
+            chain = fetcher.get_option_chain('NIFTY')
+            fetcher.close()
+
+            with sqlite3.connect(cache_db) as conn:
+                namespaces = {row[0] for row in conn.execute("SELECT DISTINCT namespace FROM cache_entries")}
+            self.assertEqual(namespaces, {'nse'})
+
+            restarted = NSEDataFetcher(cache_db=cache_db)
+            try:
+                self.assertEqual(restarted.last_good.get_stale('option_chain:NIFTY')['spot_price'], chain['spot_price'])
+            finally:
+                restarted.close()
+
+
+class TestMarketSnapshot(unittest.TestCase):
+    """Test MarketSnapshot."""
+
+    def setUp(self):
+        start = datetime(2025, 1, 1, 9, 15)
+        self.bars = BarSeries.from_records([
+            {'time': start + timedelta(minutes=i), 'open': 1.0 * i, 'high': 2.0 * i,
+             'low': 0.5 * i, 'close': 1.5 * i, 'volume': i}
+            for i in range(30)
+        ])
+        self.option_chain = {
+            'spot_price': 22000.0, 'strikes': [21900, 22000, 22100],
+            'call_oi': [10, 20, 30], 'expiry_dates': ['2025-01-09'],
+        }
+        self.market_data = {'ohlc_intraday': self.bars, 'support_levels': [21800.0]}
+        self.sentiment_data = {'fii_net_flow': 300, 'global_cues': {'sgx_nifty': 40}}
+
+    def test_views_match_inputs_and_are_read_only(self):
+        """Test every section reads back as built and cannot be modified."""
+        with MarketSnapshot.build(self.option_chain, self.market_data, self.sentiment_data) as snapshot:
+            chain = snapshot.option_chain
+            self.assertEqual(list(chain['strikes']), [21900, 22000, 22100])
+            self.assertEqual(chain['expiry_dates'], ['2025-01-09'])
+            self.assertEqual(snapshot.market_data['ohlc_intraday'].to_records(), self.bars.to_records())
+            self.assertEqual(snapshot.sentiment_data['global_cues'], {'sgx_nifty': 40})
+
+            with self.assertRaises(ValueError):
+                chain['strikes'][0] = 0
+            with self.assertRaises(TypeError):
+                chain['spot_price'] = 0
+
+    def test_pickles_as_handle_and_unlinks_on_close(self):
+        """Test a pickled snapshot is a small handle and the owner frees the block."""
+        from multiprocessing import shared_memory
+
+        snapshot = MarketSnapshot.build(self.option_chain, self.market_data, self.sentiment_data)
+        payload = pickle.dumps(snapshot)
+        self.assertLess(len(payload), 200)
+
+        attached = pickle.loads(payload)
+        self.assertEqual(list(attached.market_data['ohlc_intraday'].close), list(self.bars.close))
+        attached.close()
+
+        snapshot.close()
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=snapshot.name)
+
+    @unittest.skipIf(sys.version_info >= (3, 13), "attach uses track=False")
+    def test_attach_leaves_tracker_alone(self):
+        """Test attaching never patches the tracker and only unregisters from a foreign one."""
+        with MarketSnapshot.build(self.option_chain, self.market_data, self.sentiment_data) as snapshot:
+            register = resource_tracker.register
+            with patch.object(resource_tracker, 'unregister') as unregister:
+                MarketSnapshot.attach(snapshot.name).close()
+                unregister.assert_not_called()  # Same tracker as the owner
+
+                with patch('data_sources.snapshot._tracker_id', return_value=(0, 0)):
+                    MarketSnapshot.attach(snapshot.name).close()
+                unregister.assert_called_once()
+            self.assertIs(resource_tracker.register, register)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,331 @@
+"""Tests for database module."""
+import json
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from database.decision_index import SegmentIndex
+from database.decision_logger import DecisionLogger
+from database.trade_history import CLOSE_TRADE_SQL, QUEUED_INSERT_SQL, TradeHistory
+
+
+class TestDecisionLogger(unittest.TestCase):
+    """Test DecisionLogger journal."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.logger = DecisionLogger(Path(self.tmpdir) / "decisions")
+
+    def tearDown(self):
+        self.logger.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_log_and_get_newest_first(self):
+        """Test decisions come back newest first and filtered."""
+        for i in range(5):
+            self.logger.log_decision("NIFTY", {'signal': 'BUY'}, timestamp=f"2026-01-0{i + 1}T10:00:00")
+        self.logger.log_decision("BANKNIFTY", {'signal': 'SELL'}, timestamp="2026-01-03T11:00:00")
+
+        result = self.logger.get_decisions(symbol="NIFTY", limit=2)
+        self.assertEqual([d['timestamp'][:10] for d in result], ['2026-01-05', '2026-01-04'])
+
+        result = self.logger.get_decisions(start_date="2026-01-03", end_date="2026-01-03T23:59:59")
+        self.assertEqual({d['symbol'] for d in result}, {'NIFTY', 'BANKNIFTY'})
+
+    def test_size_rotation(self):
+        """Test segments rotate once they reach the size limit."""
+        self.logger.max_segment_bytes = 200
+        for i in range(10):
+            self.logger.log_decision("NIFTY", {'signal': 'HOLD', 'i': i})
+
+        self.assertGreater(len(self.logger.segments()), 1)
+        self.assertEqual(len(self.logger.get_decisions(limit=100)), 10)
+
+    def test_torn_line_is_skipped(self):
+        """Test a partially written line does not break reads or later appends."""
+        self.logger.log_decision("NIFTY", {'signal': 'BUY'})
+        segment = self.logger.segments()[-1]
+        self.logger.close()
+        with open(segment, 'ab') as f:
+            f.write(b'{"timestamp": "2026-')
+
+        self.logger.log_decision("NIFTY", {'signal': 'SELL'})
+        signals = [d['signal'] for d in self.logger.iter_decisions()]
+        self.assertEqual(signals, ['BUY', 'SELL'])
+
+    def test_compact_merges_closed_days(self):
+        """Test compaction merges a past day's segments into one."""
+        log_dir = self.logger.log_dir
+        for seq, ts in enumerate(["2026-01-02T10:00:00", "2026-01-02T09:00:00"]):
+            path = log_dir / f"20260102-{seq:04d}.jsonl"
+            path.write_text(json.dumps({'timestamp': ts, 'symbol': 'NIFTY'}) + '\n')
+
+        stats = self.logger.compact()
+
+        self.assertEqual(stats['days_compacted'], 1)
+        self.assertEqual([p.name for p in self.logger.segments()], ["20260102-0000.jsonl"])
+        timestamps = [d['timestamp'] for d in self.logger.iter_decisions()]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_sidecar_index_skips_other_symbols(self):
+        """Test the sparse index prunes blocks and survives a restart."""
+        self.logger.index_block_size = 4
+        self.logger.close()
+        for i in range(20):
+            symbol = "NIFTY" if i < 16 else "BANKNIFTY"
+            self.logger.log_decision(symbol, {'i': i}, timestamp=f"2026-01-01T10:{i:02d}:00")
+        self.logger.close()
+
+        segment = self.logger.segments()[-1]
+        index = SegmentIndex.load(segment)
+        self.assertEqual(index.count, 20)
+        self.assertEqual(len(list(index.block_ranges(symbol="BANKNIFTY"))), 1)
+
+        reopened = DecisionLogger(self.logger.log_dir)
+        result = reopened.get_decisions(symbol="NIFTY", limit=3)
+        self.assertEqual([d['i'] for d in result], [15, 14, 13])
+
+    def test_out_of_order_timestamps(self):
+        """Test segments with back-dated entries still return newest first."""
+        for ts in ["2026-01-03", "2026-01-01", "2026-01-05", "2026-01-02"]:
+            self.logger.log_decision("NIFTY", {}, timestamp=ts)
+
+        result = self.logger.get_decisions(limit=3)
+        self.assertEqual([d['timestamp'] for d in result], ["2026-01-05", "2026-01-03", "2026-01-02"])
+
+    def test_legacy_file_imported_on_first_start(self):
+        """Test an old decisions.json is carried into an empty journal exactly once."""
+        legacy = [{'timestamp': f"2026-01-0{i + 1}", 'symbol': 'NIFTY', 'i': i} for i in range(3)]
+        (Path(self.tmpdir) / "decisions.json").write_text(json.dumps(legacy))
+
+        journal = DecisionLogger(Path(self.tmpdir) / "journal")
+        self.assertEqual([d['i'] for d in journal.get_decisions()], [2, 1, 0])
+        journal.close()
+
+        reopened = DecisionLogger(journal.log_dir)
+        self.assertEqual(len(reopened.get_decisions()), 3)
+        reopened.close()
+
+
+class TestTradeHistory(unittest.TestCase):
+    """Test TradeHistory database."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.history = TradeHistory(Path(self.tmpdir) / "trades.db")
+
+    def tearDown(self):
+        self.history.close()
+        shutil.rmtree(self.tmpdir)
+
+    def _trade(self, symbol="NIFTY", **overrides):
+        trade = {
+            'symbol': symbol,
+            'signal': 'BUY',
+            'entry_price': 100.0,
+            'quantity': 50,
+            'confidence': 75.0,
+        }
+        trade.update(overrides)
+        return trade
+
+    def test_log_close_and_stats(self):
+        """Test a trade round trip updates stats."""
+        trade_id = self.history.log_trade(self._trade())
+        self.assertTrue(self.history.close_trade(trade_id, 110.0, 500.0))
+
+        trades = self.history.get_trades(status='CLOSED')
+        self.assertEqual(trades[0]['id'], trade_id)
+
+        stats = self.history.get_stats()
+        self.assertEqual(stats['total_trades'], 1)
+        self.assertEqual(stats['wins'], 1)
+        self.assertEqual(stats['total_pnl'], 500.0)
+
+    def test_stats_summary_tracks_updates_and_deletes(self):
+        """Test the trigger-maintained summary matches a full aggregate."""
+        ids = [self.history.log_trade(self._trade(pnl=p)) for p in (100.0, -50.0, None)]
+        self.history.close_trade(ids[2], 120.0, 250.0)
+        self.history.close_trade(ids[0], 90.0, -30.0)
+        with self.history.db.writer() as conn:
+            conn.execute("DELETE FROM trades WHERE id = ?", (ids[1],))
+
+        stats = self.history.get_stats()
+        self.history.rebuild_stats()
+        self.assertEqual(stats, self.history.get_stats())
+        self.assertEqual((stats['total_trades'], stats['wins'], stats['losses']), (2, 1, 1))
+        self.assertEqual(stats['total_pnl'], 220.0)
+
+    def test_migrates_existing_database(self):
+        """Test a database created before migrations gains indexes and stats."""
+        legacy = Path(self.tmpdir) / "legacy.db"
+        with sqlite3.connect(legacy) as conn:
+            conn.execute('''
+                CREATE TABLE trades (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, symbol TEXT NOT NULL,
+                    signal TEXT NOT NULL, entry_price REAL NOT NULL, exit_price REAL, quantity INTEGER NOT NULL,
+                    pnl REAL, confidence REAL NOT NULL, strategy TEXT, status TEXT DEFAULT 'OPEN',
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute(
+                "INSERT INTO trades (timestamp, symbol, signal, entry_price, quantity, pnl, confidence) "
+                "VALUES ('2026-01-01', 'NIFTY', 'BUY', 100, 50, 75, 80)"
+            )
+        conn.close()
+
+        history = TradeHistory(legacy)
+        try:
+            self.assertEqual(history.get_stats()['total_pnl'], 75.0)
+            with history.db.reader() as conn:
+                plan = " ".join(row[3] for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT * FROM trades WHERE symbol = ? ORDER BY timestamp DESC LIMIT 5",
+                    ("NIFTY",)
+                ))
+            self.assertIn("idx_trades_symbol_ts", plan)
+        finally:
+            history.close()
+
+    def test_lookup_by_ids(self):
+        """Test primary-key lookups, including IDs beyond one chunk."""
+        ids = [self.history.log_trade(self._trade()) for _ in range(150)]
+
+        self.assertEqual(self.history.get_trade(ids[0])['id'], ids[0])
+        self.assertIsNone(self.history.get_trade(10_000))
+
+        found = self.history.get_trades_by_ids(ids[::2] + [10_000])
+        self.assertEqual(sorted(found), ids[::2])
+
+    def test_close_trades_in_bulk(self):
+        """Test many exits settle in one call."""
+        ids = [self.history.log_trade(self._trade()) for _ in range(5)]
+
+        closed = self.history.close_trades([(trade_id, 110.0, 500.0) for trade_id in ids])
+
+        self.assertEqual(closed, 5)
+        self.assertEqual(len(self.history.get_trades(status='OPEN')), 0)
+        self.assertEqual(self.history.get_stats()['total_pnl'], 2500.0)
+
+    def test_wal_mode(self):
+        """Test the database runs in WAL mode."""
+        with self.history.db.reader() as conn:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_concurrent_writers_and_readers(self):
+        """Test parallel threads share the pooled connections safely."""
+        errors = []
+
+        def work(symbol):
+            try:
+                for _ in range(20):
+                    self.history.log_trade(self._trade(symbol))
+                    self.history.get_trades(symbol=symbol)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(s,)) for s in ["NIFTY", "BANKNIFTY", "TCS", "INFY"]]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.history.get_stats()['total_trades'], 80)
+
+
+class TestWriteBehindTradeHistory(unittest.TestCase):
+    """Test TradeHistory in write-behind mode."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_file = Path(self.tmpdir) / "trades.db"
+        self.history = TradeHistory(self.db_file, write_behind=True)
+
+    def tearDown(self):
+        self.history.close()
+        shutil.rmtree(self.tmpdir)
+
+    def _trade(self):
+        return {'symbol': 'NIFTY', 'signal': 'BUY', 'entry_price': 100.0, 'quantity': 50, 'confidence': 80.0}
+
+    def test_ids_are_allocated_up_front(self):
+        """Test log_trade returns sequential IDs before the write commits."""
+        ids = [self.history.log_trade(self._trade()) for _ in range(50)]
+        self.assertEqual(ids, list(range(1, 51)))
+
+        self.assertTrue(self.history.flush(timeout=5, durable=True))
+        self.assertEqual(self.history.get_stats()['total_trades'], 50)
+
+    def test_reads_see_queued_writes(self):
+        """Test reads wait for queued inserts and updates."""
+        trade_id = self.history.log_trade(self._trade())
+        self.history.close_trade(trade_id, 90.0, -500.0)
+
+        trades = self.history.get_trades(status='CLOSED')
+        self.assertEqual([t['id'] for t in trades], [trade_id])
+
+    def test_close_flushes_and_ids_resume(self):
+        """Test shutdown drains the queue and a reopened database continues IDs."""
+        for _ in range(10):
+            self.history.log_trade(self._trade())
+        self.history.close()
+
+        self.history = TradeHistory(self.db_file, write_behind=True)
+        self.assertEqual(self.history.get_stats()['total_trades'], 10)
+        self.assertEqual(self.history.log_trade(self._trade()), 11)
+
+    def test_processes_never_share_ids(self):
+        """Test a second writer on the same database gets its own ID block."""
+        other = TradeHistory(self.db_file, write_behind=True)
+        direct = TradeHistory(self.db_file)
+        try:
+            ids = [self.history.log_trade(self._trade()), other.log_trade(self._trade())]
+            ids.append(direct.log_trade(self._trade()))
+            ids.append(self.history.log_trade(self._trade()))
+            self.assertEqual(len(set(ids)), 4)
+
+            self.assertTrue(self.history.flush(timeout=5))
+            self.assertTrue(other.flush(timeout=5))
+            self.assertEqual(self.history.get_stats()['total_trades'], 4)
+        finally:
+            other.close()
+            direct.close()
+
+    def test_dropped_write_is_reported(self):
+        """Test a write that can't land fails the barrier and names the trade."""
+        trade_id = self.history.log_trade(self._trade())
+        self.assertTrue(self.history.flush(timeout=5))
+
+        # Re-inserting an existing ID violates the primary key; no point retrying
+        self.history._writes.submit(QUEUED_INSERT_SQL, (trade_id, *TradeHistory._trade_params(self._trade())))
+        self.assertFalse(self.history.flush(timeout=5))
+        self.assertEqual(self.history.failed_inserts, {trade_id})
+        self.assertEqual(self.history._writes.failed, 1)
+        self.assertEqual(self.history.get_stats()['total_trades'], 1)
+
+        # Reported once: later barriers only cover new drops
+        self.history.log_trade(self._trade())
+        self.assertTrue(self.history.flush(timeout=5))
+
+    def test_dropped_close_can_be_retried(self):
+        """Test a dropped close update doesn't block closing the trade again."""
+        trade_id = self.history.log_trade(self._trade())
+        self.assertTrue(self.history.flush(timeout=5))
+
+        # Wrong parameter count: a ProgrammingError, so it's dropped straight away
+        self.history._writes.submit(CLOSE_TRADE_SQL, (None, 90.0, -500.0, trade_id))
+        self.assertFalse(self.history.flush(timeout=5))
+        self.assertEqual(self.history.failed_closes, {trade_id})
+        self.assertEqual(self.history.failed_inserts, set())
+
+        self.assertTrue(self.history.close_trade(trade_id, 90.0, -500.0))
+        self.assertTrue(self.history.flush(timeout=5))
+        self.assertEqual(self.history.get_trade(trade_id)['status'], 'CLOSED')
+
+
+if __name__ == '__main__':
+    unittest.main()
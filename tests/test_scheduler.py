@@ -0,0 +1,155 @@
+"""Tests for the daemon scheduler."""
+import threading
+import time
+import unittest
+from datetime import date, datetime, time as dtime
+from unittest.mock import Mock
+
+from scheduler import IST, Cadence, MarketScheduler, TradingHours, cadences_from_config
+
+
+def ist(*args):
+    return datetime(*args, tzinfo=IST)
+
+
+HOURS = TradingHours(dtime(9, 15), dtime(15, 30), dtime(14, 30), holidays=frozenset({date(2026, 10, 20)}))
+
+
+class FakeOrchestrator:
+    """Records scanned batches instead of running agents."""
+    
+    def __init__(self):
+        self.scans = []
+        self.flush = Mock()
+        self.square_off = Mock()
+    
+    def iter_scan(self, symbols, trade_type):
+        self.scans.append((trade_type, list(symbols)))
+        for symbol in symbols:
+            yield symbol, {}
+
+
+class TestTradingHours(unittest.TestCase):
+    """Test TradingHours."""
+    
+    def test_session_and_cutoff(self):
+        """Test open/close boundaries and the intraday cutoff."""
+        self.assertFalse(HOURS.is_open(ist(2026, 10, 16, 9, 14)))
+        self.assertTrue(HOURS.is_open(ist(2026, 10, 16, 9, 15)))
+        self.assertFalse(HOURS.is_open(ist(2026, 10, 16, 15, 30)))
+        self.assertTrue(HOURS.allows('INTRADAY', ist(2026, 10, 16, 14, 29)))
+        self.assertFalse(HOURS.allows('INTRADAY', ist(2026, 10, 16, 14, 30)))
+        self.assertTrue(HOURS.allows('SWING', ist(2026, 10, 16, 14, 30)))
+    
+    def test_weekends_and_holidays(self):
+        """Test closed days and next_open skipping them."""
+        self.assertFalse(HOURS.is_open(ist(2026, 10, 17, 11, 0)))  # Saturday
+        self.assertFalse(HOURS.is_open(ist(2026, 10, 20, 11, 0)))  # Holiday
+        # Friday after close -> Monday; Monday evening -> Wednesday (holiday Tuesday)
+        self.assertEqual(HOURS.next_open(ist(2026, 10, 16, 16, 0)), ist(2026, 10, 19, 9, 15))
+        self.assertEqual(HOURS.next_open(ist(2026, 10, 19, 16, 0)), ist(2026, 10, 21, 9, 15))
+        self.assertEqual(HOURS.next_open(ist(2026, 10, 19, 8, 0)), ist(2026, 10, 19, 9, 15))
+    
+    def test_converts_other_timezones(self):
+        """Test times in UTC are judged in IST."""
+        from datetime import timezone
+        self.assertTrue(HOURS.is_open(datetime(2026, 10, 16, 4, 0, tzinfo=timezone.utc)))  # 09:30 IST
+
+
+class TestMarketScheduler(unittest.TestCase):
+    """Test MarketScheduler."""
+    
+    def setUp(self):
+        self.orch = FakeOrchestrator()
+        self.now = ist(2026, 10, 16, 10, 0)
+        self.cadences = [
+            Cadence('NIFTY', 'INTRADAY', 60),
+            Cadence('BANKNIFTY', 'INTRADAY', 30),
+            Cadence('TCS', 'SWING', 900),
+        ]
+        self.scheduler = MarketScheduler(self.orch, HOURS, self.cadences, clock=lambda: self.now)
+    
+    def test_cadences_from_config(self):
+        """Test baskets, default intervals and per-symbol overrides."""
+        cadences = cadences_from_config({'daemon': {
+            'intraday': {'symbols': ['nifty', 'BANKNIFTY'], 'symbol_intervals': {'BANKNIFTY': 30}},
+            'swing': {'symbols': ['TCS'], 'interval_seconds': 600},
+        }})
+        self.assertEqual(
+            [(c.symbol, c.trade_type, c.interval) for c in cadences],
+            [('NIFTY', 'INTRADAY', 60.0), ('BANKNIFTY', 'INTRADAY', 30.0), ('TCS', 'SWING', 600.0)]
+        )
+    
+    def test_reschedule_skips_missed_slots(self):
+        """Test a cadence keeps its rhythm but doesn't replay missed scans."""
+        cadence = Cadence('NIFTY', 'INTRADAY', 60, next_due=100.0)
+        cadence.reschedule(110.0)
+        self.assertEqual(cadence.next_due, 160.0)
+        cadence.reschedule(500.0)
+        self.assertEqual(cadence.next_due, 560.0)
+    
+    def test_run_once_scans_only_due_symbols(self):
+        """Test due symbols are batched per trade type and rescheduled."""
+        self.assertEqual(self.scheduler.run_once(), 3)
+        self.assertEqual(self.orch.scans, [('INTRADAY', ['NIFTY', 'BANKNIFTY']), ('SWING', ['TCS'])])
+        self.assertEqual(self.scheduler.run_once(), 0)
+        self.assertGreater(self.scheduler.seconds_until_next(), 25)
+        
+        self.cadences[1].next_due = 0.0
+        self.assertEqual(self.scheduler.run_once(), 1)
+        self.assertEqual(self.orch.scans[-1], ('INTRADAY', ['BANKNIFTY']))
+    
+    def test_respects_cutoff_and_close(self):
+        """Test intraday stops at the cutoff and everything sleeps until the next session."""
+        self.now = ist(2026, 10, 16, 14, 45)
+        self.scheduler.run_once()
+        self.assertEqual(self.orch.scans, [('SWING', ['TCS'])])
+        
+        self.now = ist(2026, 10, 16, 16, 0)
+        for cadence in self.cadences:
+            cadence.next_due = 0.0
+        self.assertEqual(self.scheduler.run_once(), 0)
+        self.orch.square_off.assert_called_once_with('INTRADAY')
+        self.assertEqual(self.scheduler.seconds_until_next(), (ist(2026, 10, 19, 9, 15) - self.now).total_seconds())
+    
+    def test_squares_off_once_per_intraday_window(self):
+        """Test intraday positions are closed at the cutoff, once, and again the next day."""
+        self.scheduler.run_once()
+        self.orch.square_off.assert_not_called()
+        self.assertLessEqual(self.scheduler.seconds_until_next(), 30)
+        
+        self.now = ist(2026, 10, 16, 14, 29, 50)
+        self.assertAlmostEqual(self.scheduler.seconds_until_next(), 10, delta=0.1)  # Wakes at the cutoff
+        
+        self.now = ist(2026, 10, 16, 14, 30)
+        self.scheduler.run_once()
+        self.scheduler.run_once()
+        self.assertEqual(self.orch.square_off.call_count, 1)
+        
+        self.now = ist(2026, 10, 19, 10, 0)
+        self.scheduler.run_once()
+        self.now = ist(2026, 10, 19, 14, 31)
+        self.scheduler.run_once()
+        self.assertEqual(self.orch.square_off.call_count, 2)
+    
+    def test_scan_failure_still_reschedules(self):
+        """Test a failing scan is logged and doesn't spin."""
+        self.orch.iter_scan = Mock(side_effect=RuntimeError('boom'))
+        self.assertEqual(self.scheduler.run_once(), 0)
+        self.assertTrue(all(c.next_due > time.monotonic() for c in self.cadences))
+    
+    def test_run_stops_and_flushes(self):
+        """Test run returns promptly on stop and flushes on the way out."""
+        self.now = ist(2026, 10, 17, 11, 0)  # Closed: run would sleep until Monday
+        thread = threading.Thread(target=self.scheduler.run)
+        thread.start()
+        time.sleep(0.1)
+        self.scheduler.stop()
+        thread.join(timeout=2)
+        self.assertFalse(thread.is_alive())
+        self.orch.flush.assert_called()
+        self.orch.square_off.assert_called_once_with('INTRADAY')  # Leftovers from the last session
+
+
+if __name__ == '__main__':
+    unittest.main()
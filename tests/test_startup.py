@@ -0,0 +1,69 @@
+"""Startup cost regression tests for main_agent."""
+import os
+import re
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative `import main_agent` time allowed, in microseconds (~80-110ms measured;
+# eager imports of every agent, NumPy and smtplib took ~260ms). Wall-clock, so
+# only checked when TRADEBOT_TIMING_TESTS is set; the deferred-module check
+# below is the hard gate.
+IMPORT_BUDGET_US = 200_000
+
+# Modules a one-shot run should only load once it actually needs them
+DEFERRED = (
+    'numpy',
+    'yaml',
+    'smtplib',
+    'email.mime.multipart',
+    'pydantic',
+    'pydantic_settings',
+    'agents.options_chain_analyzer',
+    'agents.intraday_strategy_agent',
+    'agents.swing_strategy_agent',
+    'agents.sentiment_scout',
+    'agents.risk_manager',
+    'agents.main_decision_agent',
+    'data_sources.snapshot',
+    'execution.trade_executor',
+)
+
+_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def _import_profile():
+    """Run `python -X importtime -c 'import main_agent'`: {module: cumulative us}."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main_agent'],
+        cwd=ROOT, capture_output=True, text=True, timeout=60
+    )
+    if result.returncode != 0:
+        raise AssertionError(f"import main_agent failed:\n{result.stderr[-2000:]}")
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            profile[match.group(4)] = int(match.group(2))
+    return profile
+
+
+class TestStartup(unittest.TestCase):
+    """Test `import main_agent` stays cheap."""
+
+    def test_heavy_modules_are_deferred(self):
+        """Test agents, NumPy, YAML and mail modules aren't imported up front."""
+        loaded = set(_import_profile())
+        self.assertEqual(sorted(loaded & set(DEFERRED)), [])
+
+    @unittest.skipUnless(os.environ.get('TRADEBOT_TIMING_TESTS'), "set TRADEBOT_TIMING_TESTS=1 to run timing checks")
+    def test_import_budget(self):
+        """Test importing main_agent stays within its time budget (best of 3)."""
+        best = min(_import_profile()['main_agent'] for _ in range(3))
+        self.assertLess(best, IMPORT_BUDGET_US, f"import main_agent took {best / 1000:.0f}ms")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,18 @@
 """Tests for utils module."""
+import asyncio
+import os
+import tempfile
+import threading
+import time
 import unittest
+from unittest.mock import patch
 from utils.validators import validate_symbol, validate_order_params
 from utils.cache import DataCache
-from utils.decorators import retry_with_backoff
+from utils.cache_store import CacheStore
+from utils.decorators import hedged_request, retry_with_backoff
+from utils.resilience import (
+    CircuitBreaker, CircuitOpenError, EndpointGuard, RateLimitedError, TokenBucket, guarded
+)
 
 
 class TestValidators(unittest.TestCase):
@@ -40,4 +50,372 @@ class TestDataCache(unittest.TestCase):
         cache = DataCache(ttl_minutes=5)
         cache.set("key", "value")
         self.assertEqual(cache.get("key"), "value")
-    
\ No newline at end of file
+    
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted at max_entries."""
+        cache = DataCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.keys(), ["a", "c"])
+        self.assertEqual(cache.stats()["evictions"], 1)
+    
+    def test_byte_bound(self):
+        """Test entries are evicted to stay under max_bytes."""
+        cache = DataCache(max_bytes=100, size_fn=len)
+        cache.set("a", "x" * 60)
+        cache.set("b", "y" * 60)
+        self.assertEqual(cache.keys(), ["b"])
+        self.assertEqual(cache.stats()["bytes"], 60)
+    
+    def test_bounds_are_global_across_shards(self):
+        """Test a striped cache holds exactly max_entries, whatever the key hashes."""
+        cache = DataCache(max_entries=100, shards=16)
+        for i in range(100):
+            cache.set(f"key{i}", i)
+        self.assertEqual(len(cache), 100)
+        self.assertEqual(cache.stats()["evictions"], 0)
+        cache.set_many({f"more{i}": i for i in range(30)})
+        self.assertEqual(len(cache), 100)
+        self.assertEqual(cache.stats()["evictions"], 30)
+    
+    def test_stale_grace_and_sweep(self):
+        """Test expired entries stay available to get_stale until swept."""
+        cache = DataCache(ttl_minutes=0, stale_minutes=0.001)
+        cache.set("key", "value")
+        self.assertIsNone(cache.get("key"))
+        self.assertEqual(cache.get_stale("key"), "value")
+        time.sleep(0.07)
+        self.assertEqual(cache.sweep(), 1)
+        self.assertIsNone(cache.get_stale("key"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["expirations"]), (0, 1, 1))
+    
+    def test_get_many_set_many(self):
+        """Test bulk reads return only fresh keys."""
+        cache = DataCache()
+        cache.set_many({"a": 1, "b": 2, "c": 3})
+        cache.set("old", 4, ttl=0)
+        self.assertEqual(cache.get_many(["a", "c", "old", "missing"]), {"a": 1, "c": 3})
+        self.assertEqual(cache.stats()["misses"], 2)
+    
+    def test_expiry_uses_monotonic_clock(self):
+        """Test TTLs run on the monotonic clock."""
+        cache = DataCache(ttl_minutes=1, stale_minutes=5)
+        cache.set("key", "value")
+        with patch("utils.cache.monotonic", return_value=time.monotonic() + 61):
+            self.assertIsNone(cache.get("key"))
+        self.assertEqual(cache.get("key"), "value")
+    
+    def test_store_prewarms_after_restart(self):
+        """Test a new cache starts with the live entries persisted by the last one."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.db')
+            cache = DataCache(ttl_minutes=5, store=CacheStore(path, 'nse'))
+            cache.set("chain:NIFTY", {"spot_price": 22450.0})
+            cache.set_many({"bars:NIFTY": [1, 2, 3]}, ttl=60)
+            cache.set("expired", "gone", ttl=-1)
+            cache.close()
+            
+            restarted = DataCache(ttl_minutes=5, store=CacheStore(path, 'nse'))
+            other = DataCache(store=CacheStore(path, 'other'))
+            try:
+                self.assertEqual(restarted.get("chain:NIFTY"), {"spot_price": 22450.0})
+                self.assertEqual(restarted.get("bars:NIFTY"), [1, 2, 3])
+                self.assertAlmostEqual(restarted.get_ttl_remaining("bars:NIFTY"), 60, delta=5)
+                self.assertIsNone(restarted.get_stale("expired"))
+                self.assertEqual(len(other), 0)
+            finally:
+                restarted.close()
+                other.close()
+    
+    def test_store_serializes_on_writer_thread(self):
+        """Test set doesn't pickle on the caller's thread and unpicklable values stay in memory."""
+        from utils import cache_store
+        threads = []
+        encode = cache_store.encode
+        
+        def recording_encode(value):
+            threads.append(threading.current_thread().name)
+            return encode(value)
+        
+        with tempfile.TemporaryDirectory() as tmp, patch("utils.cache_store.encode", recording_encode):
+            cache = DataCache(store=CacheStore(os.path.join(tmp, 'cache.db'), 'nse'))
+            cache.set("chain:NIFTY", {"spot_price": 22450.0})
+            cache.set("callback", lambda: None)
+            self.assertTrue(cache.flush(timeout=5))
+            self.assertEqual(cache.get("callback")(), None)
+            self.assertEqual([key for key, *_ in cache.store.load(0)], ["chain:NIFTY"])
+            cache.close()
+        self.assertEqual(set(threads), {"write-behind"})
+    
+    def test_get_or_load_single_flight(self):
+        """Test concurrent misses on one key share a single load."""
+        cache = DataCache()
+        calls = []
+        start = threading.Barrier(8)
+        
+        def loader():
+            calls.append(1)
+            time.sleep(0.05)
+            return "chain"
+        
+        def worker(results):
+            start.wait()
+            results.append(cache.get_or_load("NIFTY", loader))
+        
+        results = []
+        threads = [threading.Thread(target=worker, args=(results,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(results, ["chain"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["coalesced"], 7)
+    
+    def test_get_or_load_error_not_cached(self):
+        """Test a failed load raises and the next call loads again."""
+        cache = DataCache()
+        
+        def fail():
+            raise ConnectionError("down")
+        
+        with self.assertRaises(ConnectionError):
+            cache.get_or_load("key", fail)
+        self.assertEqual(cache.get_or_load("key", lambda: "value"), "value")
+    
+    def test_stale_while_revalidate(self):
+        """Test an expired value is served while one background load refreshes it."""
+        cache = DataCache(stale_minutes=1)
+        cache.set("key", "old", ttl=0)
+        refreshed = threading.Event()
+        
+        def loader():
+            refreshed.set()
+            return "new"
+        
+        self.assertEqual(cache.get_or_load("key", loader, stale_ok=30), "old")
+        self.assertTrue(refreshed.wait(1))
+        time.sleep(0.01)
+        self.assertEqual(cache.get("key"), "new")
+    
+    def test_get_or_load_async_single_flight(self):
+        """Test coroutine loaders are shared per key on one event loop."""
+        cache = DataCache()
+        calls = []
+        
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "flows"
+        
+        async def run():
+            return await asyncio.gather(*(cache.get_or_load_async("fii", loader) for _ in range(5)))
+        
+        self.assertEqual(asyncio.run(run()), ["flows"] * 5)
+        self.assertEqual(len(calls), 1)
+
+
+
+class TestRetryWithBackoff(unittest.TestCase):
+    """Test retry decorator."""
+    
+    def test_async_retry_sleeps_on_event_loop(self):
+        """Test coroutine retries back off without holding threads."""
+        attempts = {}
+        
+        @retry_with_backoff(max_retries=3, base_delay=0.05)
+        async def fetch(i):
+            attempts[i] = attempts.get(i, 0) + 1
+            if attempts[i] < 2:
+                raise IOError("transient")
+            return i
+        
+        async def fetch_all():
+            results = await asyncio.gather(*(fetch(i) for i in range(500)))
+            return results, threading.active_count()
+        
+        threads_before = threading.active_count()
+        results, threads_during = asyncio.run(fetch_all())
+        self.assertEqual(results, list(range(500)))
+        self.assertEqual(set(attempts.values()), {2})
+        self.assertEqual(threads_during, threads_before)
+    
+    def test_async_retry_gives_up(self):
+        """Test the last failure propagates after max retries."""
+        @retry_with_backoff(max_retries=2, base_delay=0.01)
+        async def fetch():
+            raise IOError("down")
+        
+        with self.assertRaises(IOError):
+            asyncio.run(fetch())
+
+
+class TestHedgedRequest(unittest.TestCase):
+    """Test hedged request decorator."""
+    
+    def test_backup_wins_when_primary_stalls(self):
+        """Test a stalled first attempt is beaten by the backup."""
+        calls = []
+        
+        @hedged_request(initial_delay=0.05)
+        def fetch():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(1.0)
+                return 'slow'
+            return 'fast'
+        
+        started = time.monotonic()
+        self.assertEqual(fetch(), 'fast')
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(fetch.hedging.hedge_wins, 1)
+    
+    def test_budget_stops_hedging_when_everything_is_slow(self):
+        """Test backups stop once the retry budget is spent."""
+        @hedged_request(initial_delay=0.01, budget_ratio=0.1, budget_burst=2)
+        def fetch():
+            time.sleep(0.03)
+            return 'ok'
+        
+        for _ in range(10):
+            self.assertEqual(fetch(), 'ok')
+        
+        stats = fetch.hedging.stats()
+        self.assertLessEqual(stats['hedges'], 3)
+        self.assertGreater(stats['budget_denied'], 0)
+    
+    def test_unhedged_calls_stay_on_caller_thread(self):
+        """Test a call that can't be hedged doesn't hop to the hedge pool."""
+        @hedged_request(max_hedges=0)
+        def fetch():
+            return threading.current_thread()
+        
+        self.assertIs(fetch(), threading.current_thread())
+    
+    def test_pool_does_not_cap_concurrent_calls(self):
+        """Test calls beyond the hedge pool's size run at once, and counters stay exact."""
+        @hedged_request(initial_delay=5.0)
+        def fetch():
+            time.sleep(0.3)
+            return 'ok'
+        
+        threads = [threading.Thread(target=fetch) for _ in range(48)]
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        self.assertLess(time.monotonic() - started, 0.55)
+        self.assertEqual(fetch.hedging.stats()['calls'], 48)
+    
+    def test_async_backup_wins_and_loser_is_cancelled(self):
+        """Test coroutine attempts race and the loser is cancelled."""
+        cancelled = []
+        
+        @hedged_request(initial_delay=0.05)
+        async def fetch(delays):
+            delay = delays.pop(0)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+        
+        async def run():
+            result = await fetch([1.0, 0.0])
+            await asyncio.sleep(0)
+            return result
+        
+        self.assertEqual(asyncio.run(run()), 0.0)
+        self.assertEqual(cancelled, [1.0])
+
+
+class TestEndpointGuard(unittest.TestCase):
+    """Test circuit breaker, quota and stale fallback."""
+    
+    def test_breaker_opens_and_serves_stale(self):
+        """Test repeated failures open the circuit and the last good value is served."""
+        guard = EndpointGuard('chain', DataCache(), rate=100, burst=100, failure_threshold=2)
+        calls = []
+        
+        def fail():
+            calls.append(1)
+            raise ConnectionError("down")
+        
+        self.assertEqual(guard.call('k', lambda: 'good'), 'good')
+        self.assertEqual(guard.call('k', fail), 'good')
+        self.assertEqual(guard.call('k', fail), 'good')
+        self.assertEqual(guard.breaker.state, CircuitBreaker.OPEN)
+        
+        # Open: upstream isn't called at all
+        self.assertEqual(guard.call('k', fail), 'good')
+        self.assertEqual(len(calls), 2)
+        with self.assertRaises(CircuitOpenError):
+            guard.call('other', fail)
+    
+    def test_half_open_recovery(self):
+        """Test a successful trial call closes the circuit."""
+        breaker = CircuitBreaker('chain', failure_threshold=1, recovery_timeout=0.05)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+    
+    def test_quota_falls_back_to_stale(self):
+        """Test calls beyond the burst are refused without waiting and served stale."""
+        guard = EndpointGuard('bars', DataCache(), rate=0.1, burst=2, max_wait=0.01)
+        self.assertEqual(guard.call('k', lambda: 1), 1)
+        self.assertEqual(guard.call('k', lambda: 2), 2)
+        self.assertEqual(guard.call('k', lambda: 3), 2)
+        with self.assertRaises(RateLimitedError):
+            guard.call('other', lambda: 4)
+        self.assertEqual(guard.fallbacks, 1)
+    
+    def test_failures_back_off_rate(self):
+        """Test the rate halves on failure and recovers on success."""
+        guard = EndpointGuard('x', DataCache(), rate=10, burst=10, failure_threshold=100)
+        with self.assertRaises(ValueError):
+            guard.call(None, self._raise)
+        self.assertEqual(guard.bucket.rate, 5)
+        guard.call(None, lambda: None)
+        self.assertEqual(guard.bucket.rate, 6)
+    
+    def test_retry_stops_on_open_circuit(self):
+        """Test retry_with_backoff doesn't retry locally refused calls."""
+        calls = []
+        
+        class Source:
+            def __init__(self):
+                self.guards = {'x': EndpointGuard('x', DataCache(), rate=100, burst=100, failure_threshold=1)}
+            
+            @retry_with_backoff(max_retries=3, base_delay=0.01)
+            @guarded('x', key='x:{symbol}')
+            def fetch(self, symbol):
+                calls.append(symbol)
+                raise ConnectionError("down")
+        
+        with self.assertRaises(CircuitOpenError):
+            Source().fetch('NIFTY')
+        self.assertEqual(calls, ['NIFTY'])
+    
+    def test_token_bucket_refills(self):
+        """Test tokens come back at the configured rate."""
+        bucket = TokenBucket(rate=100, capacity=1)
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        self.assertTrue(bucket.acquire(timeout=0.1))
+    
+    @staticmethod
+    def _raise():
+        raise ValueError("bad")
@@ -1,8 +1,19 @@
-"""Utils package for tradebot."""
-from .logger import get_logger, setup_logging
-from .decorators import retry_with_backoff, validate_symbol
-from .validators import validate_order_params, validate_symbol
-from .cache import DataCache
+"""Utils package for tradebot.
+
+Names are imported from their submodules on first access (PEP 562), so
+importing one utility doesn't pull in the rest.
+"""
+from .lazy import lazy_exports
+
+# Exported name -> submodule defining it
+_EXPORTS = {
+    'get_logger': 'logger',
+    'setup_logging': 'logger',
+    'retry_with_backoff': 'decorators',
+    'validate_symbol': 'validators',
+    'validate_order_params': 'validators',
+    'DataCache': 'cache',
+}
 
 __all__ = [
     'get_logger',
@@ -12,3 +23,5 @@ __all__ = [
     'validate_order_params',
     'DataCache',
 ]
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -1,93 +1,660 @@
 """Data caching utilities."""
-from datetime import datetime, timedelta
-from typing import Any, Optional, Dict, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import functools
+import inspect
+import logging
+import sys
 import threading
+import time
+import weakref
+
+if TYPE_CHECKING:
+    from utils.cache_store import CacheStore
+
+logger = logging.getLogger('tradebot')
+
+_FRESH, _STALE, _MISS = 'fresh', 'stale', 'miss'
+
+_REFRESH_POOL: Optional[ThreadPoolExecutor] = None
+_REFRESH_POOL_LOCK = threading.Lock()
+
+
+def _refresh_pool() -> ThreadPoolExecutor:
+    global _REFRESH_POOL
+    with _REFRESH_POOL_LOCK:
+        if _REFRESH_POOL is None:
+            _REFRESH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cache-refresh')
+        return _REFRESH_POOL
+
+
+def approx_size(value: Any, _depth: int = 0) -> int:
+    """Rough byte size of a cached value.
+    
+    Follows containers a few levels down and counts array buffers
+    (``nbytes``) and object ``__dict__``s; good enough for sizing a cache,
+    not an exact measurement.
+    """
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return size + nbytes
+    if isinstance(value, dict):
+        return size + sum(
+            approx_size(k, _depth + 1) + approx_size(v, _depth + 1) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(approx_size(v, _depth + 1) for v in value)
+    if hasattr(value, '__dict__'):
+        return size + approx_size(vars(value), _depth + 1)
+    return size
+
+
+class _Shard:
+    """One lock's worth of cache entries, in LRU order."""
+    
+    __slots__ = (
+        'entries', 'lock', 'bytes', 'flights', 'tasks',
+        'hits', 'misses', 'stale_hits', 'coalesced', 'evictions', 'expirations',
+    )
+    
+    def __init__(self):
+        # key -> (value, stored at, expires at, size); times are time.monotonic()
+        self.entries: 'OrderedDict[str, Tuple[Any, float, float, int]]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.bytes = 0
+        self.flights: Dict[str, Future] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def drop(self, key: str) -> None:
+        self.bytes -= self.entries.pop(key)[3]
 
 
 class DataCache:
-    """Thread-safe data cache with TTL."""
+    """Thread-safe data cache with TTL and LRU eviction.
+    
+    Keys are spread over ``shards`` independently locked LRU shards so
+    concurrent readers rarely wait on each other. Size bounds apply to the
+    whole cache but LRU order is kept per shard, so a bounded cache uses a
+    single shard (exact LRU) unless ``shards`` is given. Expiry uses ``time.monotonic()`` deadlines, so wall-clock
+    jumps don't expire or revive entries.
+    
+    Expired entries are kept for ``stale_minutes`` more so ``get_stale`` can
+    serve them while an upstream is down, then dropped on access or by the
+    background sweeper.
     
-    def __init__(self, ttl_minutes: int = 5):
+    ``get_or_load`` fills misses with single-flight semantics: concurrent
+    callers for one key share a single loader call.
+    
+    With a ``CacheStore`` every write is also persisted (write-behind), and
+    the cache starts pre-warmed with the stored entries still in their TTL
+    or stale period.
+    """
+    
+    def __init__(
+        self,
+        ttl_minutes: float = 5,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        size_fn: Optional[Callable[[Any], int]] = None,
+        stale_minutes: float = 0,
+        sweep_seconds: Optional[float] = None,
+        shards: Optional[int] = None,
+        store: Optional['CacheStore'] = None
+    ):
         """Initialize cache.
         
         Args:
             ttl_minutes: Cache TTL in minutes
+            max_entries: Most entries kept (default: unbounded)
+            max_bytes: Most bytes kept, as measured by ``size_fn`` (default: unbounded)
+            size_fn: Byte size of a value (default: ``approx_size``)
+            stale_minutes: How long expired entries stay available to ``get_stale``
+            sweep_seconds: Interval of a background thread dropping dead
+                entries (default: only dropped when touched or evicted)
+            shards: Number of lock stripes; 1 gives exact global LRU order
+                (default: 1 if bounded, else 16)
+            store: On-disk second tier (default: memory only)
         """
-        self.ttl = timedelta(minutes=ttl_minutes)
-        self._cache: Dict[str, Tuple[Any, datetime]] = {}
-        self._lock = threading.RLock()
+        self.ttl = ttl_minutes * 60.0
+        self.stale = stale_minutes * 60.0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_fn = size_fn or approx_size
+        self._bounded = max_entries is not None or max_bytes is not None
+        if shards is None:
+            shards = 1 if self._bounded else 16
+        self._shards = [_Shard() for _ in range(max(shards, 1))]
+        self._count = len(self._shards)
+        
+        self.store = store
+        if store is not None:
+            self._warm()
+        
+        self._stop = threading.Event()
+        if sweep_seconds:
+            sweeper = threading.Thread(
+                target=self._sweep_loop, args=(weakref.ref(self), self._stop, sweep_seconds),
+                name='cache-sweeper', daemon=True
+            )
+            sweeper.start()
+    
+    @staticmethod
+    def _sweep_loop(ref: 'weakref.ref', stop: threading.Event, interval: float) -> None:
+        # Holds only a weak reference so an abandoned cache can still be collected
+        while not stop.wait(interval):
+            cache = ref()
+            if cache is None:
+                return
+            cache.sweep()
+            del cache
+    
+    def _warm(self) -> None:
+        """Load the store's live entries, mapping wall-clock times onto the monotonic clock."""
+        wall, now = time.time(), monotonic()
+        loaded = 0
+        for key, data, stored_at, expires_at in self.store.load(expired_after=wall - self.stale):
+            size = self.size_fn(data) if self.max_bytes is not None else 0
+            shard = self._shard(key)
+            with shard.lock:
+                self._put(shard, key, data, now - (wall - stored_at), now + (expires_at - wall), size)
+            self._evict_elsewhere(shard)
+            loaded += 1
+        logger.info(f"Cache {self.store.namespace}: pre-warmed {loaded} entries from disk")
+    
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[hash(key) % self._count]
+    
+    def _lookup(self, shard: _Shard, key: str, now: float, stale_ok: float = 0.0) -> Tuple[Any, str]:
+        """Value and freshness of ``key``; call with the shard lock held."""
+        entry = shard.entries.get(key)
+        if entry is None:
+            return None, _MISS
+        expires = entry[2]
+        if now < expires:
+            shard.entries.move_to_end(key)
+            return entry[0], _FRESH
+        if now < expires + stale_ok:
+            shard.entries.move_to_end(key)
+            return entry[0], _STALE
+        if now >= expires + self.stale:
+            shard.drop(key)
+            shard.expirations += 1
+        return None, _MISS
     
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache.
         
         Args:
             key: Cache key
-            
+        
         Returns:
             Cached value or None if expired/missing
         """
-        with self._lock:
-            if key in self._cache:
-                data, timestamp = self._cache[key]
-                if datetime.now() - timestamp < self.ttl:
-                    return data
-                else:
-                    del self._cache[key]
+        shard = self._shards[hash(key) % self._count]
+        with shard.lock:
+            entry = shard.entries.get(key)
+            # Fast path: fresh hit
+            if entry is not None and monotonic() < entry[2]:
+                shard.entries.move_to_end(key)
+                shard.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._lookup(shard, key, monotonic())
+            shard.misses += 1
             return None
     
-    def set(self, key: str, data: Any) -> None:
-        """Set value in cache.
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values, taking each shard lock once.
+        
+        Args:
+            keys: Cache keys
+        
+        Returns:
+            Key -> value for the keys with a fresh value
+        """
+        by_shard: Dict[int, List[str]] = {}
+        count = self._count
+        for key in keys:
+            by_shard.setdefault(hash(key) % count, []).append(key)
+        
+        now = monotonic()
+        found = {}
+        for index, shard_keys in by_shard.items():
+            shard = self._shards[index]
+            entries = shard.entries
+            hits = 0
+            with shard.lock:
+                for key in shard_keys:
+                    entry = entries.get(key)
+                    if entry is not None and now < entry[2]:
+                        entries.move_to_end(key)
+                        found[key] = entry[0]
+                        hits += 1
+                    elif entry is not None:
+                        self._lookup(shard, key, now)
+                shard.hits += hits
+                shard.misses += len(shard_keys) - hits
+        return found
+    
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        stale_ok: float = 0.0
+    ) -> Any:
+        """Get value from cache, loading it on a miss.
+        
+        Only one ``loader`` call runs per key at a time; other callers
+        missing on that key wait for its result (or its exception).
+        
+        Args:
+            key: Cache key
+            loader: Fetches the value
+            ttl: Seconds the loaded value stays fresh (default: cache TTL)
+            stale_ok: Seconds past expiry during which the old value is
+                returned at once while a single background load refreshes it
+                (stale-while-revalidate; bounded by ``stale_minutes``)
+        
+        Returns:
+            Cached or loaded value
+        """
+        shard = self._shard(key)
+        with shard.lock:
+            data, state = self._lookup(shard, key, monotonic(), stale_ok)
+            if state == _FRESH:
+                shard.hits += 1
+                return data
+            flight = shard.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = shard.flights[key] = Future()
+            else:
+                shard.coalesced += 1
+            if state == _STALE:
+                shard.stale_hits += 1
+            else:
+                shard.misses += 1
+        
+        if state == _STALE:
+            if leader:
+                _refresh_pool().submit(self._load, shard, key, loader, ttl, flight)
+            return data
+        if leader:
+            self._load(shard, key, loader, ttl, flight)
+        return flight.result()
+    
+    def _load(
+        self,
+        shard: _Shard,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[float],
+        flight: Future
+    ) -> None:
+        try:
+            data = loader()
+        except BaseException as e:
+            with shard.lock:
+                shard.flights.pop(key, None)
+            logger.debug(f"Cache load of {key} failed: {e}")
+            flight.set_exception(e)
+            return
+        # Store before retiring the flight so later callers find the value
+        self.set(key, data, ttl)
+        with shard.lock:
+            shard.flights.pop(key, None)
+        flight.set_result(data)
+    
+    async def get_or_load_async(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        stale_ok: float = 0.0
+    ) -> Any:
+        """``get_or_load`` for coroutine loaders.
+        
+        Callers on the same event loop share one load task per key.
+        """
+        loop = asyncio.get_running_loop()
+        shard = self._shard(key)
+        with shard.lock:
+            data, state = self._lookup(shard, key, monotonic(), stale_ok)
+            if state == _FRESH:
+                shard.hits += 1
+                return data
+            task = shard.tasks.get(key)
+            if task is None or task.get_loop() is not loop:
+                task = shard.tasks[key] = loop.create_task(self._load_async(shard, key, loader, ttl))
+                if state == _STALE:
+                    task.add_done_callback(_consume_error)
+            else:
+                shard.coalesced += 1
+            if state == _STALE:
+                shard.stale_hits += 1
+            else:
+                shard.misses += 1
+        
+        if state == _STALE:
+            return data
+        return await asyncio.shield(task)
+    
+    async def _load_async(
+        self,
+        shard: _Shard,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float]
+    ) -> Any:
+        try:
+            data = await loader()
+            self.set(key, data, ttl)
+            return data
+        finally:
+            with shard.lock:
+                if shard.tasks.get(key) is asyncio.current_task():
+                    del shard.tasks[key]
+    
+    def get_stale(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """Get value from cache even if its TTL has passed.
+        
+        For serving the last good response while the source is unavailable.
+        
+        Args:
+            key: Cache key
+            max_age: Oldest acceptable value in seconds (default: any age)
+        
+        Returns:
+            Cached value or None if missing/too old
+        """
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is not None and (max_age is None or monotonic() - entry[1] <= max_age):
+                return entry[0]
+            return None
+    
+    def set(self, key: str, data: Any, ttl: Optional[float] = None) -> None:
+        """Set value in cache, evicting least recently used entries if over a bound.
         
         Args:
             key: Cache key
             data: Value to cache
+            ttl: Seconds the value stays fresh (default: cache TTL)
+        """
+        size = self.size_fn(data) if self.max_bytes is not None else 0
+        ttl = self.ttl if ttl is None else ttl
+        now = monotonic()
+        shard = self._shard(key)
+        with shard.lock:
+            self._put(shard, key, data, now, now + ttl, size)
+        self._evict_elsewhere(shard)
+        if self.store is not None:
+            wall = time.time()
+            self.store.put(key, data, wall, wall + ttl)
+    
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """Set several values, taking each shard lock once.
+        
+        Args:
+            items: Key -> value
+            ttl: Seconds the values stay fresh (default: cache TTL)
+        """
+        by_shard: Dict[int, List[Tuple[str, Any, int]]] = {}
+        count = self._count
+        measure = self.size_fn if self.max_bytes is not None else None
+        for key, data in items.items():
+            by_shard.setdefault(hash(key) % count, []).append(
+                (key, data, measure(data) if measure else 0)
+            )
+        
+        ttl = self.ttl if ttl is None else ttl
+        now = monotonic()
+        for index, entries in by_shard.items():
+            shard = self._shards[index]
+            with shard.lock:
+                for key, data, size in entries:
+                    self._put(shard, key, data, now, now + ttl, size)
+            self._evict_elsewhere(shard)
+        if self.store is not None:
+            wall = time.time()
+            self.store.put_many(items.items(), wall, wall + ttl)
+    
+    def seed(self, other: 'DataCache') -> int:
+        """Copy another cache's entries, keeping their stored and expiry times.
+        
+        For a memory-only cache holding the same data as a persisted one
+        (e.g. a last-good fallback beside the response cache), so it starts
+        warm without writing every payload to disk twice.
+        
+        Returns:
+            Number of entries copied
+        """
+        copied = 0
+        for source in other._shards:
+            with source.lock:
+                entries = list(source.entries.items())
+            for key, (data, stored, expires, _) in entries:
+                size = self.size_fn(data) if self.max_bytes is not None else 0
+                shard = self._shard(key)
+                with shard.lock:
+                    self._put(shard, key, data, stored, expires, size)
+                self._evict_elsewhere(shard)
+                copied += 1
+        return copied
+    
+    def _put(self, shard: _Shard, key: str, data: Any, now: float, expires: float, size: int) -> None:
+        """Store one entry and evict from its shard while over a bound; call with the lock held."""
+        if key in shard.entries:
+            shard.drop(key)
+        shard.entries[key] = (data, now, expires, size)
+        shard.bytes += size
+        
+        entries = shard.entries
+        while self._bounded and self._over():
+            oldest = next(iter(entries))
+            if oldest == key:
+                # A single value larger than the byte bound is still cached
+                break
+            shard.drop(oldest)
+            shard.evictions += 1
+    
+    def _over(self) -> bool:
+        """Whether the whole cache is past a bound (other shards are read unlocked)."""
+        shards = self._shards
+        return (
+            (self.max_entries is not None and sum(len(s.entries) for s in shards) > self.max_entries)
+            or (self.max_bytes is not None and sum(s.bytes for s in shards) > self.max_bytes)
+        )
+    
+    def _evict_elsewhere(self, written: _Shard) -> None:
+        """Evict from the other shards when the written one had nothing older to give up."""
+        if not self._bounded or self._count == 1 or not self._over():
+            return
+        for shard in self._shards:
+            if shard is written:
+                continue
+            with shard.lock:
+                while shard.entries and self._over():
+                    shard.drop(next(iter(shard.entries)))
+                    shard.evictions += 1
+            if not self._over():
+                return
+    
+    def sweep(self) -> int:
+        """Drop entries past their TTL and stale period.
+        
+        Returns:
+            Number of entries dropped
+        """
+        cutoff = monotonic() - self.stale
+        dropped = 0
+        for shard in self._shards:
+            with shard.lock:
+                dead = [key for key, entry in shard.entries.items() if entry[2] <= cutoff]
+                for key in dead:
+                    shard.drop(key)
+                shard.expirations += len(dead)
+            dropped += len(dead)
+        if self.store is not None:
+            self.store.purge(expired_before=time.time() - self.stale)
+        return dropped
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for pending store writes to reach disk.
+        
+        Returns:
+            True if flushed (or there is no store) before the timeout
         """
-        with self._lock:
-            self._cache[key] = (data, datetime.now())
+        return self.store.flush(timeout) if self.store is not None else True
+    
+    def close(self) -> None:
+        """Stop the background sweeper and flush and close the store."""
+        self._stop.set()
+        if self.store is not None:
+            self.store.close()
     
     def delete(self, key: str) -> bool:
         """Delete key from cache.
         
         Args:
             key: Cache key
-            
+        
         Returns:
             True if key existed and was deleted
         """
-        with self._lock:
-            if key in self._cache:
-                del self._cache[key]
+        if self.store is not None:
+            self.store.delete(key)
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.entries:
+                shard.drop(key)
                 return True
             return False
     
     def clear(self) -> None:
         """Clear all cached data."""
-        with self._lock:
-            self._cache.clear()
+        if self.store is not None:
+            self.store.clear()
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.bytes = 0
     
     def get_ttl_remaining(self, key: str) -> Optional[float]:
         """Get remaining TTL in seconds.
         
         Args:
             key: Cache key
-            
+        
         Returns:
             Remaining seconds or None if not cached
         """
-        with self._lock:
-            if key in self._cache:
-                _, timestamp = self._cache[key]
-                elapsed = datetime.now() - timestamp
-                remaining = self.ttl - elapsed
-                return max(0, remaining.total_seconds())
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is not None:
+                return max(0.0, entry[2] - monotonic())
             return None
     
+    def stats(self) -> Dict[str, Any]:
+        """Counters for sizing the cache."""
+        totals = dict.fromkeys(
+            ('entries', 'bytes', 'hits', 'misses', 'stale_hits', 'coalesced', 'evictions', 'expirations'), 0
+        )
+        for shard in self._shards:
+            with shard.lock:
+                totals['entries'] += len(shard.entries)
+                totals['bytes'] += shard.bytes
+                for name in ('hits', 'misses', 'stale_hits', 'coalesced', 'evictions', 'expirations'):
+                    totals[name] += getattr(shard, name)
+        lookups = totals['hits'] + totals['misses']
+        totals['hit_rate'] = totals['hits'] / lookups if lookups else 0.0
+        if self.max_bytes is None:
+            totals['bytes'] = None
+        return totals
+    
     def keys(self) -> list:
         """Get all cache keys."""
-        with self._lock:
-            return list(self._cache.keys())
+        keys = []
+        for shard in self._shards:
+            with shard.lock:
+                keys.extend(shard.entries)
+        return keys
     
     def __len__(self) -> int:
         """Get number of cached items."""
-        with self._lock:
-            return len(self._cache)
+        return sum(len(shard.entries) for shard in self._shards)
+
+
+def _consume_error(task: 'asyncio.Task') -> None:
+    # Background refreshes have no awaiter; log their failures instead
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Cache refresh failed: {task.exception()}")
+
+
+def key_builder(func: Callable, template: Optional[str]) -> Callable[[tuple, dict], Optional[str]]:
+    """Build cache keys for calls of ``func`` from a template.
+    
+    Args:
+        func: Function whose call arguments fill the template
+        template: e.g. ``'option_chain:{symbol}'`` (None: keys are None)
+    
+    Returns:
+        Function of (args, kwargs) -> key
+    """
+    signature = inspect.signature(func)
+    
+    def build(args: tuple, kwargs: dict) -> Optional[str]:
+        if template is None:
+            return None
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return template.format(**bound.arguments)
+    return build
+
+
+def cached(key: str, ttl: Optional[float] = None, stale_ok: float = 0.0) -> Callable:
+    """Serve a method's results from ``self.cache`` via ``get_or_load``.
+    
+    Concurrent calls with the same key share one underlying call.
+    
+    Args:
+        key: Cache key template formatted with the call's arguments
+        ttl: Seconds a result stays fresh (default: cache TTL)
+        stale_ok: Stale-while-revalidate window in seconds
+    
+    Returns:
+        Decorator for plain or coroutine methods
+    """
+    def decorator(func: Callable) -> Callable:
+        make_key = key_builder(func, key)
+        
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                return await self.cache.get_or_load_async(
+                    make_key((self,) + args, kwargs), lambda: func(self, *args, **kwargs), ttl, stale_ok
+                )
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            return self.cache.get_or_load(
+                make_key((self,) + args, kwargs), lambda: func(self, *args, **kwargs), ttl, stale_ok
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,143 @@
+"""On-disk second tier for DataCache.
+
+``CacheStore`` keeps cache entries in a SQLite table so a restarted process
+can pre-warm its in-memory ``DataCache`` instead of refetching everything.
+Values are pickled and zlib-compressed; each row carries wall-clock
+stored/expiry times, since monotonic deadlines don't survive a restart.
+Writes go through a write-behind queue, which also does the serializing,
+so ``DataCache.set`` never waits on disk or on pickling. Cached values
+must therefore not be mutated after they are set.
+"""
+import logging
+import pickle
+import zlib
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union
+
+from database.connection import ConnectionManager
+from database.write_queue import WriteBehindQueue
+
+logger = logging.getLogger('tradebot')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID
+"""
+
+_UPSERT = (
+    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, stored_at, expires_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+def encode(value: Any) -> bytes:
+    """Compact serialized form of a cache value."""
+    return zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+
+def decode(blob: bytes) -> Any:
+    return pickle.loads(zlib.decompress(blob))
+
+
+class CacheStore:
+    """SQLite-backed persistence for one cache namespace."""
+
+    def __init__(self, db_file: Union[str, Path], namespace: str = 'default'):
+        """Open (or create) the store.
+
+        Args:
+            db_file: SQLite file, shared by any number of namespaces
+            namespace: Keeps this cache's keys apart from other caches'
+        """
+        if str(db_file) != ':memory:':
+            Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+        self.namespace = namespace
+        self.db = ConnectionManager(db_file)
+        with self.db.writer() as conn:
+            conn.execute(SCHEMA)
+        self.writes = WriteBehindQueue(self.db, prepare=self._encode_rows)
+
+    def put(self, key: str, value: Any, stored_at: float, expires_at: float) -> None:
+        """Queue one entry for writing.
+
+        A value that can't be serialized is skipped on the writer thread and
+        stays memory-only.
+
+        Args:
+            key: Cache key
+            value: Value to persist
+            stored_at: Wall-clock time the value was cached
+            expires_at: Wall-clock expiry time
+        """
+        self.put_many([(key, value)], stored_at, expires_at)
+
+    def put_many(self, items: Iterable[Tuple[str, Any]], stored_at: float, expires_at: float) -> None:
+        """Queue several entries sharing stored/expiry times as one transaction."""
+        rows = [(self.namespace, key, value, stored_at, expires_at) for key, value in items]
+        if rows:
+            self.writes.submit_many(_UPSERT, rows)
+
+    @staticmethod
+    def _encode_rows(sql: str, rows: List[tuple]) -> List[tuple]:
+        """Serialize queued upserts on the writer thread."""
+        if sql is not _UPSERT:
+            return rows
+        encoded = []
+        for namespace, key, value, stored_at, expires_at in rows:
+            try:
+                encoded.append((namespace, key, encode(value), stored_at, expires_at))
+            except Exception as e:
+                logger.debug(f"Not persisting cache entry {key}: {e}")
+        return encoded
+
+    def delete(self, key: str) -> None:
+        self.writes.submit(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+        )
+
+    def clear(self) -> None:
+        self.writes.submit("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def purge(self, expired_before: float) -> None:
+        """Delete entries that expired before a wall-clock time."""
+        self.writes.submit(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at < ?",
+            (self.namespace, expired_before)
+        )
+
+    def load(self, expired_after: float) -> Iterator[Tuple[str, Any, float, float]]:
+        """Stored entries that expire (or expired) after a wall-clock time.
+
+        Yields:
+            (key, value, stored_at, expires_at), oldest first; entries that
+            no longer decode (e.g. after a class was renamed) are skipped
+        """
+        self.writes.drain()
+        with self.db.reader() as conn:
+            rows = conn.execute(
+                "SELECT key, value, stored_at, expires_at FROM cache_entries "
+                "WHERE namespace = ? AND expires_at >= ? ORDER BY stored_at",
+                (self.namespace, expired_after)
+            ).fetchall()
+        for row in rows:
+            try:
+                value = decode(row['value'])
+            except Exception as e:
+                logger.debug(f"Skipping unreadable cache entry {row['key']}: {e}")
+                continue
+            yield row['key'], value, row['stored_at'], row['expires_at']
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for queued writes to reach disk."""
+        return self.writes.flush(timeout)
+
+    def close(self) -> None:
+        """Write what's queued and close the database."""
+        self.writes.close()
+        self.db.close()
@@ -1,8 +1,14 @@
 """Decorators for tradebot."""
+import asyncio
+import math
+import threading
 import time
 import functools
+import inspect
 import logging
-from typing import Callable, Any
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Any, Dict, Optional
 
 logger = logging.getLogger('tradebot')
 
@@ -10,6 +16,11 @@ logger = logging.getLogger('tradebot')
 def retry_with_backoff(max_retries: int = 3, base_delay: float = 1.0, backoff_factor: float = 2.0):
     """Retry decorator with exponential backoff.
     
+    Works on coroutine functions too; those back off with ``asyncio.sleep``
+    so a waiting retry doesn't hold a thread. Exceptions with a false
+    ``retryable`` attribute (an open circuit, an exhausted quota) are
+    raised at once.
+    
     Args:
         max_retries: Maximum number of retry attempts
         base_delay: Initial delay in seconds
@@ -19,6 +30,24 @@ def retry_with_backoff(max_retries: int = 3, base_delay: float = 1.0, backoff_fa
         Decorator function
     """
     def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                for attempt in range(max_retries):
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        if not getattr(e, 'retryable', True):
+                            raise
+                        if attempt == max_retries - 1:
+                            logger.error(f"Max retries ({max_retries}) exceeded for {func.__name__}: {e}")
+                            raise
+                        
+                        delay = base_delay * (backoff_factor ** attempt)
+                        logger.warning(f"Attempt {attempt + 1}/{max_retries} failed for {func.__name__}: {e}. Retrying in {delay}s...")
+                        await asyncio.sleep(delay)
+            return async_wrapper
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             last_exception = None
@@ -27,6 +56,8 @@ def retry_with_backoff(max_retries: int = 3, base_delay: float = 1.0, backoff_fa
                     return func(*args, **kwargs)
                 except Exception as e:
                     last_exception = e
+                    if not getattr(e, 'retryable', True):
+                        raise
                     if attempt == max_retries - 1:
                         logger.error(f"Max retries ({max_retries}) exceeded for {func.__name__}: {e}")
                         raise last_exception
@@ -72,11 +103,21 @@ def log_execution_time(func: Callable) -> Callable:
     """Decorator to log function execution time.
     
     Args:
-        func: Function to wrap
+        func: Function to wrap (plain or coroutine function)
         
     Returns:
         Wrapped function
     """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.time()
+            result = await func(*args, **kwargs)
+            elapsed = time.time() - start
+            logger.debug(f"{func.__name__} executed in {elapsed:.2f}s")
+            return result
+        return async_wrapper
+    
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         start = time.time()
@@ -85,3 +126,306 @@ def log_execution_time(func: Callable) -> Callable:
         logger.debug(f"{func.__name__} executed in {elapsed:.2f}s")
         return result
     return wrapper
+
+
+class RetryBudget:
+    """Token bucket that caps extra attempts at a fraction of calls.
+    
+    Every call deposits ``ratio`` tokens (up to ``burst``); every extra
+    attempt withdraws one. During an outage, when every call would want
+    one, extra attempts stay near ``ratio`` of traffic instead of
+    multiplying the load on the failing service.
+    """
+    
+    def __init__(self, ratio: float = 0.1, burst: float = 10.0):
+        """Initialize budget.
+        
+        Args:
+            ratio: Extra attempts earned per call
+            burst: Most tokens that can be saved up
+        """
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+    
+    def deposit(self) -> None:
+        """Credit one call."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+    
+    def withdraw(self) -> bool:
+        """Take a token for an extra attempt; False if the budget is spent."""
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+    
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+
+class LatencyTracker:
+    """Latencies of recent successful calls."""
+    
+    def __init__(self, window: int = 256):
+        """Initialize tracker.
+        
+        Args:
+            window: Number of recent samples kept
+        """
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None without samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = min(max(math.ceil(pct / 100 * len(samples)), 1), len(samples))
+        return samples[rank - 1]
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class Hedging:
+    """Shared state of one ``hedged_request``-wrapped function."""
+    
+    def __init__(
+        self,
+        percentile: float,
+        initial_delay: float,
+        min_delay: float,
+        max_hedges: int,
+        min_samples: int,
+        budget: RetryBudget,
+        tracker: LatencyTracker
+    ):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_hedges = max_hedges
+        self.min_samples = min_samples
+        self.budget = budget
+        self.tracker = tracker
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+        self._lock = threading.Lock()
+    
+    def count_call(self) -> None:
+        """Count a call and earn its share of the backup budget."""
+        with self._lock:
+            self.calls += 1
+        self.budget.deposit()
+    
+    def count_win(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+    
+    def count_denied(self) -> None:
+        """Count a call that ran long enough to want a backup but couldn't send one."""
+        with self._lock:
+            self.budget_denied += 1
+    
+    def can_hedge(self) -> bool:
+        """Whether a new call could send a backup at all."""
+        return self.max_hedges > 0 and self.budget.tokens >= 1
+    
+    def delay(self) -> float:
+        """How long to wait on an attempt before sending a backup."""
+        if len(self.tracker) < self.min_samples:
+            return self.initial_delay
+        return max(self.tracker.percentile(self.percentile), self.min_delay)
+    
+    def may_hedge(self) -> bool:
+        if not self.budget.withdraw():
+            self.count_denied()
+            return False
+        with self._lock:
+            self.hedges += 1
+        return True
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus the current hedge delay."""
+        with self._lock:
+            counters = {
+                'calls': self.calls,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+                'budget_denied': self.budget_denied,
+            }
+        return dict(counters, hedge_delay=self.delay(), p50=self.tracker.percentile(50))
+
+
+HEDGE_POOL_THREADS = 32
+
+_HEDGE_POOL: Optional[ThreadPoolExecutor] = None
+_HEDGE_POOL_LOCK = threading.Lock()
+# Free hedge pool threads; attempts only go to the pool when one is free, so
+# the pool never queues and never limits how many calls run at once
+_HEDGE_SLOTS = threading.BoundedSemaphore(HEDGE_POOL_THREADS)
+
+
+def _hedge_pool() -> ThreadPoolExecutor:
+    global _HEDGE_POOL
+    with _HEDGE_POOL_LOCK:
+        if _HEDGE_POOL is None:
+            _HEDGE_POOL = ThreadPoolExecutor(max_workers=HEDGE_POOL_THREADS, thread_name_prefix='hedge')
+        return _HEDGE_POOL
+
+
+def hedged_request(
+    percentile: float = 95.0,
+    initial_delay: float = 0.5,
+    min_delay: float = 0.05,
+    max_hedges: int = 1,
+    min_samples: int = 20,
+    budget_ratio: float = 0.1,
+    budget_burst: float = 10.0,
+    window: int = 256
+):
+    """Send a backup request when a call runs slower than usual.
+    
+    If an attempt hasn't finished after the ``percentile`` latency of
+    recent successful calls, another identical attempt is started and the
+    first success wins; the others are cancelled. Backups are paid for from
+    a ``RetryBudget``, so they stay a small fraction of traffic even when
+    everything is slow. Failures are not retried here; stack
+    ``retry_with_backoff`` outside this decorator for that.
+    
+    Only wrap idempotent reads. Coroutine functions run their attempts as
+    tasks, and a losing task is cancelled outright. Plain functions run on
+    the caller's thread whenever the call can't be hedged: no backup
+    budget, ``max_hedges=0``, or no free thread in the shared hedge pool.
+    Otherwise the attempts run on the pool, because a caller blocked inside
+    its own attempt couldn't return a backup's result. A losing attempt
+    that already started runs to completion and its result is dropped.
+    
+    Args:
+        percentile: Latency percentile that triggers a backup
+        initial_delay: Backup delay until ``min_samples`` latencies are known
+        min_delay: Floor on the backup delay
+        max_hedges: Most backups per call
+        min_samples: Successful calls needed before using the percentile
+        budget_ratio: Backups earned per call
+        budget_burst: Backups that can be saved up
+        window: Recent latencies kept
+        
+    Returns:
+        Decorator; the wrapped function exposes its ``Hedging`` state as ``.hedging``
+    """
+    def decorator(func: Callable) -> Callable:
+        hedging = Hedging(
+            percentile, initial_delay, min_delay, max_hedges, min_samples,
+            RetryBudget(budget_ratio, budget_burst), LatencyTracker(window)
+        )
+        
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                hedging.count_call()
+                started = {}
+                
+                def launch():
+                    task = asyncio.ensure_future(func(*args, **kwargs))
+                    started[task] = time.monotonic()
+                    return task
+                
+                primary = launch()
+                pending = {primary}
+                first_error = None
+                hedging_allowed = max_hedges > 0
+                try:
+                    while pending:
+                        timeout = hedging.delay() if hedging_allowed else None
+                        done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            if task.exception() is not None:
+                                first_error = first_error or task.exception()
+                                continue
+                            hedging.tracker.record(time.monotonic() - started[task])
+                            if task is not primary:
+                                hedging.count_win()
+                            return task.result()
+                        if not done and hedging_allowed:
+                            if hedging.may_hedge():
+                                logger.debug(f"Hedging {func.__name__} after {timeout * 1000:.0f}ms")
+                                pending.add(launch())
+                            hedging_allowed = len(started) <= max_hedges and hedging.budget.tokens >= 1
+                    raise first_error
+                finally:
+                    for task in started:
+                        task.cancel()
+            
+            async_wrapper.hedging = hedging
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            hedging.count_call()
+            if not (hedging.can_hedge() and _HEDGE_SLOTS.acquire(blocking=False)):
+                delay, began = hedging.delay(), time.monotonic()
+                result = func(*args, **kwargs)
+                elapsed = time.monotonic() - began
+                hedging.tracker.record(elapsed)
+                if elapsed >= delay and max_hedges > 0:
+                    hedging.count_denied()
+                return result
+            
+            pool = _hedge_pool()
+            started = {}
+            
+            def attempt():
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    _HEDGE_SLOTS.release()
+            
+            def launch():
+                future = pool.submit(attempt)
+                started[future] = time.monotonic()
+                return future
+            
+            primary = launch()
+            pending = {primary}
+            first_error = None
+            hedging_allowed = max_hedges > 0
+            try:
+                while pending:
+                    timeout = hedging.delay() if hedging_allowed else None
+                    done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.exception() is not None:
+                            first_error = first_error or future.exception()
+                            continue
+                        hedging.tracker.record(time.monotonic() - started[future])
+                        if future is not primary:
+                            hedging.count_win()
+                        return future.result()
+                    if not done and hedging_allowed:
+                        if _HEDGE_SLOTS.acquire(blocking=False):
+                            if hedging.may_hedge():
+                                logger.debug(f"Hedging {func.__name__} after {timeout * 1000:.0f}ms")
+                                pending.add(launch())
+                            else:
+                                _HEDGE_SLOTS.release()
+                        hedging_allowed = len(started) <= max_hedges and hedging.budget.tokens >= 1
+                raise first_error
+            finally:
+                for future in started:
+                    if future.cancel():
+                        _HEDGE_SLOTS.release()
+        
+        wrapper.hedging = hedging
+        return wrapper
+    return decorator
@@ -0,0 +1,31 @@
+"""PEP 562 lazy package exports."""
+import importlib
+import sys
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """Module ``__getattr__`` and ``__dir__`` that import names on first access.
+    
+    Usage in a package ``__init__``::
+    
+        __getattr__, __dir__ = lazy_exports(__name__, {'DataCache': 'cache'})
+    
+    Args:
+        package: The package's ``__name__``
+        exports: Exported name -> submodule defining it
+    """
+    namespace = sys.modules[package].__dict__
+    
+    def __getattr__(name: str) -> object:
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(f'.{module}', package), name)
+        namespace[name] = value
+        return value
+    
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+    
+    return __getattr__, __dir__
@@ -0,0 +1,356 @@
+"""Rate limiting and circuit breaking for upstream data calls.
+
+An ``EndpointGuard`` sits in front of one upstream endpoint (option chain,
+bars, FII flows, ...) and combines:
+
+- a ``TokenBucket`` quota whose rate backs off when the endpoint fails or
+  slows down and recovers gradually once it is healthy again
+- a ``CircuitBreaker`` that stops calling an endpoint after repeated
+  failures and lets a trial call through after a cool-off
+- the last good response per key in a ``DataCache``, served instead of an
+  error while the endpoint is throttled, open or failing
+
+Callers never queue behind a sick upstream for longer than the guard's
+``max_wait``.
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from utils.cache import DataCache, key_builder
+
+logger = logging.getLogger('tradebot')
+
+
+class UpstreamUnavailable(Exception):
+    """An upstream call was refused locally; retrying right away won't help."""
+    retryable = False
+
+
+class RateLimitedError(UpstreamUnavailable):
+    """No request quota left within the allowed wait."""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """The endpoint's circuit breaker is open."""
+
+
+class TokenBucket:
+    """Token bucket rate limiter."""
+    
+    def __init__(self, rate: float, capacity: float):
+        """Initialize bucket.
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Most tokens held (the allowed burst)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def _take(self, tokens: float) -> float:
+        """Take tokens if available; otherwise seconds until they will be."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+    
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens without waiting."""
+        return self._take(tokens) == 0.0
+    
+    def acquire(self, timeout: float = 0.0, tokens: float = 1.0) -> bool:
+        """Take tokens, waiting up to ``timeout`` seconds for them.
+        
+        Returns:
+            False if they wouldn't be available in time (without waiting)
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+    
+    async def acquire_async(self, timeout: float = 0.0, tokens: float = 1.0) -> bool:
+        """``acquire`` that waits on the event loop."""
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+    
+    def set_rate(self, rate: float) -> None:
+        """Change the refill rate, keeping tokens earned so far."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+    
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit breaker.
+    
+    Closed: calls flow; ``failure_threshold`` consecutive failures open it.
+    Open: calls are refused until ``recovery_timeout`` seconds have passed.
+    Half-open: up to ``half_open_calls`` trial calls go through; a success
+    closes the circuit, a failure opens it again.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(
+        self,
+        name: str = '',
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_calls: int = 1
+    ):
+        """Initialize breaker.
+        
+        Args:
+            name: Endpoint name for logging
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds to stay open before trying again
+            half_open_calls: Trial calls allowed while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_calls = half_open_calls
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        self._lock = threading.Lock()
+    
+    def _current(self, now: float) -> str:
+        if self._state == self.OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._trials = 0
+        return self._state
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current(time.monotonic())
+    
+    def allow(self) -> bool:
+        """Whether a call may go through now."""
+        with self._lock:
+            state = self._current(time.monotonic())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+            return False
+    
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self._state = self.CLOSED
+            self._failures = 0
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                logger.warning(
+                    f"Circuit {self.name} open after {self._failures} failures; "
+                    f"retrying in {self.recovery_timeout:.0f}s"
+                )
+
+
+class EndpointGuard:
+    """Quota, circuit breaker and stale-cache fallback for one upstream endpoint."""
+    
+    def __init__(
+        self,
+        name: str,
+        cache: DataCache,
+        rate: float,
+        burst: float,
+        max_wait: float = 0.5,
+        min_rate: Optional[float] = None,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        slow_call_seconds: Optional[float] = None
+    ):
+        """Initialize guard.
+        
+        Args:
+            name: Endpoint name
+            cache: Where the last good response per key is kept
+            rate: Requests per second allowed when the endpoint is healthy
+            burst: Requests allowed back to back
+            max_wait: Longest a caller waits for quota before falling back
+            min_rate: Floor the rate backs off to (default: rate / 10)
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds the circuit stays open
+            slow_call_seconds: Calls slower than this count as failures
+                for the breaker and rate (their result is still used)
+        """
+        self.name = name
+        self.cache = cache
+        self.max_rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.max_wait = max_wait
+        self.slow_call_seconds = slow_call_seconds
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(name, failure_threshold, recovery_timeout)
+        self.fallbacks = 0
+    
+    def _healthy(self) -> None:
+        self.breaker.record_success()
+        if self.bucket.rate < self.max_rate:
+            # Additive increase: recover about a tenth of the quota per good call
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate + self.max_rate / 10))
+    
+    def _unhealthy(self) -> None:
+        self.breaker.record_failure()
+        # Multiplicative decrease
+        self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+    
+    def _finish(self, key: Optional[str], result: Any, elapsed: float) -> Any:
+        if self.slow_call_seconds is not None and elapsed > self.slow_call_seconds:
+            logger.warning(f"{self.name}: slow response ({elapsed:.2f}s)")
+            self._unhealthy()
+        else:
+            self._healthy()
+        if key is not None:
+            self.cache.set(key, result)
+        return result
+    
+    def _fallback(self, key: Optional[str], error: Exception) -> Any:
+        stale = self.cache.get_stale(key) if key is not None else None
+        if stale is None:
+            raise error
+        self.fallbacks += 1
+        logger.warning(f"{self.name}: serving last good {key} ({type(error).__name__}: {error})")
+        return stale
+    
+    def call(self, key: Optional[str], func: Callable, *args, **kwargs) -> Any:
+        """Call the endpoint, or serve the last good response for ``key``.
+        
+        Args:
+            key: Cache key for this request's response (None: no fallback)
+            func: The upstream call
+        
+        Raises:
+            CircuitOpenError, RateLimitedError or the upstream error when
+            there is nothing cached to fall back to
+        """
+        if not self.breaker.allow():
+            return self._fallback(key, CircuitOpenError(f"{self.name} circuit open"))
+        if not self.bucket.acquire(timeout=self.max_wait):
+            return self._fallback(key, RateLimitedError(f"{self.name} over quota"))
+        
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._unhealthy()
+            return self._fallback(key, e)
+        return self._finish(key, result, time.monotonic() - started)
+    
+    async def call_async(self, key: Optional[str], func: Callable, *args, **kwargs) -> Any:
+        """``call`` for coroutine functions; waiting for quota doesn't block the loop."""
+        if not self.breaker.allow():
+            return self._fallback(key, CircuitOpenError(f"{self.name} circuit open"))
+        if not await self.bucket.acquire_async(timeout=self.max_wait):
+            return self._fallback(key, RateLimitedError(f"{self.name} over quota"))
+        
+        started = time.monotonic()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            self._unhealthy()
+            return self._fallback(key, e)
+        return self._finish(key, result, time.monotonic() - started)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'state': self.breaker.state,
+            'rate': self.bucket.rate,
+            'tokens': self.bucket.tokens,
+            'fallbacks': self.fallbacks,
+        }
+
+
+def build_guards(
+    quotas: Dict[str, Dict[str, Any]],
+    cache: DataCache,
+    overrides: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, EndpointGuard]:
+    """One guard per endpoint.
+    
+    Args:
+        quotas: Endpoint -> ``EndpointGuard`` keyword arguments
+        cache: Cache shared by the guards
+        overrides: Per-endpoint settings replacing entries of ``quotas``
+    """
+    overrides = overrides or {}
+    return {
+        name: EndpointGuard(name, cache, **dict(settings, **overrides.get(name, {})))
+        for name, settings in quotas.items()
+    }
+
+
+def guarded(endpoint: str, key: Optional[str] = None) -> Callable:
+    """Route a method's calls through ``self.guards[endpoint]``.
+    
+    Args:
+        endpoint: Guard name
+        key: Cache key template formatted with the call's arguments, e.g.
+            ``'option_chain:{symbol}'`` (None: no stale fallback)
+    
+    Returns:
+        Decorator for plain or coroutine methods
+    """
+    def decorator(func: Callable) -> Callable:
+        cache_key = key_builder(func, key)
+        
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                guard = self.guards[endpoint]
+                return await guard.call_async(cache_key((self,) + args, kwargs), func, self, *args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            guard = self.guards[endpoint]
+            return guard.call(cache_key((self,) + args, kwargs), func, self, *args, **kwargs)
+        return wrapper
+    return decorator